@@ -0,0 +1,76 @@
+"""
+Times the vectorized alpha evaluation (IC, hit ratio, quantile returns and
+per-period IC over every feature x horizon) on a synthetic 1m-bar table,
+against a per-pair pandas loop extrapolated from a few pairs, and fails when
+evaluate_alpha exceeds its time budget. The budget holds for the default
+scale (a year of 1m bars, 100 features, 24 horizons) on one core; scale it
+with --budget-scale for slower machines or larger tables.
+
+Run from the repository root:
+    python -m benchmarks.bench_alpha_eval --rows 525600 --features 100 --horizons 24
+"""
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from src.alpha_eval import evaluate_alpha
+from src.instrumentation import peak_rss_mb
+
+# Wall time budget of evaluate_alpha at the default scale.
+BUDGET_SECS = 30
+
+def _synthetic_table(rows: int, features: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=rows, freq='1min', tz='UTC', name='Date')
+    close = 30000 * np.exp(np.cumsum(rng.normal(0, 0.001, rows)))
+    data = {'Close': close}
+    for i in range(features):
+        data[f'feature_{i}'] = rng.normal(size=rows)
+    return pd.DataFrame(data, index=dates)
+
+def _naive_pair(df: pd.DataFrame, feature: str, bars: int):
+    fwd = df['Close'].shift(-bars) / df['Close'] - 1
+    x = df[feature]
+    x.corr(fwd)
+    x.rank().corr(fwd.rank())
+    signs = np.sign(x) * np.sign(fwd)
+    (signs > 0).sum() / signs.abs().sum()
+    fwd.groupby(pd.qcut(x, 5, labels=False)).mean()
+
+def run_benchmark(rows: int, features: int, horizons: int, naive_pairs: int = 5, budget_scale: float = 1.0) -> pd.DataFrame:
+    df = _synthetic_table(rows, features)
+    bars = list(range(1, horizons + 1))
+    pairs = features * horizons
+
+    start = time.perf_counter()
+    evaluate_alpha(df, horizons=bars, quantiles=5, period='1D', interval='1min')
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(naive_pairs):
+        _naive_pair(df, f'feature_{i % features}', bars[i % horizons])
+    naive = (time.perf_counter() - start) / naive_pairs * pairs
+
+    return pd.DataFrame([
+        {'method': 'evaluate_alpha', 'secs': vectorized, 'pairs_per_sec': pairs / vectorized,
+         'budget_secs': BUDGET_SECS * budget_scale, 'peak_rss_mb': peak_rss_mb(),
+         'ok': vectorized <= BUDGET_SECS * budget_scale},
+        {'method': 'per-pair pandas (extrapolated)', 'secs': naive, 'pairs_per_sec': pairs / naive,
+         'budget_secs': None, 'peak_rss_mb': None, 'ok': True},
+    ])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=525_600)
+    parser.add_argument('--features', type=int, default=100)
+    parser.add_argument('--horizons', type=int, default=24)
+    parser.add_argument('--naive-pairs', type=int, default=5)
+    parser.add_argument('--budget-scale', type=float, default=1.0, help="Multiplies the budget, e.g. 2 on slow CI machines.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.rows, args.features, args.horizons, args.naive_pairs, args.budget_scale)
+    print(results.to_string(index=False, float_format='%.2f'))
+    if not results['ok'].all():
+        print(f"evaluate_alpha over its {BUDGET_SECS * args.budget_scale:.0f}s budget.")
+        sys.exit(1)
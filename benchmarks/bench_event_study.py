@@ -0,0 +1,56 @@
+"""
+Times the vectorized event study (mean-adjusted CAR paths from -1h to +4h
+grouped by sentiment bucket) on synthetic 15m candles and articles, against a
+per-event pandas loop extrapolated from a few events.
+
+Run from the repository root:
+    python -m benchmarks.bench_event_study --events 1000000 --candles 105120
+"""
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from src.event_study import event_study
+from benchmarks.synthetic import synthetic_candles
+
+def _synthetic_events(candles: pd.DataFrame, n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    span = (candles.index[-1] - candles.index[0]).value
+    return pd.DataFrame({
+        'article_id': np.arange(n, dtype=np.int32),
+        'publishedAt': candles.index[0] + pd.to_timedelta(np.sort(rng.integers(0, span, n))),
+        'sentiment_score': rng.uniform(-1, 1, n).astype(np.float32),
+    })
+
+def _naive_event(candles: pd.DataFrame, returns: pd.Series, published: pd.Timestamp):
+    bar = candles.index.searchsorted(published.floor('15min'))
+    normal = returns.iloc[max(bar - 100, 0):max(bar - 4, 0)].mean()
+    (returns.iloc[max(bar - 4, 0):bar + 17] - normal).cumsum()
+
+def run_benchmark(n_events: int, n_candles: int, naive_events: int = 200) -> pd.DataFrame:
+    candles = synthetic_candles(n_candles, interval='15m')
+    news = _synthetic_events(candles, n_events)
+
+    start = time.perf_counter()
+    event_study(news, candles, pre='1h', post='4h', adjustment='mean', estimation='24h', group_by='sentiment')
+    vectorized = time.perf_counter() - start
+
+    returns = candles['Close'].pct_change()
+    start = time.perf_counter()
+    for published in news['publishedAt'].iloc[:naive_events]:
+        _naive_event(candles, returns, published)
+    naive = (time.perf_counter() - start) / naive_events * n_events
+
+    return pd.DataFrame([
+        {'method': 'event_study', 'secs': vectorized, 'events_per_sec': n_events / vectorized},
+        {'method': 'per-event pandas (extrapolated)', 'secs': naive, 'events_per_sec': n_events / naive},
+    ])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1_000_000)
+    parser.add_argument('--candles', type=int, default=105_120, help="Number of 15m candles (105120 is three years).")
+    parser.add_argument('--naive-events', type=int, default=200)
+    args = parser.parse_args()
+
+    print(run_benchmark(args.events, args.candles, args.naive_events).to_string(index=False, float_format='%.3f'))
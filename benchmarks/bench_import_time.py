@@ -0,0 +1,97 @@
+"""
+Measures the startup cost of the entry points and stage modules with
+`python -X importtime` and fails when one exceeds its time budget or imports
+a heavy dependency (spaCy, NLTK, ccxt, NewsAPI, plotly, torch, ...) that only
+its stages should load.
+
+Each module is imported in a fresh interpreter; the best of --repeat runs is
+compared with its budget, scaled by --budget-scale for slower machines.
+
+Run from the repository root:
+    python -m benchmarks.bench_import_time --repeat 5
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Cumulative import time budgets in milliseconds. Entry points only import the
+# standard library and yaml; stage modules pay for pandas and pyarrow.
+IMPORT_BUDGETS_MS = {
+    'scripts.run_pipeline': 150,
+    'scripts.run_stream': 150,
+    'src.news_fetcher': 1000,
+    'src.market_data_fetcher': 1500,
+    'src.text_cleaner': 1500,
+    'src.deduplicator': 1500,
+    'src.nlp_processor': 1500,
+    'src.aligner': 1500,
+    'src.feature_builder': 1500,
+    'src.plotter': 1500,
+    'src.incremental': 1500,
+    'src.streaming': 1500,
+    'src.nlp_daemon': 150,
+}
+# Wall time budget of `python -m scripts.run_pipeline --help`, interpreter start included.
+HELP_BUDGET_MS = 500
+HEAVY_MODULES = ('spacy', 'nltk', 'ccxt', 'newsapi', 'plotly', 'torch', 'transformers', 'onnxruntime')
+
+def import_profile(module: str) -> tuple:
+    """
+    Imports `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (cumulative import time of `module` in ms, set of top-level packages imported).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    cumulative_us, packages = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        packages.add(name.strip().split('.')[0])
+        if name.strip() == module:
+            cumulative_us = int(cumulative)
+    return cumulative_us / 1000, packages
+
+def help_time_ms() -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-m', 'scripts.run_pipeline', '--help'], cwd=ROOT, capture_output=True, check=True)
+    return (time.perf_counter() - start) * 1000
+
+def run_benchmark(repeat: int = 3, budget_scale: float = 1.0) -> pd.DataFrame:
+    """
+    Returns:
+        pd.DataFrame: One row per module with 'ms', 'budget_ms', the heavy
+            modules it imported and whether it is 'ok'.
+    """
+    rows = []
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        profiles = [import_profile(module) for _ in range(repeat)]
+        heavy = sorted(set(HEAVY_MODULES) & profiles[0][1])
+        ms = min(profile[0] for profile in profiles)
+        rows.append({'module': module, 'ms': ms, 'budget_ms': budget * budget_scale,
+                     'heavy_imports': ','.join(heavy), 'ok': ms <= budget * budget_scale and not heavy})
+    ms = min(help_time_ms() for _ in range(repeat))
+    rows.append({'module': 'run_pipeline --help', 'ms': ms, 'budget_ms': HELP_BUDGET_MS * budget_scale,
+                 'heavy_imports': '', 'ok': ms <= HELP_BUDGET_MS * budget_scale})
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget-scale', type=float, default=1.0, help="Multiplies every budget, e.g. 2 on slow CI machines.")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.repeat, args.budget_scale)
+    print(results.to_string(index=False, float_format='%.1f'))
+    if not results['ok'].all():
+        print(f"Over budget or importing heavy modules: {results.loc[~results['ok'], 'module'].tolist()}")
+        sys.exit(1)
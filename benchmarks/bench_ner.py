@@ -0,0 +1,62 @@
+"""
+Compares entity extraction with the alias dictionary matcher and with spaCy
+NER (extract_entities_batch) on cleaned synthetic articles: throughput, the
+number of mentions found and the matcher's speedup. spaCy is skipped unless
+its model is installed. The best of --repeat runs is kept.
+
+Run from the repository root:
+    python -m benchmarks.bench_ner --articles 20000 --batch-size 256
+"""
+import time
+import argparse
+import pandas as pd
+from src.text_cleaner import clean_texts
+from src.entity_matcher import EntityMatcher
+from src.nlp_processor import SPACY_MODEL, load_ner_model, extract_entities_batch
+from benchmarks.synthetic import synthetic_articles
+
+def _best_of(func, repeat: int) -> tuple:
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run_benchmark(n_articles: int, batch_size: int = 256, repeat: int = 3) -> pd.DataFrame:
+    """
+    Returns:
+        pd.DataFrame: One row per extractor with 'articles_per_sec', 'mentions'
+            and 'speedup' over spaCy (NaN when spaCy is skipped).
+    """
+    import spacy
+
+    articles = synthetic_articles(n_articles)
+    texts = clean_texts(article['description'] or article['content'] for article in articles)
+    extractors = {'matcher': EntityMatcher().match_many}
+    if spacy.util.is_package(SPACY_MODEL):
+        nlp = load_ner_model()
+        extractors['spacy'] = lambda texts: extract_entities_batch(texts, nlp, batch_size=batch_size)
+
+    rows = []
+    for name, extract in extractors.items():
+        secs, entities = _best_of(lambda: extract(texts), repeat)
+        rows.append({
+            'extractor': name,
+            'articles_per_sec': n_articles / secs,
+            'mentions': sum(len(ents) for ents in entities),
+        })
+    results = pd.DataFrame(rows).set_index('extractor')
+    spacy_rate = results['articles_per_sec'].get('spacy', float('nan'))
+    results['speedup'] = results['articles_per_sec'] / spacy_rate
+    return results.reset_index()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.articles, args.batch_size, args.repeat)
+    print(results.to_string(index=False, float_format='%.1f'))
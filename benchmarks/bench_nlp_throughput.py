@@ -0,0 +1,69 @@
+"""
+Measures NLP throughput (articles/sec) against the number of worker processes.
+
+Run from the repository root:
+    python -m benchmarks.bench_nlp_throughput --articles 20000 --batch-size 256
+"""
+import os
+import time
+import argparse
+import pandas as pd
+from src.nlp_processor import (
+    download_nlp_models,
+    load_ner_model,
+    score_sentiments,
+    extract_entities_batch,
+)
+
+SAMPLE_PATH = os.path.join(
+    os.path.dirname(__file__), '..', 'data', 'processed_news',
+    'cleaned_Bitcoin_2025-06-09_2025-07-09.csv'
+)
+
+def _load_texts(n_articles: int) -> list:
+    """Repeats the sample cleaned corpus until it has n_articles texts."""
+    texts = pd.read_csv(SAMPLE_PATH)['content_cleaned'].fillna('').tolist()
+    repeats = n_articles // len(texts) + 1
+    return (texts * repeats)[:n_articles]
+
+def _process_counts(max_processes: int) -> list:
+    counts, n = [], 1
+    while n < max_processes:
+        counts.append(n)
+        n *= 2
+    counts.append(max_processes)
+    return counts
+
+def run_benchmark(n_articles: int, batch_size: int, max_processes: int) -> pd.DataFrame:
+    download_nlp_models()
+    nlp = load_ner_model()
+    texts = _load_texts(n_articles)
+
+    rows = []
+    for n_process in _process_counts(max_processes):
+        start = time.perf_counter()
+        score_sentiments(texts, n_process=n_process)
+        sentiment_secs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        extract_entities_batch(texts, nlp, batch_size=batch_size, n_process=n_process)
+        ner_secs = time.perf_counter() - start
+
+        rows.append({
+            'n_process': n_process,
+            'sentiment_articles_per_sec': n_articles / sentiment_secs,
+            'ner_articles_per_sec': n_articles / ner_secs,
+            'total_articles_per_sec': n_articles / (sentiment_secs + ner_secs),
+        })
+        print(f"n_process={n_process}: {rows[-1]['total_articles_per_sec']:.1f} articles/sec")
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--articles', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=256)
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    results = run_benchmark(args.articles, args.batch_size, args.max_processes)
+    print(results.to_string(index=False, float_format='%.1f'))
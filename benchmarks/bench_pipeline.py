@@ -0,0 +1,172 @@
+"""
+Times the pipeline stages on synthetic data of growing size and compares the
+timings with a saved baseline, so a change that slows a stage down is caught.
+
+Each size N means N raw articles spread over N one-minute candles. Stages:
+clean_text (clean_texts over the article texts), clean_news_data,
+process_nlp_features (skipped unless the spaCy model and VADER lexicon are
+installed), align_features_with_market_data and plot_signals in its 'fast'
+and 'full' modes. The best of --repeat runs is kept.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 --save-baseline
+    python -m benchmarks.bench_pipeline --sizes 1000 10000 100000 --compare
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import pandas as pd
+from src.text_cleaner import clean_texts, clean_news_data
+from src.nlp_processor import process_nlp_features
+from src.aligner import align_features_with_market_data
+from src.plotter import plot_signals
+from src.raw_news import write_raw_articles
+from src.storage import write_table
+from src.instrumentation import configure_logging
+from benchmarks.synthetic import synthetic_articles, synthetic_candles, synthetic_features
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('clean_text', 'clean_news_data', 'process_nlp_features', 'align', 'plot_fast', 'plot_full')
+PREREQUISITES = {'process_nlp_features': 'clean_news_data', 'plot_fast': 'align', 'plot_full': 'align'}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), '..', 'data', 'benchmarks', 'pipeline_baseline.json')
+
+def _nlp_models_installed() -> bool:
+    """process_nlp_features would otherwise download the models inside the timed region."""
+    import nltk
+    import spacy
+    try:
+        nltk.data.find('sentiment/vader_lexicon.zip')
+    except LookupError:
+        return False
+    return spacy.util.is_package('en_core_web_sm')
+
+def _best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(sizes: list, stages=STAGES, repeat: int = 3, work_dir: str = None) -> pd.DataFrame:
+    """
+    Returns:
+        pd.DataFrame: One row per stage and size with 'secs' and 'rows_per_sec'
+            ('secs' is NaN for skipped stages).
+    """
+    nlp_available = 'process_nlp_features' in stages and _nlp_models_installed()
+    work_dir = work_dir or tempfile.mkdtemp()
+    rows = []
+    try:
+        for size in sizes:
+            candles = synthetic_candles(size)
+            articles = synthetic_articles(size, start=str(candles.index[0]), end=str(candles.index[-1]))
+            raw_path = os.path.join(work_dir, f"raw_{size}.jsonl")
+            cleaned_path = os.path.join(work_dir, f"cleaned_{size}.parquet")
+            features_path = os.path.join(work_dir, f"features_{size}.parquet")
+            market_path = os.path.join(work_dir, f"market_{size}.parquet")
+            final_path = os.path.join(work_dir, f"final_{size}.parquet")
+            write_raw_articles(articles, raw_path)
+            write_table(candles, market_path)
+            write_table(synthetic_features(articles), features_path)
+            texts = pd.Series([article['description'] or article['content'] for article in articles])
+
+            runs = {
+                'clean_text': lambda: clean_texts(texts),
+                'clean_news_data': lambda: clean_news_data(raw_path, cleaned_path),
+                'process_nlp_features': lambda: process_nlp_features(
+                    cleaned_path, os.path.join(work_dir, f"nlp_{size}.parquet"),
+                ),
+                'align': lambda: align_features_with_market_data(
+                    features_path, market_path, final_path, interval='1m',
+                ),
+                'plot_fast': lambda: plot_signals(
+                    final_path, os.path.join(work_dir, f"plot_fast_{size}.html"), 'BTCUSDT', mode='fast',
+                ),
+                'plot_full': lambda: plot_signals(
+                    final_path, os.path.join(work_dir, f"plot_full_{size}.html"), 'BTCUSDT', mode='full',
+                ),
+            }
+            # Stages run in pipeline order; a stage whose input comes from a
+            # stage that is not benchmarked runs that stage first, untimed.
+            for stage in [stage for stage in STAGES if stage in stages]:
+                if PREREQUISITES.get(stage) not in (None, *stages):
+                    runs[PREREQUISITES[stage]]()
+                if stage == 'process_nlp_features' and not nlp_available:
+                    secs = float('nan')
+                else:
+                    secs = _best_of(runs[stage], repeat)
+                rows.append({'stage': stage, 'size': size, 'secs': secs, 'rows_per_sec': size / secs})
+    finally:
+        shutil.rmtree(work_dir)
+    return pd.DataFrame(rows)
+
+def environment() -> dict:
+    """Where a baseline was measured; timings are only comparable on the same machine."""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'pandas': pd.__version__,
+    }
+
+def save_baseline(results: pd.DataFrame, path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'environment': environment(),
+            'results': json.loads(results.to_json(orient='records')),
+        }, f, indent=4)
+
+def compare_with_baseline(results: pd.DataFrame, path: str, tolerance: float = 0.2) -> pd.DataFrame:
+    """
+    Joins timings with the baseline's on stage and size.
+
+    Returns:
+        pd.DataFrame: The joined rows with 'baseline_secs', 'ratio' (secs / baseline)
+            and 'regressed' (ratio above 1 + tolerance).
+    """
+    with open(path, 'r') as f:
+        baseline = json.load(f)
+    if baseline['environment'] != environment():
+        logger.warning(
+            f"Baseline was measured on {baseline['environment']}; timings may not be comparable."
+        )
+    baseline_df = pd.DataFrame(baseline['results'])[['stage', 'size', 'secs']]
+    compared = results.merge(baseline_df.rename(columns={'secs': 'baseline_secs'}), on=['stage', 'size'])
+    compared['ratio'] = compared['secs'] / compared['baseline_secs']
+    compared['regressed'] = compared['ratio'] > 1 + tolerance
+    return compared
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument('--save-baseline', action='store_true', help="Save the timings as the new baseline.")
+    parser.add_argument('--compare', action='store_true', help="Compare with the baseline; exit 1 on a regression.")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown before a stage counts as regressed.")
+    args = parser.parse_args()
+    configure_logging('WARNING')
+
+    results = run_benchmark(args.sizes, stages=args.stages, repeat=args.repeat)
+    if args.compare:
+        compared = compare_with_baseline(results, args.baseline, tolerance=args.tolerance)
+        print(compared.to_string(index=False, float_format='%.3f'))
+        if compared['regressed'].any():
+            print(f"Regressed: {compared.loc[compared['regressed'], ['stage', 'size']].to_dict('records')}")
+            sys.exit(1)
+    else:
+        print(results.to_string(index=False, float_format='%.3f'))
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
@@ -0,0 +1,52 @@
+"""
+Compares write/read time and disk footprint of the storage formats on a
+month of synthetic 1m candles.
+
+Run from the repository root:
+    python -m benchmarks.bench_storage --days 30
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+import pandas as pd
+from src.storage import EXTENSIONS, read_table, write_table
+from benchmarks.synthetic import synthetic_candles
+
+def _disk_usage(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+def run_benchmark(days: int) -> pd.DataFrame:
+    candles = synthetic_candles(days * 1440)
+    work_dir = tempfile.mkdtemp()
+    rows = []
+    try:
+        for fmt, ext in EXTENSIONS.items():
+            path = os.path.join(work_dir, f"candles{ext}")
+            start = time.perf_counter()
+            write_table(candles, path, symbol='BTCUSDT')
+            write_secs = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_table(path, index_col='Date')
+            read_secs = time.perf_counter() - start
+
+            rows.append({
+                'format': fmt,
+                'write_secs': write_secs,
+                'read_secs': read_secs,
+                'size_mb': _disk_usage(path) / 1e6,
+            })
+    finally:
+        shutil.rmtree(work_dir)
+    return pd.DataFrame(rows)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    print(run_benchmark(args.days).to_string(index=False, float_format='%.3f'))
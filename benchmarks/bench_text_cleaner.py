@@ -0,0 +1,69 @@
+"""
+Compares the original two-pass, per-row clean_text with the single-pass
+cleaner (in-process and sharded) on a synthetic corpus of news snippets, and
+checks that all of them produce identical output.
+
+Run from the repository root:
+    python -m benchmarks.bench_text_cleaner --rows 1000000 --n-process 4
+"""
+import re
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from src.text_cleaner import clean_texts
+
+_WORDS = [
+    'Bitcoin', 'ETF', 'SEC', 'rally', 'hack', 'exchange', 'price', 'surges', 'to', 'the', 'of', '$65,000',
+    '12.5%', 'Q3', '<b>breaking</b>', '<a href="https://example.com">link</a>', 'crypto-market', 'naïve',
+    'CEO\'s', '\U0001F680', '—', 'U.S.', 'on-chain', '&amp;', '<br/>', '2025', 'halving', 'whales',
+]
+
+def _reference_clean_text(text) -> str:
+    """The original implementation: two uncompiled re.sub passes, lower and split/join."""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = text.lower()
+    text = " ".join(text.split())
+    return text
+
+def _synthetic_corpus(rows: int, seed: int = 0) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(10, 60, rows)
+    words = np.array(_WORDS, dtype=object)[rng.integers(0, len(_WORDS), lengths.sum())]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    texts = pd.Series([' '.join(words[bounds[i]:bounds[i + 1]]) for i in range(rows)], dtype=object)
+    texts[rng.random(rows) < 0.01] = None
+    return texts
+
+def run_benchmark(rows: int, n_process: int) -> pd.DataFrame:
+    texts = _synthetic_corpus(rows)
+    results, outputs = [], {}
+    runs = [
+        ('reference .apply', lambda: texts.apply(_reference_clean_text).tolist()),
+        ('clean_texts', lambda: clean_texts(texts)),
+    ]
+    if n_process > 1:
+        runs.append((f'clean_texts n_process={n_process}', lambda: clean_texts(texts, n_process=n_process)))
+
+    for name, run in runs:
+        start = time.perf_counter()
+        outputs[name] = run()
+        secs = time.perf_counter() - start
+        results.append({'method': name, 'secs': secs, 'rows_per_sec': rows / secs})
+
+    reference = outputs['reference .apply']
+    for name, output in outputs.items():
+        if output != reference:
+            raise AssertionError(f"{name} output differs from the reference implementation")
+    return pd.DataFrame(results)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--n-process', type=int, default=4)
+    args = parser.parse_args()
+
+    print(run_benchmark(args.rows, args.n_process).to_string(index=False, float_format='%.2f'))
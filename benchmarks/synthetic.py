@@ -0,0 +1,86 @@
+"""
+Deterministic synthetic inputs for the benchmarks: raw news articles in the
+NewsAPI schema read by clean_news_data, and OHLCV candles as written by
+fetch_market_data. The same arguments always give the same data.
+"""
+import numpy as np
+import pandas as pd
+
+_WORDS = [
+    'Bitcoin', 'ETF', 'SEC', 'rally', 'hack', 'exchange', 'price', 'surges', 'to', 'the', 'of', '$65,000',
+    '12.5%', 'Q3', '<b>breaking</b>', '<a href="https://example.com">link</a>', 'crypto-market', 'naïve',
+    'CEO\'s', '\U0001F680', '—', 'U.S.', 'on-chain', '&amp;', '<br/>', '2025', 'halving', 'whales',
+    'Ethereum', 'Binance', 'Coinbase', 'BlackRock', 'inflows', 'liquidations', 'miners', 'regulators',
+]
+_SOURCES = ['CoinDesk', 'Cointelegraph', 'Reuters', 'Bloomberg', 'Decrypt', 'The Block']
+
+def _sentences(rng: np.random.Generator, n: int, min_words: int, max_words: int) -> list:
+    lengths = rng.integers(min_words, max_words, n)
+    words = np.array(_WORDS, dtype=object)[rng.integers(0, len(_WORDS), lengths.sum())]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    return [' '.join(words[bounds[i]:bounds[i + 1]]) for i in range(n)]
+
+def synthetic_articles(n: int, start: str = '2025-01-01', end: str = None, seed: int = 0) -> list:
+    """
+    Generates `n` NewsAPI-style articles published between `start` and `end`
+    (one day after `start` by default), in publication order.
+
+    About 5% of the articles repeat an earlier title and description, like
+    syndicated copies, and 1% have no description, so the content comes from
+    'content' instead.
+    """
+    rng = np.random.default_rng(seed)
+    start_ts = pd.Timestamp(start, tz='UTC')
+    end_ts = pd.Timestamp(end, tz='UTC') if end is not None else start_ts + pd.Timedelta(days=1)
+    offsets = np.sort(rng.integers(0, (end_ts - start_ts).value, n))
+    published = (start_ts + pd.to_timedelta(offsets)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    titles = _sentences(rng, n, 5, 15)
+    descriptions = _sentences(rng, n, 20, 60)
+    sources = rng.integers(0, len(_SOURCES), n)
+    copies = rng.random(n) < 0.05
+    missing = rng.random(n) < 0.01
+
+    articles = []
+    for i in range(n):
+        j = int(rng.integers(0, i)) if copies[i] and i > 0 else i
+        description = None if missing[i] else descriptions[j]
+        articles.append({
+            'source': {'id': None, 'name': _SOURCES[sources[i]]},
+            'author': None,
+            'title': titles[j],
+            'description': description,
+            'url': f"https://news.example.com/{published[i][:10]}/{i}",
+            'urlToImage': None,
+            'publishedAt': published[i],
+            'content': f"{descriptions[j][:200]}… [+{len(descriptions[j])} chars]",
+        })
+    return articles
+
+def synthetic_candles(rows: int, interval: str = '1m', start: str = '2025-01-01', seed: int = 0) -> pd.DataFrame:
+    """
+    Generates `rows` OHLCV candles from a geometric random walk, indexed by a
+    UTC 'Date' holding the open time, like fetch_market_data's output.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=rows, freq=pd.Timedelta(interval), tz='UTC', name='Date')
+    close = 100000 * np.exp(np.cumsum(rng.normal(0, 1e-4, rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, 2e-4, rows))
+    return pd.DataFrame({
+        'Open': open_,
+        'High': np.maximum(open_, close) * (1 + spread),
+        'Low': np.minimum(open_, close) * (1 - spread),
+        'Close': close,
+        'Volume': rng.gamma(2.0, 50.0, rows),
+    }, index=index)
+
+def synthetic_features(articles: list, seed: int = 0) -> pd.DataFrame:
+    """NLP features of synthetic articles with random sentiment scores, for the stages after NLP."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'article_id': np.arange(len(articles), dtype=np.int32),
+        'publishedAt': pd.to_datetime([article['publishedAt'] for article in articles], utc=True),
+        'title_cleaned': [article['title'].lower() for article in articles],
+        'content_cleaned': [(article['description'] or '').lower() for article in articles],
+        'sentiment_score': rng.uniform(-1, 1, len(articles)).astype(np.float32),
+    })
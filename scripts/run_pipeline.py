@@ -1,14 +1,30 @@
 import os
 import yaml
-from dotenv import load_dotenv
-from src.news_fetcher import fetch_news
-from src.market_data_fetcher import fetch_market_data
-from src.text_cleaner import clean_news_data
-from src.nlp_processor import process_nlp_features
-from src.aligner import align_features_with_market_data
+import argparse
 
-# Load environment variables
-load_dotenv()
+# Only the standard library and yaml are imported up front, so `--help` and
+# argument errors return at once. The pipeline modules are imported by main(),
+# and spaCy, NLTK, ccxt, NewsAPI and plotly only by the stages using them.
+
+# CLI stage names and the DAG stages they select (per-asset stages carry an
+# `_<asset>` suffix in universe mode).
+STAGE_GROUPS = {
+    'fetch': ('fetch_news', 'fetch_market_data'),
+    'clean': ('clean', 'dedup'),
+    'nlp': ('nlp', 'index', 'route'),
+    'align': ('align', 'feature_table', 'export_csv'),
+    'plot': ('plot',),
+}
+# Plots are only made on request.
+DEFAULT_STAGES = ('fetch', 'clean', 'nlp', 'align')
+
+def select_stages(stages: list, groups) -> list:
+    """Keeps the DAG stages belonging to the given CLI stage groups."""
+    prefixes = [name for group in groups for name in STAGE_GROUPS[group]]
+    return [
+        stage for stage in stages
+        if any(stage.name == prefix or stage.name.startswith(f"{prefix}_") for prefix in prefixes)
+    ]
 
 # --- Configuration Loading ---
 def load_config(config_path='config.yaml'):
@@ -16,51 +32,186 @@ def load_config(config_path='config.yaml'):
     with open(config_path, 'r') as f:
         return yaml.safe_load(f)
 
-def main():
-    """Runs the entire NLP signal extraction pipeline based on config."""
+def main(incremental_mode: bool = False, force: bool = False, max_workers: int = 4, stages=DEFAULT_STAGES):
+    """
+    Runs the entire NLP signal extraction pipeline based on config.
+
+    The steps run as a DAG of stages (see src/dag.py): independent stages run
+    concurrently and, in full mode, stages whose inputs and parameters are
+    unchanged since their last successful run are skipped. With a `universe`
+    config section, news is processed once and the market, align and feature
+    table stages run per asset.
+
+    Args:
+        incremental_mode (bool): If True, only process articles and candles past
+            each stage's watermark and merge them into the existing outputs.
+        force (bool): Rerun every stage even if its inputs are unchanged.
+        max_workers (int): Maximum number of stages run at once.
+        stages: Names of STAGE_GROUPS to run; their inputs from other stages
+            must already exist.
+    """
+    from dotenv import load_dotenv
+    from src.candle_store import CandleStore
+    from src.news_fetcher import fetch_news
+    from src.market_data_fetcher import fetch_market_data
+    from src.text_cleaner import clean_news_data
+    from src.deduplicator import deduplicate_news_data
+    from src.nlp_processor import process_nlp_features, download_nlp_models, load_ner_model
+    from src.nlp_daemon import connect_daemon
+    from src.entity_matcher import EntityMatcher, NER_MODES
+    from src.nlp_cache import NLPCache
+    from src.sentiment_backends import create_backend
+    from src.aligner import align_features_with_market_data
+    from src.feature_builder import build_feature_table, DEFAULT_WINDOWS
+    from src.plotter import plot_signals
+    from src import incremental
+    from src.raw_news import RAW_NEWS_EXTENSIONS
+    from src.storage import EXTENSIONS, export_csv
+    from src.dag import Stage, DAGRunner, format_manifest, range_is_open
+    from src.universe import load_universe, universe_queries, AssetRouter, route_news_features
+    from src.instrumentation import METRICS, configure_logging, stage_labels
+    from src.mention_index import build_mention_index
+
+    # Load environment variables
+    load_dotenv()
+
     # Load configuration
     config = load_config()
     news_config = config['news']
     market_config = config['market']
+    nlp_config = config.get('nlp', {})
+    align_config = config.get('align', {})
+    feature_config = config.get('features', {})
+    clean_config = config.get('clean', {})
+    dedup_config = config.get('dedup', {})
+    storage_config = config.get('storage', {})
+    plot_config = config.get('plot', {})
+    instrumentation_config = config.get('instrumentation', {})
+    index_config = config.get('index', {})
+
+    configure_logging(instrumentation_config.get('log_level', 'INFO'))
+    METRICS.configure(
+        profile=instrumentation_config.get('profile'),
+        profile_dir=instrumentation_config.get('profile_dir', os.path.join('data', 'runs', 'profiles')),
+    )
+    METRICS.reset()
+
+    # Universe: a single news.query / market.symbol pair, or every asset of the
+    # `universe` section. News is fetched, cleaned and scored once for all
+    # assets, then routed to the assets each article mentions.
+    ASSETS = load_universe(config)
+    UNIVERSE_MODE = bool(config.get('universe'))
 
     # News parameters
     SOURCE = news_config.get('source', 'newsapi')
-    QUERY = news_config['query']
+    QUERY = f"universe-{'-'.join(asset.name for asset in ASSETS)}" if UNIVERSE_MODE else news_config['query']
+    NEWS_QUERY = universe_queries(ASSETS) if UNIVERSE_MODE else QUERY
     FROM_DATE = str(news_config['from_date'])
     TO_DATE = str(news_config['to_date'])
 
     # Market parameters
-    SYMBOL = market_config['symbol']
     INTERVAL = market_config['interval']
+    backfill_config = market_config.get('backfill', {})
+
+    # Storage parameters
+    EXT = EXTENSIONS[storage_config.get('format', 'csv')]
+    RAW_EXT = RAW_NEWS_EXTENSIONS[storage_config.get('raw_news_format', 'json')]
 
     # --- Path Definitions ---
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
+    STATE_DIR = os.path.join(DATA_DIR, 'state')
+    # Names of files shared by the whole run; a single asset keeps its symbol in them.
+    RUN_NAME = QUERY if UNIVERSE_MODE else f"{QUERY}_{ASSETS[0].symbol}"
 
     RAW_NEWS_DIR = os.path.join(DATA_DIR, 'raw_news')
     MARKET_DATA_DIR = os.path.join(DATA_DIR, 'market_data')
-    RAW_NEWS_PATH = os.path.join(RAW_NEWS_DIR, f"{SOURCE}_{QUERY}_{FROM_DATE}_{TO_DATE}.json")
-    MARKET_DATA_PATH = os.path.join(MARKET_DATA_DIR, f"{SYMBOL}_{INTERVAL}_{FROM_DATE}_{TO_DATE}.csv")
+    RAW_NEWS_PATH = os.path.join(RAW_NEWS_DIR, f"{SOURCE}_{QUERY}_{FROM_DATE}_{TO_DATE}{RAW_EXT}")
 
     PROCESSED_NEWS_DIR = os.path.join(DATA_DIR, 'processed_news')
-    CLEANED_NEWS_PATH = os.path.join(PROCESSED_NEWS_DIR, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}.csv")
-    FEATURES_PATH = os.path.join(PROCESSED_NEWS_DIR, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}.csv")
+    CLEANED_NEWS_PATH = os.path.join(PROCESSED_NEWS_DIR, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    DEDUPED_NEWS_PATH = os.path.join(PROCESSED_NEWS_DIR, f"deduped_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    DUPLICATES_PATH = os.path.join(PROCESSED_NEWS_DIR, f"duplicates_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    FEATURES_PATH = os.path.join(PROCESSED_NEWS_DIR, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    # Datasets are partitioned by time, which entity mentions do not have.
+    ENTITIES_PATH = os.path.join(PROCESSED_NEWS_DIR, f"entities_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT or '.parquet'}")
 
+    NLP_CACHE_PATH = os.path.join(DATA_DIR, 'cache', 'nlp_cache.sqlite')
+    INDEX_ENABLED = index_config.get('enabled', False)
+    INDEX_DIR = os.path.join(DATA_DIR, 'index', f"{QUERY}_{FROM_DATE}_{TO_DATE}") if INDEX_ENABLED else None
+    NLP_DAEMON_SOCKET = os.path.join(DATA_DIR, 'cache', 'nlp_daemon.sock')
+    CANDLE_STORE_DIR = os.path.join(DATA_DIR, 'candles')
+    WATERMARKS_PATH = os.path.join(STATE_DIR, f"watermarks_{RUN_NAME}_{FROM_DATE}_{TO_DATE}.json")
+    DEDUP_STATE_PATH = os.path.join(STATE_DIR, f"dedup_index_{QUERY}_{FROM_DATE}_{TO_DATE}.pkl")
+    DAG_STATE_PATH = os.path.join(STATE_DIR, f"dag_{RUN_NAME}_{FROM_DATE}_{TO_DATE}.json")
+    RUNS_DIR = os.path.join(DATA_DIR, 'runs')
     FINAL_FEATURES_DIR = os.path.join(DATA_DIR, 'final_features')
-    FINAL_OUTPUT_PATH = os.path.join(FINAL_FEATURES_DIR, f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}.csv")
 
-    print("--- Starting News2Alpha Pipeline ---")
-    print(f"News Config: Source='{SOURCE}', Query='{QUERY}'")
-    print(f"Market Config: Symbol='{SYMBOL}', Interval='{INTERVAL}'")
+    # Per-asset paths. Without a universe, the asset's news features are the shared ones.
+    ASSET_PATHS = {}
+    for asset in ASSETS:
+        symbol = asset.symbol
+        ASSET_PATHS[asset.name] = {
+            'market': os.path.join(MARKET_DATA_DIR, f"{symbol}_{INTERVAL}_{FROM_DATE}_{TO_DATE}{EXT}"),
+            'features': (
+                os.path.join(PROCESSED_NEWS_DIR, f"features_{QUERY}_{asset.name}_{FROM_DATE}_{TO_DATE}{EXT}")
+                if UNIVERSE_MODE else FEATURES_PATH
+            ),
+            'final': os.path.join(FINAL_FEATURES_DIR, f"final_{symbol}_{FROM_DATE}_{TO_DATE}{EXT}"),
+            'final_csv': os.path.join(FINAL_FEATURES_DIR, f"final_{symbol}_{FROM_DATE}_{TO_DATE}.csv"),
+            'feature_table': os.path.join(FINAL_FEATURES_DIR, f"feature_table_{symbol}_{FROM_DATE}_{TO_DATE}{EXT}"),
+            'plot': os.path.join(FINAL_FEATURES_DIR, f"plot_{symbol}_{FROM_DATE}_{TO_DATE}.html"),
+            'feature_state': os.path.join(STATE_DIR, f"feature_builder_{symbol}_{FROM_DATE}_{TO_DATE}.pkl"),
+            'watermarks': os.path.join(STATE_DIR, f"watermarks_{QUERY}_{symbol}_{FROM_DATE}_{TO_DATE}.json"),
+        }
+
+    # NLP runs on the deduplicated articles when dedup is enabled.
+    DEDUP_ENABLED = dedup_config.get('enabled', False)
+    NLP_INPUT_PATH = DEDUPED_NEWS_PATH if DEDUP_ENABLED else CLEANED_NEWS_PATH
+    dedup_params = {
+        'threshold': dedup_config.get('threshold', 0.8),
+        'num_perm': dedup_config.get('num_perm', 128),
+        'shingle_size': dedup_config.get('shingle_size', 5),
+        'max_age': dedup_config.get('max_age', '21d'),
+    }
+
+    print(f"--- Starting News2Alpha Pipeline ({'incremental' if incremental_mode else 'full'}: {', '.join(stages)}) ---")
+    print(f"News Config: Source='{SOURCE}', Query={NEWS_QUERY!r}")
+    print(f"Market Config: Symbols={[asset.symbol for asset in ASSETS]}, Interval='{INTERVAL}'")
     print(f"Date Range: {FROM_DATE} to {TO_DATE}")
 
     # Create directories if they don't exist
     for path in [RAW_NEWS_DIR, MARKET_DATA_DIR, PROCESSED_NEWS_DIR, FINAL_FEATURES_DIR]:
         os.makedirs(path, exist_ok=True)
 
-    # --- Step 1: Data Ingestion ---
-    print(f"\nStep 1.1: Fetching news from {SOURCE}...")
-    if SOURCE == 'cryptopanic':
+    cache_config = nlp_config.get('cache', {})
+    daemon_config = nlp_config.get('daemon', {})
+    # Scoring goes to the NLP daemon (python -m src.nlp_daemon) when it is listening.
+    DAEMON_SOCKET = daemon_config.get('socket', NLP_DAEMON_SOCKET) if daemon_config.get('enabled', False) else None
+
+    def open_nlp_cache():
+        # Opened in the thread running the NLP stage: sqlite connections are per thread.
+        if not cache_config.get('enabled', False):
+            return None
+        return NLPCache(
+            NLP_CACHE_PATH,
+            max_entries=cache_config.get('max_entries'),
+            max_age_days=cache_config.get('max_age_days'),
+        )
+
+    # The model is loaded lazily, on first use (once per worker process).
+    sentiment_backend = create_backend(**nlp_config.get('sentiment', {}))
+    NER = nlp_config.get('ner', 'spacy')
+    if NER not in NER_MODES:
+        raise ValueError(f"Unknown nlp.ner '{NER}' in config; expected one of {NER_MODES}")
+    entity_matcher = EntityMatcher.from_config(nlp_config.get('matcher', {}), assets=ASSETS) if NER != 'spacy' else None
+
+    # The candle store outlives full rebuilds: settled candles never change.
+    candle_store = CandleStore(CANDLE_STORE_DIR) if backfill_config.get('store', False) else None
+
+    if 'fetch' not in stages:
+        api_key = None
+    elif SOURCE == 'cryptopanic':
         api_key = os.getenv("CRYPTOPANIC_API_KEY")
         if not api_key:
             raise ValueError("CRYPTOPANIC_API_KEY not found in .env file. Please add it.")
@@ -68,27 +219,275 @@ def main():
         api_key = os.getenv("NEWS_API_KEY")
         if not api_key:
             raise ValueError("NEWS_API_KEY not found in .env file. Please add it.")
+    elif SOURCE == 'multi':
+        # Each source in news.sources reads its own key (see src/async_news_fetcher.py).
+        api_key = None
     else:
         raise ValueError(f"Unknown news source in config: {SOURCE}")
-    fetch_news(api_key, QUERY, FROM_DATE, TO_DATE, RAW_NEWS_PATH, source=SOURCE)
 
-    print("\nStep 1.2: Fetching market data...")
-    fetch_market_data(SYMBOL, INTERVAL, FROM_DATE, TO_DATE, MARKET_DATA_PATH)
+    # News stages share one watermark store; each asset keeps its market and
+    # align marks in its own (the same store when there is a single asset).
+    watermarks = incremental.WatermarkStore(WATERMARKS_PATH)
+    asset_watermarks = {
+        name: watermarks if paths['watermarks'] == WATERMARKS_PATH else incremental.WatermarkStore(paths['watermarks'])
+        for name, paths in ASSET_PATHS.items()
+    }
+    # The incremental state each stage owns: (watermark store, marks, state files).
+    stage_state = {
+        'fetch_news': (watermarks, ['fetch_news'], []),
+        'clean': (watermarks, ['clean'], []),
+        'dedup': (watermarks, ['dedup'], [DEDUP_STATE_PATH]),
+        'nlp': (watermarks, ['nlp'], []),
+        'index': (watermarks, ['index'], []),
+        'route': (watermarks, ['route'], []),
+    }
+    for name, paths in ASSET_PATHS.items():
+        suffix = f"_{name}" if UNIVERSE_MODE else ''
+        stage_state[f'fetch_market_data{suffix}'] = (asset_watermarks[name], ['market'], [])
+        stage_state[f'align{suffix}'] = (asset_watermarks[name], ['align_news', 'align_market', 'align_params'], [])
+        stage_state[f'feature_table{suffix}'] = (asset_watermarks[name], [], [paths['feature_state']])
+
+    # A fetch is only cacheable once its range is in the past: until then the
+    # APIs keep returning new articles and the last candle is not closed.
+    fetch_always = incremental_mode or range_is_open(TO_DATE)
+    fetch_params = {
+        'source': SOURCE, 'query': NEWS_QUERY, 'from_date': FROM_DATE, 'to_date': TO_DATE,
+        'sources': news_config.get('sources'),
+    }
+    align_params = {
+        'interval': INTERVAL,
+        'window': align_config.get('window'),
+        'publication_lag': align_config.get('publication_lag'),
+    }
+    if INDEX_ENABLED:
+        align_params.update({'index_dir': INDEX_DIR, 'mention_terms': align_config.get('mention_terms', [])})
+    backfill_params = {
+        'store': candle_store,
+        'max_workers': backfill_config.get('max_workers', 4),
+        'chunk_candles': backfill_config.get('chunk_candles', 1000),
+    }
+    nlp_params = {
+        'batch_size': nlp_config.get('batch_size', 256),
+        'n_process': nlp_config.get('n_process', 1),
+        'sentiment_backend': sentiment_backend,
+        'entities_path': ENTITIES_PATH,
+        'keep_text': nlp_config.get('keep_text', False),
+        'entity_matcher': entity_matcher,
+    }
+    clean_params = {
+        'n_process': clean_config.get('n_process', 1),
+        'chunk_size': clean_config.get('chunk_size', 50000),
+    }
+    router = AssetRouter(ASSETS)
+    routed_paths = {name: paths['features'] for name, paths in ASSET_PATHS.items()}
+
+    # --- Stage Definitions ---
+    # Stages depend on the stages writing their inputs. Incremental stages
+    # merge new data past their watermarks, so they always run.
+    if incremental_mode:
+        fetch_news_step = lambda: incremental.update_raw_news(
+            api_key, NEWS_QUERY, FROM_DATE, TO_DATE, RAW_NEWS_PATH, watermarks,
+            source=SOURCE, sources=news_config.get('sources'),
+        )
+        clean_step = lambda: incremental.update_cleaned(RAW_NEWS_PATH, CLEANED_NEWS_PATH, watermarks, **clean_params)
+        dedup_step = lambda: incremental.update_deduped(
+            CLEANED_NEWS_PATH, DEDUPED_NEWS_PATH, DUPLICATES_PATH, watermarks, DEDUP_STATE_PATH, **dedup_params,
+        )
+
+        def nlp_step():
+            use_spacy = NER != 'matcher'
+            client = connect_daemon(DAEMON_SOCKET, sentiment_backend) if DAEMON_SOCKET and use_spacy else None
+            if client is None:
+                download_nlp_models(include_spacy=use_spacy)
+            cache = open_nlp_cache()
+            try:
+                incremental.update_features(
+                    NLP_INPUT_PATH, FEATURES_PATH, watermarks, load_ner_model() if client is None and use_spacy else None,
+                    cache=cache, client=client, **nlp_params,
+                )
+            finally:
+                if client is not None:
+                    client.close()
+                if cache is not None:
+                    cache.close()
+
+        index_step = lambda: incremental.update_index(FEATURES_PATH, INDEX_DIR, watermarks, entities_path=ENTITIES_PATH)
+        route_step = lambda: incremental.update_routed(
+            FEATURES_PATH, routed_paths, watermarks, router, entities_path=ENTITIES_PATH,
+        )
+    else:
+        fetch_news_step = lambda: fetch_news(
+            api_key, NEWS_QUERY, FROM_DATE, TO_DATE, RAW_NEWS_PATH,
+            source=SOURCE, sources=news_config.get('sources'),
+        )
+        clean_step = lambda: clean_news_data(RAW_NEWS_PATH, CLEANED_NEWS_PATH, **clean_params)
+        dedup_step = lambda: deduplicate_news_data(
+            CLEANED_NEWS_PATH, DEDUPED_NEWS_PATH, DUPLICATES_PATH, **dedup_params,
+        )
+        def nlp_step():
+            cache = open_nlp_cache()
+            try:
+                process_nlp_features(
+                    NLP_INPUT_PATH, FEATURES_PATH, cache=cache, daemon_socket=DAEMON_SOCKET, ner=NER, **nlp_params,
+                )
+            finally:
+                if cache is not None:
+                    cache.close()
+        index_step = lambda: build_mention_index(FEATURES_PATH, INDEX_DIR, entities_path=ENTITIES_PATH)
+        route_step = lambda: route_news_features(FEATURES_PATH, routed_paths, router, entities_path=ENTITIES_PATH)
+
+    dag_stages = [
+        Stage('fetch_news', fetch_news_step, outputs=[RAW_NEWS_PATH], params=fetch_params,
+              always_run=fetch_always),
+        Stage('clean', clean_step, inputs=[RAW_NEWS_PATH], outputs=[CLEANED_NEWS_PATH],
+              always_run=incremental_mode),
+    ]
+    if DEDUP_ENABLED:
+        dag_stages.append(Stage('dedup', dedup_step, inputs=[CLEANED_NEWS_PATH],
+                            outputs=[DEDUPED_NEWS_PATH, DUPLICATES_PATH], params=dedup_params,
+                            always_run=incremental_mode))
+    # Batch size, worker count and cache change speed, not results; the model does.
+    dag_stages.append(Stage('nlp', nlp_step, inputs=[NLP_INPUT_PATH], outputs=[FEATURES_PATH, ENTITIES_PATH],
+                        params={'sentiment': sentiment_backend.spec, 'keep_text': nlp_params['keep_text'], 'ner': NER,
+                                'matcher': entity_matcher.model_id if entity_matcher is not None else None},
+                        always_run=incremental_mode))
+    if INDEX_ENABLED:
+        dag_stages.append(Stage('index', index_step, inputs=[FEATURES_PATH, ENTITIES_PATH], outputs=[INDEX_DIR],
+                            always_run=incremental_mode))
+    if UNIVERSE_MODE:
+        dag_stages.append(Stage('route', route_step, inputs=[FEATURES_PATH, ENTITIES_PATH],
+                            outputs=list(routed_paths.values()),
+                            params={'universe': config['universe']}, always_run=incremental_mode))
+
+    # Keyword and mention term counts come from the index when it is built.
+    index_inputs = [INDEX_DIR] if INDEX_ENABLED else []
+
+    def asset_stages(asset, paths: dict) -> list:
+        """The market, align and feature table stages of one asset; assets run concurrently."""
+        suffix = f"_{asset.name}" if UNIVERSE_MODE else ''
+        store = asset_watermarks[asset.name]
+        if incremental_mode:
+            fetch_market_step = lambda: incremental.update_market_data(
+                asset.ccxt_symbol, INTERVAL, FROM_DATE, TO_DATE, paths['market'], store, **backfill_params,
+            )
+            align_step = lambda: incremental.update_aligned(
+                paths['features'], paths['market'], paths['final'], store, **align_params,
+            )
+        else:
+            fetch_market_step = lambda: fetch_market_data(
+                asset.symbol, INTERVAL, FROM_DATE, TO_DATE, paths['market'], **backfill_params,
+            )
+            align_step = lambda: align_features_with_market_data(
+                paths['features'], paths['market'], paths['final'], **align_params,
+            )
+        feature_table_step = lambda: build_feature_table(
+            paths['final'], paths['features'], paths['feature_table'], INTERVAL,
+            windows=feature_config.get('windows', DEFAULT_WINDOWS),
+            halflife=feature_config.get('halflife', '1h'),
+            zscore_window=feature_config.get('zscore_window', '24h'),
+            keywords=feature_config.get('keywords', ['hack']),
+            publication_lag=align_config.get('publication_lag'),
+            state_path=paths['feature_state'] if incremental_mode else None,
+            index_dir=INDEX_DIR,
+        )
+        plot_params = {
+            'mode': plot_config.get('mode', 'full'),
+            'width_px': plot_config.get('width_px', 2000),
+            'downsample': plot_config.get('downsample', 'lttb'),
+            'ohlc': plot_config.get('ohlc', False),
+        }
+        plot_step = lambda: plot_signals(paths['final'], paths['plot'], asset.symbol, **plot_params)
+        market_params = {'symbol': asset.symbol, 'interval': INTERVAL, 'from_date': FROM_DATE, 'to_date': TO_DATE}
+
+        def labelled(step):
+            # Stage metrics of every asset share the stage names; the label keeps them apart.
+            def run():
+                with stage_labels(asset=asset.name):
+                    return step()
+            return run
 
-    # --- Step 2: Feature Engineering ---
-    print("\nStep 2.1: Cleaning news data...")
-    clean_news_data(RAW_NEWS_PATH, CLEANED_NEWS_PATH)
+        fetch_market_step, align_step, feature_table_step, plot_step = map(
+            labelled, (fetch_market_step, align_step, feature_table_step, plot_step),
+        )
+        asset_stage_list = [
+            Stage(f'fetch_market_data{suffix}', fetch_market_step, outputs=[paths['market']],
+                  params=market_params, always_run=fetch_always),
+            Stage(f'align{suffix}', align_step, inputs=[paths['features'], paths['market'], *index_inputs],
+                  outputs=[paths['final']], params=align_params, always_run=incremental_mode),
+            Stage(f'feature_table{suffix}', feature_table_step, inputs=[paths['final'], paths['features'], *index_inputs],
+                  outputs=[paths['feature_table']], params={'features': feature_config, 'align': align_params},
+                  always_run=incremental_mode),
+            Stage(f'plot{suffix}', plot_step, inputs=[paths['final']], outputs=[paths['plot']], params=plot_params),
+        ]
+        if storage_config.get('export_csv', False) and paths['final'] != paths['final_csv']:
+            asset_stage_list.append(Stage(
+                f'export_csv{suffix}', labelled(lambda: export_csv(paths['final'], paths['final_csv'])),
+                inputs=[paths['final']], outputs=[paths['final_csv']],
+            ))
+        return asset_stage_list
 
-    print("\nStep 2.2: Processing NLP features...")
-    process_nlp_features(CLEANED_NEWS_PATH, FEATURES_PATH)
+    for asset in ASSETS:
+        dag_stages += asset_stages(asset, ASSET_PATHS[asset.name])
 
-    # --- Step 3: Signal Generation ---
-    print("\nStep 3.1: Aligning features with market data...")
-    align_features_with_market_data(FEATURES_PATH, MARKET_DATA_PATH, FINAL_OUTPUT_PATH)
+    # --- Run ---
+    # Stages producing inputs of the selected ones are left out; their
+    # existing outputs are used as they are.
+    runner = DAGRunner(select_stages(dag_stages, stages), DAG_STATE_PATH, manifest_dir=RUNS_DIR, max_workers=max_workers)
+    manifest = runner.run(force=force)
+    if not incremental_mode:
+        # A full rebuild of a stage invalidates its incremental state; stages
+        # not selected or cached keep theirs.
+        for name, record in manifest['stages'].items():
+            if record['status'] in ('ran', 'failed') and name in stage_state:
+                store, marks, state_paths = stage_state[name]
+                store.reset(marks)
+                for state_path in state_paths:
+                    if os.path.exists(state_path):
+                        os.remove(state_path)
+    print("\n" + format_manifest(manifest))
+    print(f"Run manifest saved to: {manifest['path']}")
+    # Per-stage wall time, rows, throughput, peak RSS and cache hit rates.
+    metrics_path = os.path.join(RUNS_DIR, f"metrics_{manifest['run_id']}.json")
+    METRICS.write_json(metrics_path)
+    if instrumentation_config.get('prometheus_path'):
+        METRICS.write_prometheus(instrumentation_config['prometheus_path'])
+    print(f"Stage metrics saved to: {metrics_path}")
+    if manifest['status'] != 'succeeded':
+        failed = [name for name, record in manifest['stages'].items() if record['status'] == 'failed']
+        raise RuntimeError(f"Pipeline failed at stage(s) {failed}; their dependents were not run.")
 
     print("\n--- Pipeline Finished Successfully! ---")
-    print(f"Final feature table saved to: {FINAL_OUTPUT_PATH}")
+    for asset in ASSETS:
+        if 'align' in stages:
+            print(f"Final feature table for {asset.name} saved to: {ASSET_PATHS[asset.name]['final']}")
+        if 'plot' in stages:
+            print(f"Plot for {asset.name} saved to: {ASSET_PATHS[asset.name]['plot']}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Run the News2Alpha pipeline.")
+    parser.add_argument(
+        'stages', nargs='*', metavar='STAGE',
+        help=f"Stages to run, from {list(STAGE_GROUPS)} (default: {' '.join(DEFAULT_STAGES)}).",
+    )
+    parser.add_argument(
+        '--incremental', action='store_true',
+        help="Process only new articles and candles and merge them into the existing outputs.",
+    )
+    parser.add_argument(
+        '--force', action='store_true',
+        help="Rerun every stage even if its inputs and parameters are unchanged.",
+    )
+    parser.add_argument(
+        '--max-workers', type=int, default=4,
+        help="Maximum number of independent stages run at once.",
+    )
+    args = parser.parse_args()
+    # Checked here rather than with `choices`, which rejects an empty list.
+    unknown = [stage for stage in args.stages if stage not in STAGE_GROUPS]
+    if unknown:
+        parser.error(f"unknown stage(s) {unknown}; choose from {list(STAGE_GROUPS)}")
+    main(
+        incremental_mode=args.incremental, force=args.force, max_workers=args.max_workers,
+        stages=args.stages or DEFAULT_STAGES,
+    )
 
@@ -0,0 +1,128 @@
+import os
+import yaml
+import argparse
+
+# The service's modules are imported by main(), so `--help` returns at once
+# (see scripts/run_pipeline.py).
+
+def load_config(config_path='config.yaml'):
+    """Loads the configuration from a YAML file."""
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+def main(replay_path: str = None, speed: float = None, unix_socket: str = None):
+    """
+    Runs the news-to-signal service: each article is cleaned, scored and
+    aggregated onto the current candle as it arrives, and the updated signal
+    row is emitted to the configured sinks.
+
+    Args:
+        replay_path (str): Replay a recorded raw news file instead of polling live.
+        speed (float): Replay speed as a multiple of real time; None replays at once.
+        unix_socket (str): Also send signal rows to this listening Unix socket.
+    """
+    from dotenv import load_dotenv
+    from src.nlp_processor import download_nlp_models, load_ner_model
+    from src.instrumentation import configure_logging
+    from src.deduplicator import MinHashLSH
+    from src.sentiment_backends import create_backend
+    from src.entity_matcher import EntityMatcher
+    from src.universe import load_universe
+    from src.raw_news import RawArticleWriter, RAW_NEWS_EXTENSIONS, is_jsonl
+    from src.streaming import (
+        StreamProcessor, LatencyTracker, JsonlSink, UnixSocketSink, replay_articles, poll_articles, run_stream,
+    )
+
+    # Load environment variables
+    load_dotenv()
+    config = load_config()
+    news_config = config['news']
+    market_config = config['market']
+    align_config = config.get('align', {})
+    nlp_config = config.get('nlp', {})
+    dedup_config = config.get('dedup', {})
+    stream_config = config.get('streaming', {})
+    storage_config = config.get('storage', {})
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+
+    SOURCE = news_config.get('source', 'newsapi')
+    QUERY = news_config['query']
+    INTERVAL = market_config['interval']
+    RAW_EXT = RAW_NEWS_EXTENSIONS[storage_config.get('raw_news_format', 'json')]
+
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    DATA_DIR = os.path.join(BASE_DIR, '..', 'data')
+    SIGNALS_PATH = os.path.join(DATA_DIR, 'stream', f"signals_{market_config['symbol']}_{INTERVAL}.jsonl")
+    # Recordings are appended to, so a legacy '.json' raw format records as JSON Lines.
+    RECORD_EXT = RAW_EXT if is_jsonl(RAW_EXT) else RAW_NEWS_EXTENSIONS['jsonl']
+    RECORD_PATH = os.path.join(DATA_DIR, 'raw_news', f"stream_{SOURCE}_{QUERY}{RECORD_EXT}")
+
+    NER = nlp_config.get('ner', 'spacy')
+    download_nlp_models(include_spacy=NER != 'matcher')
+    sinks = [JsonlSink(SIGNALS_PATH)]
+    if unix_socket:
+        sinks.append(UnixSocketSink(unix_socket))
+    dedup_index = None
+    if dedup_config.get('enabled', False):
+        dedup_index = MinHashLSH(
+            threshold=dedup_config.get('threshold', 0.8),
+            num_perm=dedup_config.get('num_perm', 128),
+            shingle_size=dedup_config.get('shingle_size', 5),
+            max_age=dedup_config.get('max_age', '21d'),
+        )
+    tracker = LatencyTracker()
+    processor = StreamProcessor(
+        load_ner_model() if NER != 'matcher' else None,
+        interval=INTERVAL,
+        window=align_config.get('window'),
+        publication_lag=align_config.get('publication_lag'),
+        sinks=sinks,
+        dedup_index=dedup_index,
+        tracker=tracker,
+        sentiment_backend=create_backend(**nlp_config.get('sentiment', {})),
+        entity_matcher=(
+            EntityMatcher.from_config(nlp_config.get('matcher', {}), assets=load_universe(config))
+            if NER != 'spacy' else None
+        ),
+    )
+
+    on_article = None
+    recorder = None
+    if replay_path:
+        print(f"--- Replaying {replay_path} ---")
+        articles = replay_articles(replay_path, speed=speed)
+    else:
+        api_key = None
+        if SOURCE == 'newsapi':
+            api_key = os.getenv("NEWS_API_KEY")
+        elif SOURCE == 'cryptopanic':
+            api_key = os.getenv("CRYPTOPANIC_API_KEY")
+        print(f"--- Streaming {SOURCE} news for '{QUERY}' (polling every {stream_config.get('poll_secs', 30)}s) ---")
+        articles = poll_articles(
+            api_key, QUERY, source=SOURCE, sources=news_config.get('sources'),
+            poll_secs=stream_config.get('poll_secs', 30),
+        )
+        if stream_config.get('record', True):
+            # Recorded articles can be replayed later with --replay.
+            recorder = RawArticleWriter(RECORD_PATH)
+            on_article = recorder
+
+    try:
+        emitted = run_stream(articles, processor, on_article=on_article)
+        print(f"Emitted {emitted} signal rows to {SIGNALS_PATH}")
+    except KeyboardInterrupt:
+        print("\nStopping stream.")
+    finally:
+        for sink in sinks:
+            sink.close()
+        if recorder is not None:
+            recorder.close()
+        print(tracker.summary().to_string(index=False, float_format='%.3f'))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the News2Alpha real-time streaming service.")
+    parser.add_argument('--replay', help="Replay a recorded raw news file instead of polling the live source.")
+    parser.add_argument('--speed', type=float, help="Replay speed as a multiple of real time (default: as fast as possible).")
+    parser.add_argument('--unix-socket', help="Also send signal rows to this listening Unix socket.")
+    args = parser.parse_args()
+    main(replay_path=args.replay, speed=args.speed, unix_socket=args.unix_socket)
@@ -1,63 +1,140 @@
 import os
+import logging
 import yaml
+import numpy as np
 import pandas as pd
+from src.storage import read_table, write_table, EXTENSIONS
+from src.mention_index import load_mentions, mention_column
+from src.instrumentation import instrumented, observe, configure_logging
 
+logger = logging.getLogger(__name__)
+
+def _set_utc_index(df: pd.DataFrame, column: str) -> pd.DataFrame:
+    """Parses `column` as UTC datetimes and sets it as the index."""
+    df = df.copy()
+    df[column] = pd.to_datetime(df[column])
+    if df[column].dt.tz is None:
+        df[column] = df[column].dt.tz_localize('UTC')
+    else:
+        df[column] = df[column].dt.tz_convert('UTC')
+    return df.set_index(column)
+
+def infer_interval(dates) -> pd.Timedelta:
+    """Infers the candle interval as the most common spacing between candle open times."""
+    diffs = pd.Series(pd.DatetimeIndex(dates).sort_values()).diff().dropna()
+    if diffs.empty:
+        raise ValueError("Cannot infer the candle interval from fewer than two candles.")
+    return diffs.mode().iloc[0]
+
+def _window_sums(times: np.ndarray, values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> tuple:
+    """
+    For sorted `times`, sums `values` with starts[i] <= time < ends[i] for every i.
+
+    Returns:
+        tuple: (counts, sums) arrays, one entry per window.
+    """
+    lo = np.searchsorted(times, starts, side='left')
+    hi = np.searchsorted(times, ends, side='left')
+    counts = hi - lo
+    # reduceat over interleaved [lo, hi) bounds sums each window in order; a
+    # trailing zero keeps hi == len(values) in range. Empty windows are masked.
+    padded = np.append(values, 0.0)
+    bounds = np.column_stack([lo, hi]).ravel()
+    sums = np.add.reduceat(padded, bounds)[::2] if len(bounds) else np.zeros(0)
+    return counts, np.where(counts > 0, sums, 0.0)
+
+def align_frames(
+    news_df: pd.DataFrame,
+    market_df: pd.DataFrame,
+    interval=None,
+    window=None,
+    publication_lag=None,
+    mentions: dict = None,
+) -> pd.DataFrame:
+    """
+    Aggregates NLP features onto each market candle without look-ahead.
+
+    An article counts towards a candle only if it was available strictly
+    before the candle closed: close - window <= publishedAt + publication_lag < close.
+
+    Args:
+        news_df (pd.DataFrame): NLP features with 'publishedAt' and 'sentiment_score' columns.
+        market_df (pd.DataFrame): Candles with a 'Date' column holding the open time.
+        interval: Candle interval (e.g. '15m'). Inferred from the candles if None.
+        window: News lookback per candle, a multiple of `interval`. Defaults to `interval`.
+        publication_lag: Delay added to publishedAt before an article is usable (e.g. '2m').
+        mentions (dict): Optional term -> postings from the mention index (see
+            load_mentions); each adds a '<term>_mentions' column counting the
+            term's occurrences in the same window.
+
+    Returns:
+        pd.DataFrame: The candles indexed by 'Date' with 'sentiment_mean' and 'news_count'.
+    """
+    market_df = _set_utc_index(market_df, 'Date').sort_index()
+    interval = pd.Timedelta(interval) if interval is not None else infer_interval(market_df.index)
+    window = pd.Timedelta(window) if window is not None else interval
+    lag = pd.Timedelta(publication_lag) if publication_lag is not None else pd.Timedelta(0)
+    if window < interval or window % interval != pd.Timedelta(0):
+        raise ValueError(f"Window {window} must be a multiple of the candle interval {interval}.")
+
+    # Only the two columns used here are carried through, as int64/float64 arrays.
+    news = news_df[['publishedAt', 'sentiment_score']].dropna()
+    published = pd.DatetimeIndex(pd.to_datetime(news['publishedAt'], utc=True)).as_unit('ns')
+    times = published.asi8 + lag.value
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    scores = news['sentiment_score'].to_numpy(dtype=np.float64)[order]
+
+    closes = market_df.index.as_unit('ns').asi8 + interval.value
+    counts, sums = _window_sums(times, scores, closes - window.value, closes)
+
+    final_df = market_df.copy()
+    final_df['sentiment_mean'] = np.where(counts > 0, sums / np.maximum(counts, 1), 0.0)
+    final_df['news_count'] = counts.astype(np.float64)
+    for term, postings in (mentions or {}).items():
+        # Postings are in time order already.
+        term_times = pd.DatetimeIndex(postings['publishedAt']).as_unit('ns').asi8 + lag.value
+        _, term_counts = _window_sums(
+            term_times, postings['count'].to_numpy(dtype=np.float64), closes - window.value, closes,
+        )
+        final_df[mention_column(term)] = term_counts
+    logger.info(
+        f"Aligned {len(times)} articles onto {len(final_df)} candles "
+        f"(interval={interval}, window={window}, publication_lag={lag})"
+    )
+    return final_df
+
+@instrumented('align')
 def align_features_with_market_data(
     news_features_path: str, 
     market_data_path: str, 
-    output_path: str
+    output_path: str,
+    interval=None,
+    window=None,
+    publication_lag=None,
+    index_dir: str = None,
+    mention_terms=(),
 ):
     """
     Aligns aggregated NLP features from news with market data.
+
+    See align_frames for the meaning of `interval`, `window` and `publication_lag`.
+    With an `index_dir`, the mentions of each of `mention_terms` in the
+    articles of the features table are counted from the mention index.
     """
-    news_df = pd.read_csv(news_features_path)
-    market_df = pd.read_csv(market_data_path)
+    use_index = index_dir is not None and len(mention_terms) > 0
+    columns = ['article_id', 'publishedAt', 'sentiment_score'] if use_index else ['publishedAt', 'sentiment_score']
+    news_df = read_table(news_features_path, columns=columns)
+    market_df = read_table(market_data_path)
+    mentions = load_mentions(index_dir, mention_terms, news_df['article_id']) if use_index else None
 
-    news_df['publishedAt'] = pd.to_datetime(news_df['publishedAt'])
-    if news_df['publishedAt'].dt.tz is None:
-        news_df['publishedAt'] = news_df['publishedAt'].dt.tz_localize('UTC')
-    else:
-        news_df['publishedAt'] = news_df['publishedAt'].dt.tz_convert('UTC')
-    news_df.set_index('publishedAt', inplace=True)
-    print("\n--- news_df after set_index ---")
-    print(f"Min Date: {news_df.index.min()}")
-    print(f"Max Date: {news_df.index.max()}")
-    print(f"Shape: {news_df.shape}")
-    print(news_df.head())
-
-    daily_sentiment = news_df['sentiment_score'].resample('D').mean()
-    daily_news_count = news_df['sentiment_score'].resample('D').count()
-
-    aggregated_df = pd.DataFrame({
-        'sentiment_mean': daily_sentiment,
-        'news_count': daily_news_count
-    })
-    print("\n--- aggregated_df ---")
-    print(f"Min Date: {aggregated_df.index.min()}")
-    print(f"Max Date: {aggregated_df.index.max()}")
-    print(f"Shape: {aggregated_df.shape}")
-    print(aggregated_df.head())
-
-    market_df['Date'] = pd.to_datetime(market_df['Date'])
-    if market_df['Date'].dt.tz is None:
-        market_df['Date'] = market_df['Date'].dt.tz_localize('UTC')
-    else:
-        market_df['Date'] = market_df['Date'].dt.tz_convert('UTC')
-    market_df.set_index('Date', inplace=True)
-    print("\n--- market_df after set_index ---")
-    print(f"Min Date: {market_df.index.min()}")
-    print(f"Max Date: {market_df.index.max()}")
-    print(f"Shape: {market_df.shape}")
-    print(market_df.head())
-
-    final_df = market_df.join(aggregated_df, how='left')
-    print("\n--- final_df null counts before fillna ---")
-    print(final_df.isnull().sum())
-    final_df['sentiment_mean'].fillna(0, inplace=True)
-    final_df['news_count'].fillna(0, inplace=True)
-
-    final_df.to_csv(output_path)
-    print(f"Successfully aligned features and saved to {output_path}")
+    final_df = align_frames(
+        news_df, market_df, interval=interval, window=window, publication_lag=publication_lag, mentions=mentions,
+    )
+
+    observe(rows_in=len(news_df), rows_out=len(final_df))
+    write_table(final_df, output_path)
+    logger.info(f"Successfully aligned features and saved to {output_path}")
 
 def _load_config_for_main():
     config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
@@ -68,14 +145,17 @@ def _load_config_for_main():
 
 if __name__ == '__main__':
     config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
     news_config = config['news']
     market_config = config['market']
+    align_config = config.get('align', {})
 
     QUERY = news_config['query']
     FROM_DATE = str(news_config['from_date'])
     TO_DATE = str(news_config['to_date'])
     SYMBOL = market_config['symbol']
     INTERVAL = market_config['interval']
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
 
     script_dir = os.path.dirname(__file__)
     data_dir = os.path.join(script_dir,  '..', 'data')
@@ -84,19 +164,24 @@ if __name__ == '__main__':
     final_features_dir = os.path.join(data_dir, 'final_features')
 
     NEWS_FEATURES_PATH = os.path.join(processed_news_dir,
-        f"features_{QUERY}_{FROM_DATE}_{TO_DATE}.csv"
+        f"features_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}"
     )
     MARKET_DATA_PATH = os.path.join(market_data_dir,
-        f"{SYMBOL}_{INTERVAL}_{FROM_DATE}_{TO_DATE}.csv"
+        f"{SYMBOL}_{INTERVAL}_{FROM_DATE}_{TO_DATE}{EXT}"
     )
 
     OUTPUT_DIR = final_features_dir
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}.csv")
+    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}{EXT}")
 
     if not os.path.exists(NEWS_FEATURES_PATH) or not os.path.exists(MARKET_DATA_PATH):
-        print("Input files not found. Please run previous scripts first:")
-        print(f"- Features: {NEWS_FEATURES_PATH}")
-        print(f"- Market: {MARKET_DATA_PATH}")
+        logger.error("Input files not found. Please run previous scripts first:")
+        logger.error(f"- Features: {NEWS_FEATURES_PATH}")
+        logger.error(f"- Market: {MARKET_DATA_PATH}")
     else:
-        align_features_with_market_data(NEWS_FEATURES_PATH, MARKET_DATA_PATH, OUTPUT_PATH)
+        align_features_with_market_data(
+            NEWS_FEATURES_PATH, MARKET_DATA_PATH, OUTPUT_PATH,
+            interval=INTERVAL,
+            window=align_config.get('window'),
+            publication_lag=align_config.get('publication_lag'),
+        )
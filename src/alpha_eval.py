@@ -0,0 +1,428 @@
+"""
+Evaluates how well news features predict forward returns.
+
+Computes, for every feature and forward horizon at once, the Pearson and
+Spearman information coefficient (IC), the hit ratio, mean forward returns
+per feature quantile and the IC per period (e.g. daily) with its rolling mean.
+
+Run from the repository root, e.g.:
+    python -m src.alpha_eval --horizons 15m 1h 4h 24h --quantiles 5 --period 1D
+"""
+import os
+import logging
+import yaml
+import argparse
+import numpy as np
+import pandas as pd
+from src.aligner import infer_interval
+from src.storage import read_table, write_table, EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Columns of the aligned table that are prices rather than features.
+MARKET_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+DEFAULT_HORIZONS = (1, 4, 16, 96)
+# Values ranked per block of columns, bounding rank_columns' temporaries.
+_RANK_CHUNK_VALUES = 1 << 23
+
+def horizon_bars(horizons, interval) -> np.ndarray:
+    """
+    Converts horizons to a number of bars.
+
+    Args:
+        horizons: Bar counts (ints) or durations (e.g. '1h'), which must be multiples of `interval`.
+        interval: The bar interval of the table.
+
+    Raises:
+        ValueError: If a horizon is not a positive multiple of the interval.
+    """
+    interval = pd.Timedelta(interval)
+    bars = []
+    for horizon in horizons:
+        if isinstance(horizon, (int, np.integer)) or str(horizon).isdigit():
+            bars.append(int(horizon))
+            continue
+        duration = pd.Timedelta(horizon)
+        if duration % interval != pd.Timedelta(0):
+            raise ValueError(f"Horizon {horizon} is not a multiple of the bar interval {interval}.")
+        bars.append(duration // interval)
+    bars = np.asarray(bars, dtype=np.int64)
+    if (bars <= 0).any():
+        raise ValueError(f"Horizons must be positive: {list(horizons)}")
+    return bars
+
+def forward_returns(close: np.ndarray, bars: np.ndarray) -> np.ndarray:
+    """
+    Returns the simple return from each bar's close to the close `bars` later.
+
+    Returns:
+        np.ndarray: A (rows, horizons) array; NaN where the horizon runs past the end.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    ahead = np.arange(len(close))[:, None] + np.asarray(bars)[None, :]
+    valid = ahead < len(close)
+    returns = close[np.minimum(ahead, len(close) - 1)] / close[:, None] - 1.0
+    return np.where(valid, returns, np.nan)
+
+def rank_columns(values: np.ndarray) -> np.ndarray:
+    """
+    Ranks each column from 1 (average ranks for ties); NaNs stay NaN.
+
+    Blocks of columns are sorted in one call (as contiguous rows of the
+    transpose) and the runs of tied values are found with running maxima/minima
+    of their boundaries, so there is no per-column loop. The result is the
+    transpose of a C-contiguous array, so each column's ranks are contiguous.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    block = max(_RANK_CHUNK_VALUES // max(len(values), 1), 1)
+    if values.ndim == 2 and values.shape[1] > block:
+        ranks = np.empty((values.shape[1], len(values)))
+        for start in range(0, values.shape[1], block):
+            ranks[start:start + block] = rank_columns(values[:, start:start + block]).T
+        return ranks.T
+    columns = np.ascontiguousarray(values.T)
+    if columns.size == 0:
+        return columns.T.copy()
+    length = columns.shape[1]
+    order = np.argsort(columns, axis=1) # NaNs sort last
+    ordered = np.take_along_axis(columns, order, axis=1)
+    positions = np.broadcast_to(np.arange(length), columns.shape)
+    boundary = np.ones(columns.shape, dtype=bool)
+    boundary[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    run_start = np.maximum.accumulate(np.where(boundary, positions, 0), axis=1)
+    run_end = np.ones(columns.shape, dtype=bool)
+    run_end[:, :-1] = boundary[:, 1:]
+    run_stop = np.minimum.accumulate(np.where(run_end, positions, length - 1)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty(columns.shape)
+    np.put_along_axis(ranks, order, (run_start + run_stop) / 2 + 1, axis=1)
+    ranks[np.isnan(columns)] = np.nan
+    return ranks.T
+
+def correlation_matrix(x: np.ndarray, y: np.ndarray, min_periods: int = 3) -> np.ndarray:
+    """
+    Pearson correlation of every column of `x` with every column of `y`.
+
+    NaNs are excluded pairwise. All pairs are computed with a handful of matrix
+    products over the rows, so the cost is a few GEMMs rather than a loop over
+    features and horizons.
+
+    Args:
+        x (np.ndarray): A (rows, features) array.
+        y (np.ndarray): A (rows, horizons) array.
+        min_periods (int): Minimum number of complete rows for a pair; NaN below it.
+
+    Returns:
+        np.ndarray: A (features, horizons) array.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_mask, y_mask = ~np.isnan(x), ~np.isnan(y)
+    # Centering first keeps the sums below small, avoiding cancellation.
+    with np.errstate(invalid='ignore'):
+        x0 = np.where(x_mask, x - np.nanmean(np.where(x_mask, x, np.nan), axis=0), 0.0)
+        y0 = np.where(y_mask, y - np.nanmean(np.where(y_mask, y, np.nan), axis=0), 0.0)
+
+    if x_mask.all() and y_mask.all():
+        n = np.full((x.shape[1], y.shape[1]), float(len(x)))
+        cov = x0.T @ y0
+        var_x = np.repeat((x0 ** 2).sum(axis=0)[:, None], y.shape[1], axis=1)
+        var_y = np.repeat((y0 ** 2).sum(axis=0)[None, :], x.shape[1], axis=0)
+    else:
+        xm, ym = x_mask.astype(np.float64), y_mask.astype(np.float64)
+        n = xm.T @ ym
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sum_x, sum_y = x0.T @ ym, xm.T @ y0
+            cov = x0.T @ y0 - sum_x * sum_y / n
+            var_x = (x0 ** 2).T @ ym - sum_x ** 2 / n
+            var_y = xm.T @ (y0 ** 2) - sum_y ** 2 / n
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        corr = cov / np.sqrt(var_x * var_y)
+    valid = (n >= min_periods) & (var_x > 0) & (var_y > 0)
+    return np.where(valid, np.clip(corr, -1.0, 1.0), np.nan)
+
+def _nan_pattern_groups(values: np.ndarray) -> list:
+    """Groups the columns of `values` by their NaN pattern, as (present rows mask, column indices) pairs."""
+    present = ~np.isnan(values)
+    if present.all():
+        return [(np.ones(len(values), dtype=bool), np.arange(values.shape[1]))]
+    groups = {}
+    for column, packed in enumerate(np.packbits(present, axis=0).T):
+        groups.setdefault(packed.tobytes(), []).append(column)
+    return [(present[:, columns[0]], np.asarray(columns)) for columns in groups.values()]
+
+def _take(values: np.ndarray, rows: np.ndarray, columns: np.ndarray) -> np.ndarray:
+    """values[rows][:, columns], without a copy when both select everything."""
+    if rows.all() and len(columns) == values.shape[1]:
+        return values
+    return values[np.ix_(rows, columns)]
+
+def spearman_matrix(x: np.ndarray, y: np.ndarray, min_periods: int = 3, x_ranks: np.ndarray = None) -> np.ndarray:
+    """
+    Spearman correlation of every column of `x` with every column of `y`.
+
+    Like correlation_matrix, NaNs are excluded pairwise, so both sides must be
+    ranked over the rows where the pair is present. Columns sharing a NaN
+    pattern share those rows; each (x pattern, y pattern) group is ranked and
+    correlated at once, so complete columns cost a single pass.
+
+    Args:
+        x_ranks (np.ndarray): rank_columns(x), if already computed. NaNs are
+            ranked last, so these are the ranks over a feature's present rows;
+            they are reused wherever `y` is present on all of those rows.
+
+    Returns:
+        np.ndarray: A (features, horizons) array.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    corr = np.full((x.shape[1], y.shape[1]), np.nan)
+    for x_rows, features in _nan_pattern_groups(x):
+        for y_rows, horizons in _nan_pattern_groups(y):
+            rows = x_rows & y_rows
+            if x_ranks is not None and not (x_rows & ~y_rows).any():
+                ranked_x = _take(x_ranks, rows, features)
+            else:
+                ranked_x = rank_columns(x[np.ix_(rows, features)])
+            corr[np.ix_(features, horizons)] = correlation_matrix(
+                ranked_x, rank_columns(_take(y, rows, horizons)), min_periods=min_periods,
+            )
+    return corr
+
+def hit_ratio(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Share of rows where the sign of each feature matches the sign of each
+    forward return, among rows where both are non-zero.
+
+    Returns:
+        np.ndarray: A (features, horizons) array.
+    """
+    x_pos, x_neg = (x > 0).astype(np.float64), (x < 0).astype(np.float64)
+    y_pos, y_neg = (y > 0).astype(np.float64), (y < 0).astype(np.float64)
+    hits = x_pos.T @ y_pos + x_neg.T @ y_neg
+    total = (x_pos + x_neg).T @ (y_pos + y_neg)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total > 0, hits / total, np.nan)
+
+def quantile_codes(ranks: np.ndarray, quantiles: int) -> np.ndarray:
+    """Assigns ranked values (see rank_columns) to `quantiles` equal-count buckets per column; -1 for NaN."""
+    counts = (~np.isnan(ranks)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        codes = np.floor((ranks - 1) * quantiles / counts)
+    return np.where(np.isnan(codes), -1, np.minimum(codes, quantiles - 1)).astype(np.int64)
+
+def quantile_returns(x: np.ndarray, y: np.ndarray, quantiles: int = 5, x_ranks: np.ndarray = None) -> np.ndarray:
+    """
+    Mean forward return of the rows in each quantile of each feature.
+
+    Each feature's quantile codes are summed with one weighted np.bincount per
+    horizon over contiguous columns, so the cost is a single pass over the rows
+    per feature and horizon, and memory stays at a few columns.
+
+    Args:
+        x_ranks (np.ndarray): rank_columns(x), if already computed.
+
+    Returns:
+        np.ndarray: A (features, quantiles, horizons) array.
+    """
+    ranks = x_ranks if x_ranks is not None else rank_columns(x)
+    n_features, n_horizons = ranks.shape[1], y.shape[1]
+    y_mask = ~np.isnan(y)
+    complete = y_mask.all()
+    y0 = np.ascontiguousarray(np.where(y_mask, y, 0.0).T)
+    ym = np.ascontiguousarray(y_mask.T, dtype=np.float64)
+    sums = np.zeros((n_features, quantiles, n_horizons))
+    counts = np.zeros((n_features, quantiles, n_horizons))
+    for feature in range(n_features):
+        codes = quantile_codes(np.ascontiguousarray(ranks[:, feature])[:, None], quantiles)[:, 0]
+        # NaN features go to an extra bucket, dropped below.
+        codes[codes < 0] = quantiles
+        for h in range(n_horizons):
+            sums[feature, :, h] = np.bincount(codes, weights=y0[h], minlength=quantiles + 1)[:quantiles]
+            if not complete:
+                counts[feature, :, h] = np.bincount(codes, weights=ym[h], minlength=quantiles + 1)[:quantiles]
+        if complete:
+            # Without missing returns, a bucket's count is the same for every horizon.
+            counts[feature] = np.bincount(codes, minlength=quantiles + 1)[:quantiles, None]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def period_ic(x: np.ndarray, y: np.ndarray, periods: np.ndarray, method: str = 'spearman',
+              min_periods: int = 3) -> tuple:
+    """
+    The IC of every feature and horizon within each period (e.g. each day).
+
+    Args:
+        x, y: (rows, features) and (rows, horizons) arrays sorted by time.
+        periods (np.ndarray): The period label of each row.
+        method (str): 'spearman' or 'pearson'.
+
+    Returns:
+        tuple: The period labels and a (periods, features, horizons) array.
+    """
+    labels, starts = np.unique(periods, return_index=True)
+    order = np.argsort(starts)
+    labels, starts = labels[order], starts[order]
+    bounds = np.append(starts, len(x))
+    ics = np.full((len(labels), x.shape[1], y.shape[1]), np.nan)
+    for i in range(len(labels)):
+        xs, ys = x[bounds[i]:bounds[i + 1]], y[bounds[i]:bounds[i + 1]]
+        correlate = spearman_matrix if method == 'spearman' else correlation_matrix
+        ics[i] = correlate(xs, ys, min_periods=min_periods)
+    return labels, ics
+
+def _feature_columns(df: pd.DataFrame) -> list:
+    return [col for col in df.columns if col not in MARKET_COLUMNS and pd.api.types.is_numeric_dtype(df[col])]
+
+def evaluate_alpha(
+    df: pd.DataFrame,
+    features: list = None,
+    horizons=DEFAULT_HORIZONS,
+    quantiles: int = 5,
+    period: str = '1D',
+    rolling_window: int = 30,
+    interval=None,
+) -> dict:
+    """
+    Evaluates features of an aligned table against forward returns.
+
+    Features at a bar only use news available before its close (see
+    align_frames), so they are scored against the return from that close to
+    the close `h` bars later. Only rows where every horizon's return is known
+    are used, so all horizons are scored on the same sample.
+
+    Args:
+        df (pd.DataFrame): An aligned or feature table indexed by 'Date' with a 'Close' column.
+        features (list): Feature columns; all numeric non-OHLCV columns if None.
+        horizons: Forward horizons, as bar counts or durations (e.g. '1h').
+        quantiles (int): Number of feature quantiles for the quantile returns.
+        period (str): Period of the per-period IC, e.g. '1D'.
+        rolling_window (int): Number of periods averaged in the rolling IC.
+        interval: Bar interval; inferred from the index if None.
+
+    Returns:
+        dict: DataFrames 'summary', 'ic_pearson', 'ic_spearman', 'hit_ratio',
+            'quantile_returns', 'period_ic' and 'rolling_ic'.
+    """
+    df = df.sort_index()
+    features = features if features is not None else _feature_columns(df)
+    interval = pd.Timedelta(interval) if interval is not None else infer_interval(df.index)
+    bars = horizon_bars(horizons, interval)
+    labels = [str(horizon) for horizon in horizons]
+
+    y = forward_returns(df['Close'].to_numpy(), bars)
+    complete = ~np.isnan(y).any(axis=1)
+    x = df[features].to_numpy(dtype=np.float64)[complete]
+    y = y[complete]
+    index = df.index[complete]
+
+    x_ranks = rank_columns(x)
+    ic_pearson = correlation_matrix(x, y)
+    ic_spearman = spearman_matrix(x, y, x_ranks=x_ranks)
+    hits = hit_ratio(x, y)
+    by_quantile = quantile_returns(x, y, quantiles, x_ranks=x_ranks)
+    period_labels, period_ics = period_ic(x, y, index.floor(period).asi8)
+
+    as_frame = lambda values: pd.DataFrame(values, index=pd.Index(features, name='feature'), columns=labels)
+    ic_columns = pd.MultiIndex.from_product([features, labels], names=['feature', 'horizon'])
+    period_ic_df = pd.DataFrame(
+        period_ics.reshape(len(period_labels), -1), columns=ic_columns,
+        index=pd.DatetimeIndex(period_labels, tz=index.tz, name='Date'),
+    )
+    rolling_ic_df = period_ic_df.rolling(rolling_window, min_periods=1).mean()
+    quantile_df = pd.DataFrame(
+        by_quantile.reshape(-1, len(labels)), columns=labels,
+        index=pd.MultiIndex.from_product([features, range(1, quantiles + 1)], names=['feature', 'quantile']),
+    )
+
+    # IC information ratio: mean over standard deviation of the per-period IC.
+    ic_ir = period_ic_df.mean() / period_ic_df.std()
+    summary = pd.DataFrame({
+        'ic_pearson': ic_pearson.ravel(),
+        'ic_spearman': ic_spearman.ravel(),
+        'ic_ir': ic_ir.replace([np.inf, -np.inf], np.nan).to_numpy(),
+        'hit_ratio': hits.ravel(),
+        'long_short': (by_quantile[:, -1, :] - by_quantile[:, 0, :]).ravel(),
+    }, index=ic_columns)
+    summary['n'] = len(x)
+
+    return {
+        'summary': summary,
+        'ic_pearson': as_frame(ic_pearson),
+        'ic_spearman': as_frame(ic_spearman),
+        'hit_ratio': as_frame(hits),
+        'quantile_returns': quantile_df,
+        'period_ic': period_ic_df,
+        'rolling_ic': rolling_ic_df,
+    }
+
+@instrumented('evaluate')
+def evaluate_alpha_file(input_path: str, output_dir: str, ext: str = '.csv', **kwargs) -> dict:
+    """
+    Evaluates an aligned table from align_features_with_market_data (or a
+    feature table) and saves each result as `output_dir/<name><ext>`.
+
+    See evaluate_alpha for the keyword arguments.
+    """
+    df = read_table(input_path, index_col='Date')
+    results = evaluate_alpha(df, **kwargs)
+    observe(rows_in=len(df), rows_out=len(results['summary']))
+    os.makedirs(output_dir, exist_ok=True)
+    for name, table in results.items():
+        # Tables are saved flat; MultiIndex columns become 'feature|horizon'.
+        if isinstance(table.columns, pd.MultiIndex):
+            table = table.set_axis(['|'.join(map(str, col)) for col in table.columns], axis=1)
+        write_table(table.reset_index(), os.path.join(output_dir, f"{name}{ext}"))
+    logger.info(f"Saved alpha evaluation of {input_path} to {output_dir}")
+    return results
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    news_config = config['news']
+    market_config = config['market']
+    eval_config = config.get('evaluation', {})
+
+    SYMBOL = market_config['symbol']
+    FROM_DATE = str(news_config['from_date'])
+    TO_DATE = str(news_config['to_date'])
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+
+    script_dir = os.path.dirname(__file__)
+    data_dir = os.path.join(script_dir, '..', 'data')
+    DEFAULT_INPUT = os.path.join(data_dir, 'final_features', f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}{EXT}")
+    DEFAULT_OUTPUT = os.path.join(data_dir, 'reports', f"alpha_{SYMBOL}_{FROM_DATE}_{TO_DATE}")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', default=DEFAULT_INPUT, help="Aligned or feature table to evaluate.")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT, help="Directory the result tables are saved to.")
+    parser.add_argument('--features', nargs='+', help="Feature columns (default: all numeric non-OHLCV columns).")
+    parser.add_argument('--horizons', nargs='+', default=eval_config.get('horizons', list(DEFAULT_HORIZONS)),
+                        help="Forward horizons as bar counts or durations, e.g. 1 4 or 15m 1h.")
+    parser.add_argument('--quantiles', type=int, default=eval_config.get('quantiles', 5))
+    parser.add_argument('--period', default=eval_config.get('period', '1D'), help="Period of the per-period IC.")
+    parser.add_argument('--rolling-window', type=int, default=eval_config.get('rolling_window', 30),
+                        help="Number of periods in the rolling IC.")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        logger.error(f"Input file not found: {args.input}")
+        logger.error("Please run the aligner.py script first.")
+    else:
+        results = evaluate_alpha_file(
+            args.input, args.output_dir, ext=EXT,
+            features=args.features,
+            horizons=args.horizons,
+            quantiles=args.quantiles,
+            period=args.period,
+            rolling_window=args.rolling_window,
+        )
+        print(results['summary'].to_string(float_format='%.4f'))
@@ -0,0 +1,247 @@
+import os
+import logging
+import math
+import asyncio
+import email.utils
+import xml.etree.ElementTree as ET
+import aiohttp
+import pandas as pd
+from src.news_fetcher import normalize_cryptopanic_item, NEWSAPI_PAGE_SIZE
+from src.raw_news import article_key
+
+logger = logging.getLogger(__name__)
+
+NEWSAPI_URL = 'https://newsapi.org/v2/everything'
+CRYPTOPANIC_URL = 'https://cryptopanic.com/api/v2/posts/'
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_API_KEY_ENVS = {'newsapi': 'NEWS_API_KEY', 'cryptopanic': 'CRYPTOPANIC_API_KEY'}
+DEFAULT_RATES = {'newsapi': 1.0, 'cryptopanic': 2.0, 'rss': 5.0}
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+
+class RateLimiter:
+    """Spaces out requests to at most `rate_per_sec`, shared by all tasks of a source."""
+
+    def __init__(self, rate_per_sec: float):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def _get(
+    session: aiohttp.ClientSession,
+    limiter: RateLimiter,
+    url: str,
+    params: dict = None,
+    headers: dict = None,
+    retries: int = 3,
+    backoff: float = 1.0,
+    as_text: bool = False,
+):
+    """GETs a URL under the source's rate limit, retrying 429/5xx and connection errors."""
+    for attempt in range(retries + 1):
+        await limiter.wait()
+        try:
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status in RETRY_STATUSES and attempt < retries:
+                    retry_after = response.headers.get('Retry-After')
+                    delay = float(retry_after) if retry_after and retry_after.isdigit() else backoff * 2 ** attempt
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+                if as_text:
+                    return await response.text()
+                return await response.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            if attempt == retries:
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt)
+
+def _api_key(spec: dict) -> str:
+    name = spec['name']
+    return spec.get('api_key') or os.getenv(spec.get('api_key_env', DEFAULT_API_KEY_ENVS.get(name, '')), '')
+
+async def _fetch_newsapi(session, limiter, spec: dict, query: str, from_date: str, to_date: str) -> list:
+    """Fetches every page of NewsAPI's /everything; pages after the first run concurrently."""
+    url = spec.get('base_url', NEWSAPI_URL)
+    headers = {'X-Api-Key': _api_key(spec)}
+    params = {
+        'q': query, 'from': from_date, 'to': to_date, 'language': 'en',
+        'sortBy': 'publishedAt', 'pageSize': NEWSAPI_PAGE_SIZE, 'page': 1,
+    }
+    retry = {'retries': spec.get('retries', 3), 'backoff': spec.get('backoff', 1.0)}
+
+    first = await _get(session, limiter, url, params=params, headers=headers, **retry)
+    articles = list(first.get('articles', []))
+    pages = math.ceil(first.get('totalResults', 0) / NEWSAPI_PAGE_SIZE)
+    pages = min(pages, spec.get('max_pages', 100))
+
+    results = await asyncio.gather(
+        *[_get(session, limiter, url, params={**params, 'page': page}, headers=headers, **retry)
+          for page in range(2, pages + 1)],
+        return_exceptions=True,
+    )
+    for page, result in enumerate(results, start=2):
+        if isinstance(result, Exception):
+            # NewsAPI rejects pages past the plan's result cap; keep what we have.
+            logger.warning(f"NewsAPI page {page} failed: {result}")
+            continue
+        articles.extend(result.get('articles', []))
+    return articles
+
+async def _fetch_cryptopanic(session, limiter, spec: dict, query: str, from_date: str, to_date: str) -> list:
+    """Follows CryptoPanic's `next` cursor until it runs out or max_pages is reached."""
+    url = spec.get('base_url', CRYPTOPANIC_URL)
+    params = {'auth_token': _api_key(spec), 'currencies': query, 'public': 'true'}
+    retry = {'retries': spec.get('retries', 3), 'backoff': spec.get('backoff', 1.0)}
+
+    articles = []
+    for _ in range(spec.get('max_pages', 100)):
+        data = await _get(session, limiter, url, params=params, **retry)
+        articles.extend(normalize_cryptopanic_item(item) for item in data.get('results', []))
+        url, params = data.get('next'), None
+        if not url:
+            break
+    return articles
+
+def _rss_time(value: str):
+    if not value:
+        return None
+    try:
+        return pd.Timestamp(email.utils.parsedate_to_datetime(value)).tz_convert('UTC')
+    except (TypeError, ValueError):
+        timestamp = pd.to_datetime(value, utc=True, errors='coerce')
+        return None if pd.isna(timestamp) else timestamp
+
+def parse_feed(xml_text: str) -> list:
+    """Parses an RSS 2.0 or Atom feed into articles in the NewsAPI schema."""
+    root = ET.fromstring(xml_text)
+    articles = []
+    channel = root.find('channel')
+    if channel is not None:
+        source_name = channel.findtext('title')
+        for item in channel.iter('item'):
+            published = _rss_time(item.findtext('pubDate'))
+            articles.append({
+                'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ') if published is not None else None,
+                'title': item.findtext('title'),
+                'description': item.findtext('description'),
+                'url': item.findtext('link'),
+                'source': {'name': source_name},
+            })
+    else:
+        source_name = root.findtext(f'{ATOM_NS}title')
+        for entry in root.iter(f'{ATOM_NS}entry'):
+            published = _rss_time(entry.findtext(f'{ATOM_NS}published') or entry.findtext(f'{ATOM_NS}updated'))
+            link = entry.find(f'{ATOM_NS}link')
+            articles.append({
+                'publishedAt': published.strftime('%Y-%m-%dT%H:%M:%SZ') if published is not None else None,
+                'title': entry.findtext(f'{ATOM_NS}title'),
+                'description': entry.findtext(f'{ATOM_NS}summary'),
+                'url': link.get('href') if link is not None else None,
+                'source': {'name': source_name},
+            })
+    return articles
+
+async def _fetch_rss(session, limiter, spec: dict, query: str, from_date: str, to_date: str) -> list:
+    """Fetches all configured feeds concurrently and keeps items mentioning the query in the date range."""
+    retry = {'retries': spec.get('retries', 3), 'backoff': spec.get('backoff', 1.0)}
+    feeds = await asyncio.gather(
+        *[_get(session, limiter, url, as_text=True, **retry) for url in spec.get('urls', [])],
+        return_exceptions=True,
+    )
+    start = pd.Timestamp(from_date, tz='UTC') if from_date else None
+    end = pd.Timestamp(to_date, tz='UTC') + pd.Timedelta(days=1) if to_date else None
+    needle = query.lower()
+
+    articles = []
+    for url, feed in zip(spec.get('urls', []), feeds):
+        if isinstance(feed, Exception):
+            logger.warning(f"RSS feed {url} failed: {feed}")
+            continue
+        for article in parse_feed(feed):
+            text = f"{article['title'] or ''} {article['description'] or ''}".lower()
+            published = pd.to_datetime(article['publishedAt'], utc=True) if article['publishedAt'] else None
+            if needle not in text:
+                continue
+            if published is not None and ((start and published < start) or (end and published >= end)):
+                continue
+            articles.append(article)
+    return articles
+
+SOURCE_FETCHERS = {
+    'newsapi': _fetch_newsapi,
+    'cryptopanic': _fetch_cryptopanic,
+    'rss': _fetch_rss,
+}
+
+def merge_articles(article_lists: list) -> list:
+    """
+    Merges per-source article lists into one stream, dropping duplicates by
+    article_key (first source wins) and sorting newest first like NewsAPI.
+    """
+    seen = set()
+    merged = []
+    for articles in article_lists:
+        for article in articles:
+            key = article_key(article)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(article)
+    return sorted(merged, key=lambda article: article.get('publishedAt') or '', reverse=True)
+
+async def fetch_all_articles_async(
+    sources: list,
+    query: str,
+    from_date: str,
+    to_date: str,
+    max_connections: int = 10,
+    timeout: float = 30.0,
+) -> list:
+    """
+    Fetches all pages of several sources concurrently over one pooled session.
+
+    Args:
+        sources (list): Source specs, e.g. {'name': 'newsapi', 'rate_per_sec': 1}.
+            Optional keys: 'api_key' / 'api_key_env', 'base_url', 'urls' (rss),
+            'max_pages', 'retries', 'backoff'.
+        query (str): The keyword to search for.
+        from_date (str): Start date (or ISO timestamp).
+        to_date (str): End date.
+        max_connections (int): Size of the shared HTTP connection pool.
+        timeout (float): Total timeout per request in seconds.
+
+    Returns:
+        list: Deduplicated articles in the NewsAPI schema. A failing source is
+        reported and skipped.
+    """
+    connector = aiohttp.TCPConnector(limit=max_connections)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        tasks = []
+        for spec in sources:
+            name = spec['name']
+            if name not in SOURCE_FETCHERS:
+                raise ValueError(f"Unknown news source: {name}")
+            limiter = RateLimiter(spec.get('rate_per_sec', DEFAULT_RATES[name]))
+            tasks.append(SOURCE_FETCHERS[name](session, limiter, spec, query, from_date, to_date))
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    article_lists = []
+    for spec, result in zip(sources, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Source {spec['name']} failed: {result}")
+            continue
+        logger.info(f"Fetched {len(result)} articles from {spec['name']}")
+        article_lists.append(result)
+    return merge_articles(article_lists)
+
+def fetch_all_articles(sources: list, query: str, from_date: str, to_date: str, **kwargs) -> list:
+    """Synchronous wrapper around fetch_all_articles_async."""
+    return asyncio.run(fetch_all_articles_async(sources, query, from_date, to_date, **kwargs))
@@ -0,0 +1,95 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.storage import read_table, write_table
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def find_duplicates(index: pd.Index) -> pd.Index:
+    """Returns the candle open times that occur more than once."""
+    return index[index.duplicated()].unique()
+
+def find_gaps(index: pd.Index, start_msec: int, end_msec: int, step_msec: int) -> list:
+    """
+    Finds runs of missing candles in [start_msec, end_msec).
+
+    Args:
+        index (pd.Index): Open times of the candles present (UTC timestamps).
+        start_msec (int): Start of the expected range in milliseconds.
+        end_msec (int): End of the expected range in milliseconds (exclusive).
+        step_msec (int): The candle interval in milliseconds.
+
+    Returns:
+        list: (start_msec, end_msec) tuples, one per run of missing candles.
+    """
+    expected = np.arange(start_msec, end_msec, step_msec, dtype=np.int64)
+    if len(expected) == 0:
+        return []
+    present = pd.DatetimeIndex(index).as_unit('ms').asi8
+    missing = expected[~np.isin(expected, present)]
+    if len(missing) == 0:
+        return []
+
+    # Split the missing open times wherever they stop being consecutive.
+    breaks = np.flatnonzero(np.diff(missing) != step_msec) + 1
+    return [(int(run[0]), int(run[-1]) + step_msec) for run in np.split(missing, breaks)]
+
+class CandleStore:
+    """
+    An append-only local store of OHLCV candles, keyed by symbol and interval.
+
+    Each append writes a new Parquet part file; reads merge the parts and keep the
+    latest copy of any candle written more than once.
+
+    Args:
+        root (str): Directory holding one sub-directory per symbol and interval.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f"{symbol.replace('/', '')}_{interval}")
+
+    def _parts(self, symbol: str, interval: str) -> list:
+        path = self._dir(symbol, interval)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith('.parquet'))
+
+    def append(self, symbol: str, interval: str, df: pd.DataFrame):
+        """Writes candles (indexed by a UTC 'Date') as a new part file."""
+        if df is None or df.empty:
+            return
+        path = self._dir(symbol, interval)
+        os.makedirs(path, exist_ok=True)
+        write_table(df[OHLCV_COLUMNS], os.path.join(path, f"part-{time.time_ns()}.parquet"))
+
+    def read(self, symbol: str, interval: str, start_msec: int = None, end_msec: int = None) -> pd.DataFrame:
+        """
+        Reads the stored candles, optionally limited to opens in [start_msec, end_msec).
+
+        Returns:
+            pd.DataFrame: OHLCV columns indexed by a sorted, unique UTC 'Date'.
+        """
+        parts = [read_table(part, index_col='Date') for part in self._parts(symbol, interval)]
+        if not parts:
+            return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], tz='UTC', name='Date'))
+        df = pd.concat(parts)
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+        if start_msec is not None:
+            df = df[df.index >= pd.Timestamp(start_msec, unit='ms', tz='UTC')]
+        if end_msec is not None:
+            df = df[df.index < pd.Timestamp(end_msec, unit='ms', tz='UTC')]
+        return df
+
+    def compact(self, symbol: str, interval: str):
+        """Rewrites all part files of a symbol and interval as a single file."""
+        parts = self._parts(symbol, interval)
+        if len(parts) <= 1:
+            return
+        df = self.read(symbol, interval)
+        self.append(symbol, interval, df)
+        for part in parts:
+            os.remove(part)
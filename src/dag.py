@@ -0,0 +1,246 @@
+import os
+import logging
+import json
+import time
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_BYTES = 1 << 20
+
+def hash_path(path: str) -> str:
+    """
+    Returns the sha256 of a file's content, or of every file under a directory
+    (relative paths and contents, in sorted order). Missing paths hash to None.
+    """
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        files = []
+        for root, _, names in os.walk(path):
+            files.extend(os.path.join(root, name) for name in names)
+        for file_path in sorted(files):
+            digest.update(os.path.relpath(file_path, path).replace(os.sep, '/').encode('utf-8'))
+            digest.update(hash_path(file_path).encode('ascii'))
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_CHUNK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def hash_params(params) -> str:
+    """Returns a stable sha256 of JSON-like stage parameters."""
+    encoded = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+def range_is_open(to_date: str, now: datetime = None) -> bool:
+    """
+    Tells whether a fetch range ending at `to_date` reaches the present, so an
+    API may still return more (or revised) data for it. A plain date covers
+    that whole UTC day; a timestamp without a zone is taken as UTC.
+    """
+    end = datetime.fromisoformat(str(to_date))
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if len(str(to_date)) == 10:
+        end += timedelta(days=1)
+    return end > (now or datetime.now(timezone.utc))
+
+class Stage:
+    """
+    A pipeline step with declared file inputs and outputs.
+
+    A stage depends on the stages producing its inputs. Its cache key combines
+    the content hashes of its inputs with a hash of its parameters, so it only
+    reruns when one of them changed (or its outputs were changed or removed).
+
+    Args:
+        name (str): Unique stage name.
+        func: Callable run with no arguments; it must write every output.
+        inputs: Files or directories read by the stage.
+        outputs: Files or directories written by the stage.
+        params: JSON-like configuration the outputs depend on.
+        always_run (bool): Run even if the cache key is unchanged, e.g. for
+            stages fetching a range that reaches the present from an API (see
+            range_is_open) or merging incrementally.
+    """
+
+    def __init__(self, name: str, func, inputs=(), outputs=(), params=None, always_run: bool = False):
+        self.name = name
+        self.func = func
+        self.inputs = [os.path.abspath(path) for path in inputs]
+        self.outputs = [os.path.abspath(path) for path in outputs]
+        self.params = params if params is not None else {}
+        self.always_run = always_run
+
+    def key(self, input_hashes: dict) -> str:
+        return hash_params({
+            'stage': self.name,
+            'params': hash_params(self.params),
+            'inputs': [input_hashes[path] for path in self.inputs],
+        })
+
+class DAGRunner:
+    """
+    Runs stages in dependency order, running independent stages concurrently
+    and skipping stages whose cache key and outputs are unchanged.
+
+    The cache key and output hashes of each successful stage are saved to
+    `state_path` as soon as it finishes, so a crashed run resumes from the
+    first stage that did not complete. Stages downstream of a failed stage
+    are not run, so they never read stale outputs. Every run writes a
+    manifest with per-stage status and timings to `manifest_dir`.
+
+    Args:
+        stages (list): The Stage objects.
+        state_path (str): JSON file holding the cache state.
+        manifest_dir (str): Directory for run manifests, or None to not write them.
+        max_workers (int): Maximum number of stages run at once.
+
+    Raises:
+        ValueError: If stage names or outputs are not unique, or the stages form a cycle.
+    """
+
+    def __init__(self, stages: list, state_path: str, manifest_dir: str = None, max_workers: int = 4):
+        self.stages = {}
+        producers = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+            for path in stage.outputs:
+                if path in producers:
+                    raise ValueError(f"Output {path} is produced by both {producers[path]} and {stage.name}.")
+                producers[path] = stage.name
+        self.deps = {
+            stage.name: sorted({producers[path] for path in stage.inputs if path in producers})
+            for stage in stages
+        }
+        self.order = self._topological_order()
+        self.state_path = state_path
+        self.manifest_dir = manifest_dir
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._state = {}
+        if os.path.exists(state_path):
+            with open(state_path, 'r') as f:
+                self._state = json.load(f)
+
+    def _topological_order(self) -> list:
+        order, done = [], set()
+        remaining = list(self.stages)
+        while remaining:
+            ready = [name for name in remaining if all(dep in done for dep in self.deps[name])]
+            if not ready:
+                raise ValueError(f"Stages form a cycle: {remaining}")
+            order.extend(ready)
+            done.update(ready)
+            remaining = [name for name in remaining if name not in done]
+        return order
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.state_path)), exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._state, f, indent=4)
+        os.replace(tmp_path, self.state_path)
+
+    def _is_cached(self, stage: Stage, key: str) -> bool:
+        previous = self._state.get(stage.name)
+        if stage.always_run or previous is None or previous['key'] != key:
+            return False
+        return all(hash_path(path) == previous['outputs'].get(path) for path in stage.outputs)
+
+    def _run_stage(self, stage: Stage, force: bool) -> dict:
+        started = time.perf_counter()
+        record = {'started_at': datetime.now(timezone.utc).isoformat()}
+        input_hashes = {path: hash_path(path) for path in stage.inputs}
+        key = stage.key(input_hashes)
+        record.update({'key': key, 'inputs': input_hashes})
+
+        with self._lock:
+            cached = not force and self._is_cached(stage, key)
+        if cached:
+            logger.info(f"Stage {stage.name}: inputs unchanged, skipped.")
+            record['status'] = 'cached'
+        else:
+            logger.info(f"Stage {stage.name}: running...")
+            try:
+                stage.func()
+                missing = [path for path in stage.outputs if not os.path.exists(path)]
+                if missing:
+                    raise RuntimeError(f"Stage {stage.name} did not write {missing}")
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed: {e}")
+                record.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+                with self._lock:
+                    self._state.pop(stage.name, None)
+                    self._save_state()
+            else:
+                record['status'] = 'ran'
+                output_hashes = {path: hash_path(path) for path in stage.outputs}
+                with self._lock:
+                    self._state[stage.name] = {'key': key, 'outputs': output_hashes}
+                    self._save_state()
+        record['seconds'] = round(time.perf_counter() - started, 3)
+        return record
+
+    def run(self, force: bool = False) -> dict:
+        """
+        Runs (or skips) every stage.
+
+        Args:
+            force (bool): Run every stage even if its cache key is unchanged.
+
+        Returns:
+            dict: The run manifest: overall 'status' ('succeeded' or 'failed'),
+                timings and a record per stage with its 'status' ('ran',
+                'cached', 'failed' or 'blocked' by a failed dependency).
+        """
+        run_started = time.perf_counter()
+        manifest = {'run_id': datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ'),
+                    'started_at': datetime.now(timezone.utc).isoformat(), 'stages': {}}
+        records = manifest['stages']
+        pending = list(self.order)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name in list(pending):
+                    deps = self.deps[name]
+                    if any(records.get(dep, {}).get('status') in ('failed', 'blocked') for dep in deps):
+                        records[name] = {'status': 'blocked', 'blocked_by': deps, 'seconds': 0.0}
+                        pending.remove(name)
+                    elif all(records.get(dep, {}).get('status') in ('ran', 'cached') for dep in deps):
+                        running[executor.submit(self._run_stage, self.stages[name], force)] = name
+                        pending.remove(name)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    records[running.pop(future)] = future.result()
+
+        manifest['stages'] = {name: records[name] for name in self.order}
+        manifest['seconds'] = round(time.perf_counter() - run_started, 3)
+        manifest['status'] = 'failed' if any(
+            record['status'] in ('failed', 'blocked') for record in records.values()
+        ) else 'succeeded'
+        if self.manifest_dir is not None:
+            os.makedirs(self.manifest_dir, exist_ok=True)
+            manifest_path = os.path.join(self.manifest_dir, f"run_{manifest['run_id']}.json")
+            with open(manifest_path, 'w') as f:
+                json.dump(manifest, f, indent=4)
+            manifest['path'] = manifest_path
+        return manifest
+
+def format_manifest(manifest: dict) -> str:
+    """Renders a run manifest as a short per-stage timing table."""
+    lines = [f"{'stage':<24}{'status':<10}{'seconds':>10}"]
+    for name, record in manifest['stages'].items():
+        lines.append(f"{name:<24}{record['status']:<10}{record['seconds']:>10.2f}")
+    lines.append(f"{'total':<24}{manifest['status']:<10}{manifest['seconds']:>10.2f}")
+    return '\n'.join(lines)
@@ -0,0 +1,272 @@
+import os
+import logging
+import yaml
+import heapq
+import pickle
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from src.storage import read_table, write_table, EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for the universal hash family; with 32-bit shingle hashes and
+# coefficients below it, a * x + b stays within uint64.
+_PRIME = np.uint64((1 << 31) - 1)
+_SHINGLE_BASE = np.uint64(257)
+DUPLICATE_COLUMNS = ['publishedAt', 'url', 'duplicate_of', 'similarity']
+
+def shingle_hashes(text: str, shingle_size: int = 5) -> np.ndarray:
+    """Hashes the distinct character shingles of a text to 32-bit integers."""
+    codes = np.frombuffer(text.encode('utf-8'), dtype=np.uint8).astype(np.uint64)
+    if len(codes) == 0:
+        return np.empty(0, dtype=np.uint64)
+    if len(codes) < shingle_size:
+        shingle_size = len(codes)
+    powers = _SHINGLE_BASE ** np.arange(shingle_size - 1, -1, -1, dtype=np.uint64)
+    hashes = (sliding_window_view(codes, shingle_size) * powers).sum(axis=1) & np.uint64(0xFFFFFFFF)
+    return np.unique(hashes)
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple:
+    """Picks (bands, rows) whose S-curve crosses 50% closest to `threshold`."""
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1)]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+class MinHashLSH:
+    """
+    A rolling MinHash/LSH index of canonical articles.
+
+    Each article is reduced to a MinHash signature over its character shingles.
+    Signatures are split into bands, and articles sharing a band bucket become
+    candidates; only candidates are compared, so a query costs roughly the
+    number of buckets plus near matches rather than the size of the index.
+    Articles older than `max_age` relative to the newest one are evicted.
+
+    Args:
+        threshold: Estimated Jaccard similarity at or above which an article is a duplicate.
+        num_perm: Number of hash permutations in a signature.
+        shingle_size: Characters per shingle.
+        max_age: How long canonical articles stay in the index, or None to keep them all.
+        seed: Seed of the hash permutations.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, shingle_size=5, max_age='21d', seed=1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.max_age = pd.Timedelta(max_age) if max_age is not None else None
+        self.seed = seed
+        self.bands, self.rows = lsh_bands(num_perm, threshold)
+
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_PRIME), size=num_perm).astype(np.uint64)
+        self._b = rng.randint(0, int(_PRIME), size=num_perm).astype(np.uint64)
+
+        self._buckets = [{} for _ in range(self.bands)]
+        self._docs = {} # url -> (signature, band keys)
+        self._expiry = [] # heap of (publishedAt, url)
+        self._newest = None
+
+    @property
+    def params(self) -> dict:
+        """The configuration this index's state depends on."""
+        return {
+            'threshold': self.threshold,
+            'num_perm': self.num_perm,
+            'shingle_size': self.shingle_size,
+            'max_age': str(self.max_age),
+            'seed': self.seed,
+        }
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._docs
+
+    def signature(self, text: str) -> np.ndarray:
+        """Returns the MinHash signature of a text, or None if it has no shingles."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        if len(hashes) == 0:
+            return None
+        return ((self._a[:, None] * hashes[None, :] + self._b[:, None]) % _PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> list:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, signature: np.ndarray) -> tuple:
+        """
+        Finds the most similar indexed article.
+
+        Returns:
+            tuple: (url, similarity) of the best match at or above the threshold, or (None, 0.0).
+        """
+        candidates = set()
+        for buckets, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(buckets.get(key, ()))
+        best, best_similarity = None, 0.0
+        for url in candidates:
+            similarity = float(np.mean(self._docs[url][0] == signature))
+            if similarity > best_similarity:
+                best, best_similarity = url, similarity
+        if best_similarity < self.threshold:
+            return None, 0.0
+        return best, best_similarity
+
+    def insert(self, url: str, signature: np.ndarray, published_at: pd.Timestamp):
+        """Adds a canonical article and evicts articles that fell out of the rolling window."""
+        keys = self._band_keys(signature)
+        for buckets, key in zip(self._buckets, keys):
+            buckets.setdefault(key, set()).add(url)
+        self._docs[url] = (signature, keys)
+        heapq.heappush(self._expiry, (published_at, url))
+        self.advance(published_at)
+
+    def advance(self, published_at: pd.Timestamp):
+        """Moves the rolling window up to `published_at`, evicting articles older than `max_age`."""
+        self._newest = published_at if self._newest is None else max(self._newest, published_at)
+        if self.max_age is None:
+            return
+        cutoff = self._newest - self.max_age
+        while self._expiry and self._expiry[0][0] < cutoff:
+            _, url = heapq.heappop(self._expiry)
+            _, keys = self._docs.pop(url)
+            for buckets, key in zip(self._buckets, keys):
+                bucket = buckets[key]
+                bucket.discard(url)
+                if not bucket:
+                    del buckets[key]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: str) -> 'MinHashLSH':
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def deduplicate_articles(cleaned_df: pd.DataFrame, index: MinHashLSH) -> tuple:
+    """
+    Splits cleaned articles into canonical articles and near-duplicates.
+
+    Articles are matched in publication order against the index, so the
+    earliest copy of a story is canonical. Canonical articles are added to it.
+
+    Args:
+        cleaned_df (pd.DataFrame): Articles with 'title_cleaned' and 'content_cleaned'.
+        index (MinHashLSH): The index of canonical articles seen so far.
+
+    Returns:
+        tuple: The canonical articles (in input order) and a frame with
+            DUPLICATE_COLUMNS linking each duplicate to its canonical URL.
+    """
+    texts = cleaned_df['title_cleaned'].fillna('') + ' ' + cleaned_df['content_cleaned'].fillna('')
+    published = pd.to_datetime(cleaned_df['publishedAt'], utc=True)
+    is_duplicate = np.zeros(len(cleaned_df), dtype=bool)
+    links = []
+    for pos in np.argsort(published.to_numpy(), kind='stable'):
+        url = cleaned_df['url'].iat[pos]
+        signature = index.signature(texts.iat[pos].strip())
+        if signature is None or pd.isna(url) or pd.isna(published.iat[pos]):
+            continue
+        index.advance(published.iat[pos])
+        canonical, similarity = (url, 1.0) if url in index else index.query(signature)
+        if canonical is None:
+            index.insert(url, signature, published.iat[pos])
+            continue
+        is_duplicate[pos] = True
+        links.append((published.iat[pos], url, canonical, similarity))
+
+    duplicates_df = pd.DataFrame(links, columns=DUPLICATE_COLUMNS)
+    return cleaned_df[~is_duplicate], duplicates_df
+
+def load_index(state_path: str = None, **params) -> MinHashLSH:
+    """Returns the index saved at `state_path` if it has the same parameters, else a new one."""
+    index = MinHashLSH(**params)
+    if state_path is not None and os.path.exists(state_path):
+        saved = MinHashLSH.load(state_path)
+        if saved.params == index.params:
+            return saved
+    return index
+
+@instrumented('dedup')
+def deduplicate_news_data(
+    input_path: str,
+    output_path: str,
+    duplicates_path: str,
+    threshold: float = 0.8,
+    num_perm: int = 128,
+    shingle_size: int = 5,
+    max_age='21d',
+    state_path: str = None,
+):
+    """
+    Drops near-duplicate articles from a cleaned news table before NLP.
+
+    Canonical articles are saved to `output_path`, and the links from each
+    duplicate to its canonical article to `duplicates_path`. If `state_path`
+    holds an index saved with the same parameters it is reused, so articles
+    are also matched against earlier runs; the index is saved back afterwards.
+
+    Args:
+        input_path (str): Path to the cleaned news table.
+        output_path (str): Path to save the canonical articles to.
+        duplicates_path (str): Path to save the duplicate links to.
+        threshold (float): Estimated Jaccard similarity at or above which an article is a duplicate.
+        num_perm (int): Number of hash permutations in a signature.
+        shingle_size (int): Characters per shingle.
+        max_age: How long canonical articles stay in the index.
+        state_path (str): Optional path of the persisted index.
+    """
+    index = load_index(
+        state_path, threshold=threshold, num_perm=num_perm, shingle_size=shingle_size, max_age=max_age,
+    )
+    cleaned_df = read_table(input_path)
+    canonical_df, duplicates_df = deduplicate_articles(cleaned_df, index)
+    observe(rows_in=len(cleaned_df), rows_out=len(canonical_df))
+    write_table(canonical_df, output_path)
+    write_table(duplicates_df, duplicates_path)
+    if state_path is not None:
+        index.save(state_path)
+    logger.info(f"Dedup: kept {len(canonical_df)} articles, dropped {len(duplicates_df)} near-duplicates. "
+                f"Saved to {output_path}")
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    news_config = config['news']
+    dedup_config = config.get('dedup', {})
+
+    QUERY = news_config['query']
+    FROM_DATE = str(news_config['from_date'])
+    TO_DATE = str(news_config['to_date'])
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+
+    script_dir = os.path.dirname(__file__)
+    processed_news_dir = os.path.join(script_dir, '..', 'data', 'processed_news')
+
+    INPUT_PATH = os.path.join(processed_news_dir, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    OUTPUT_PATH = os.path.join(processed_news_dir, f"deduped_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    DUPLICATES_PATH = os.path.join(processed_news_dir, f"duplicates_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+
+    if not os.path.exists(INPUT_PATH):
+        logger.error(f"Input file not found: {INPUT_PATH}")
+        logger.error("Please run the text_cleaner.py script first.")
+    else:
+        deduplicate_news_data(
+            INPUT_PATH, OUTPUT_PATH, DUPLICATES_PATH,
+            threshold=dedup_config.get('threshold', 0.8),
+            num_perm=dedup_config.get('num_perm', 128),
+            shingle_size=dedup_config.get('shingle_size', 5),
+            max_age=dedup_config.get('max_age', '21d'),
+        )
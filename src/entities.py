@@ -0,0 +1,126 @@
+import os
+import logging
+import yaml
+import numpy as np
+import pandas as pd
+from itertools import chain
+from src.storage import read_table, EXTENSIONS
+from src.instrumentation import configure_logging
+
+logger = logging.getLogger(__name__)
+
+ENTITY_COLUMNS = ['article_id', 'entity', 'label']
+
+def compact_entities(entities_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Gives an entity table its compact dtypes: int32 article ids and categorical
+    entity texts and labels, whose codes are the entity and label ids.
+    """
+    return pd.DataFrame({
+        'article_id': entities_df['article_id'].to_numpy(dtype=np.int32),
+        'entity': pd.Categorical(entities_df['entity']),
+        'label': pd.Categorical(entities_df['label']),
+    })
+
+def encode_entities(entity_lists: list, article_ids) -> pd.DataFrame:
+    """
+    Dictionary-encodes per-article entity lists into a long table.
+
+    Args:
+        entity_lists (list): One list of (text, label) tuples per article.
+        article_ids: The id of each article, e.g. its row in the features table.
+
+    Returns:
+        pd.DataFrame: One row per entity mention with ENTITY_COLUMNS (see compact_entities).
+    """
+    counts = np.fromiter((len(ents) for ents in entity_lists), dtype=np.int64, count=len(entity_lists))
+    mentions = list(chain.from_iterable(entity_lists))
+    return compact_entities(pd.DataFrame({
+        'article_id': np.repeat(np.asarray(article_ids, dtype=np.int32), counts),
+        'entity': [ent[0] for ent in mentions],
+        'label': [ent[1] for ent in mentions],
+    }))
+
+def decode_entities(entities_df: pd.DataFrame, article_ids) -> list:
+    """The inverse of encode_entities: a list of (text, label) tuples per id in `article_ids`."""
+    grouped = {
+        article_id: list(zip(group['entity'].astype(str), group['label'].astype(str)))
+        for article_id, group in entities_df.groupby('article_id', sort=False)
+    }
+    return [grouped.get(article_id, []) for article_id in article_ids]
+
+def read_entities(path: str, filters=None) -> pd.DataFrame:
+    """
+    Reads an entity table written by process_nlp_features with its compact dtypes.
+    `filters` (e.g. [('article_id', '>=', 100)]) prunes Parquet and dataset reads only.
+    """
+    return compact_entities(read_table(path, columns=ENTITY_COLUMNS, filters=filters))
+
+def entity_mention_counts(
+    entities_df: pd.DataFrame,
+    features_df: pd.DataFrame,
+    interval: str,
+    labels=None,
+    top: int = None,
+) -> pd.DataFrame:
+    """
+    Counts how often each entity is mentioned per `interval`, by article publication time.
+
+    Args:
+        entities_df (pd.DataFrame): The entity table.
+        features_df (pd.DataFrame): NLP features with 'article_id' and 'publishedAt'.
+        interval (str): Bucket size, e.g. '1h'.
+        labels: Only count entities with these labels, e.g. ['ORG', 'PERSON'].
+        top (int): Only keep the `top` most mentioned entities.
+
+    Returns:
+        pd.DataFrame: Mention counts indexed by bucket start ('Date'), one column per entity.
+    """
+    if labels is not None:
+        entities_df = entities_df[entities_df['label'].isin(labels)]
+    published = pd.Series(
+        pd.to_datetime(features_df['publishedAt'], utc=True).to_numpy(),
+        index=features_df['article_id'].to_numpy(),
+    )
+    buckets = pd.DatetimeIndex(published.reindex(entities_df['article_id']).to_numpy(), tz='UTC').floor(interval)
+    counts = (
+        entities_df.assign(Date=buckets)
+        .groupby(['Date', 'entity'], observed=True).size()
+        .unstack('entity', fill_value=0)
+    )
+    if top is not None:
+        counts = counts[counts.sum().nlargest(top).index]
+    counts.columns = counts.columns.astype(str)
+    counts.columns.name = None
+    return counts.astype(np.int32)
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    news_config = config['news']
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+
+    QUERY = news_config['query']
+    FROM_DATE = str(news_config['from_date'])
+    TO_DATE = str(news_config['to_date'])
+
+    processed_news_dir = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed_news')
+    FEATURES_PATH = os.path.join(processed_news_dir, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    ENTITIES_PATH = os.path.join(processed_news_dir, f"entities_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT or '.parquet'}")
+
+    if not os.path.exists(ENTITIES_PATH):
+        logger.error(f"Input file not found: {ENTITIES_PATH}")
+    else:
+        counts = entity_mention_counts(
+            read_entities(ENTITIES_PATH),
+            read_table(FEATURES_PATH, columns=['article_id', 'publishedAt']),
+            '1D', top=10,
+        )
+        print(counts.to_string())
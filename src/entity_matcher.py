@@ -0,0 +1,170 @@
+import os
+import json
+import hashlib
+import logging
+import yaml
+from src.text_cleaner import clean_text
+from src.instrumentation import configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Entity extraction modes of nlp.ner: spaCy's statistical NER, the alias
+# dictionary matcher, or the mentions of both.
+NER_MODES = ('spacy', 'matcher', 'both')
+
+# Built-in alias dictionary: label -> canonical entity id -> aliases. The id is
+# also an alias. Aliases are matched as whole words of the cleaned text, so
+# ambiguous words ('link', 'near', 'dot', 'fed') are left out.
+DEFAULT_DICTIONARY = {
+    'ASSET': {
+        'BTC': ['bitcoin', 'xbt'],
+        'ETH': ['ethereum', 'ether'],
+        'SOL': ['solana'],
+        'XRP': ['ripple'],
+        'BNB': [],
+        'DOGE': ['dogecoin'],
+        'ADA': ['cardano'],
+        'AVAX': ['avalanche'],
+        'DOT': ['polkadot'],
+        'LINK': ['chainlink'],
+        'MATIC': ['polygon'],
+        'LTC': ['litecoin'],
+        'TRX': ['tron'],
+        'USDT': ['tether'],
+        'USDC': [],
+    },
+    'EXCHANGE': {
+        'BINANCE': [],
+        'COINBASE': [],
+        'KRAKEN': [],
+        'OKX': [],
+        'BYBIT': [],
+        'BITFINEX': [],
+        'KUCOIN': [],
+        'FTX': [],
+    },
+    'PROTOCOL': {
+        'UNISWAP': [],
+        'AAVE': [],
+        'LIDO': [],
+        'MAKERDAO': [],
+        'CURVE': ['curve finance'],
+        'ARBITRUM': [],
+        'EIGENLAYER': [],
+        'LIGHTNING': ['lightning network'],
+    },
+    'REGULATOR': {
+        'SEC': ['securities and exchange commission'],
+        'CFTC': [],
+        'FED': ['federal reserve', 'fomc'],
+    },
+    'EVENT': {
+        'HACK': ['hacked', 'hacker', 'hackers', 'exploit', 'exploited', 'breach'],
+        'ETF': ['etfs', 'exchange traded fund', 'exchange-traded fund'],
+        'HALVING': [],
+        'LIQUIDATION': ['liquidations', 'liquidated'],
+        'LAWSUIT': ['lawsuits', 'sued'],
+        'AIRDROP': ['airdrops'],
+    },
+}
+
+class EntityMatcher:
+    """
+    Finds mentions of a dictionary of known entities (assets, exchanges,
+    protocols, regulators, event keywords) in cleaned text and returns their
+    canonical ids, as a much faster and ticker-aware alternative to spaCy NER.
+
+    Aliases are cleaned like the text and split into words. Each text is
+    scanned word by word: a word starting an alias is extended to the longest
+    alias it begins, which then yields (canonical id, label) and the scan
+    continues after it, so matches are whole words, leftmost-longest and
+    non-overlapping.
+
+    Args:
+        dictionary (dict): label -> canonical id -> list of aliases.
+    """
+
+    def __init__(self, dictionary: dict = None):
+        self.dictionary = dictionary if dictionary is not None else DEFAULT_DICTIONARY
+        self._aliases = {}
+        for label, entities in self.dictionary.items():
+            for entity_id, aliases in entities.items():
+                for alias in [entity_id, *(aliases or ())]:
+                    words = tuple(clean_text(alias).split())
+                    if not words:
+                        continue
+                    if words in self._aliases and self._aliases[words] != (entity_id, label):
+                        logger.warning(
+                            f"Alias '{alias}' of {entity_id} ({label}) overrides {self._aliases[words]}"
+                        )
+                    self._aliases[words] = (entity_id, label)
+        self._first_words = {words[0] for words in self._aliases}
+        self._max_words = max((len(words) for words in self._aliases), default=0)
+
+    @classmethod
+    def from_config(cls, config: dict = None, assets=()):
+        """
+        Builds the matcher of the nlp.matcher config section: the built-in
+        dictionary unless `builtin` is false, then the universe `assets` (their
+        aliases and entity aliases under their name), then the section's
+        `dictionary`, later entries replacing earlier ones with the same id.
+        """
+        config = config or {}
+        dictionary = {}
+        sources = [DEFAULT_DICTIONARY] if config.get('builtin', True) else []
+        sources.append({'ASSET': {asset.name: [*asset.aliases, *asset.entity_aliases] for asset in assets}})
+        sources.append(config.get('dictionary') or {})
+        for source in sources:
+            for label, entities in source.items():
+                dictionary.setdefault(label, {}).update(entities)
+        return cls(dictionary)
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the dictionary, so cached results are tied to it."""
+        digest = hashlib.sha1(json.dumps(sorted(self._aliases.items())).encode('utf-8')).hexdigest()
+        return f"matcher:{digest[:12]}"
+
+    def match(self, text: str) -> list:
+        """Returns the (canonical id, label) of every alias mentioned in a cleaned text, in text order."""
+        if not isinstance(text, str):
+            return []
+        words = text.split()
+        if self._first_words.isdisjoint(words):
+            return []
+        mentions = []
+        i = 0
+        while i < len(words):
+            if words[i] in self._first_words:
+                for n in range(min(self._max_words, len(words) - i), 0, -1):
+                    entity = self._aliases.get(tuple(words[i:i + n]))
+                    if entity is not None:
+                        mentions.append(entity)
+                        i += n
+                        break
+                else:
+                    i += 1
+            else:
+                i += 1
+        return mentions
+
+    def match_many(self, texts: list) -> list:
+        """Returns one list of (canonical id, label) tuples per text, like extract_entities_batch."""
+        return [self.match(text) for text in texts]
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    import sys
+    from src.universe import load_universe
+
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    matcher = EntityMatcher.from_config(config.get('nlp', {}).get('matcher', {}), assets=load_universe(config))
+    for line in sys.stdin:
+        print(matcher.match(clean_text(line)))
@@ -0,0 +1,439 @@
+"""
+Measures the price reaction around individual articles (an event study).
+
+Every article is an event at its publication time (plus the publication lag).
+The candle holding each event is found with one searchsorted over the candle
+open times; the bar returns from `pre` before to `post` after that candle are
+then gathered into an (event x offset) matrix by fancy indexing, so no Python
+loop runs per event. Returns are optionally made abnormal by subtracting the
+expected return of a constant-mean or market model estimated over the bars
+before each window, cumulated into CAR paths and averaged per sentiment bucket
+or entity. Events are processed in chunks, so memory stays bounded for
+millions of events.
+
+Run from the repository root, e.g.:
+    python -m src.event_study --pre 1h --post 4h --adjustment mean --group-by sentiment
+"""
+import os
+import logging
+import yaml
+import argparse
+import numpy as np
+import pandas as pd
+from src.alpha_eval import horizon_bars
+from src.aligner import infer_interval
+from src.entities import read_entities
+from src.storage import read_table, write_table, EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
+
+logger = logging.getLogger(__name__)
+
+ADJUSTMENTS = ('none', 'mean', 'market')
+GROUP_BY = ('all', 'sentiment', 'entity')
+# VADER's usual negative / neutral / positive cut-offs of the compound score.
+DEFAULT_SENTIMENT_BINS = (-1.0, -0.05, 0.05, 1.0)
+# Events per chunk of (event x offset) matrices.
+_EVENT_CHUNK_ROWS = 1 << 18
+
+def bar_returns(close: np.ndarray) -> np.ndarray:
+    """Returns the simple return of each bar from the previous close; NaN for the first bar."""
+    close = np.asarray(close, dtype=np.float64)
+    returns = np.full(len(close), np.nan)
+    returns[1:] = close[1:] / close[:-1] - 1.0
+    return returns
+
+def locate_events(opens_ns: np.ndarray, event_ns: np.ndarray, interval_ns: int) -> np.ndarray:
+    """
+    Finds the bar each event falls in (open <= time < open + interval) with a
+    single searchsorted over the sorted bar open times.
+
+    Returns:
+        np.ndarray: One bar position per event; -1 if no bar holds it.
+    """
+    pos = np.searchsorted(opens_ns, event_ns, side='right') - 1
+    inside = pos >= 0
+    inside[inside] = event_ns[inside] < opens_ns[pos[inside]] + interval_ns
+    return np.where(inside, pos, -1)
+
+def window_matrix(
+    values: np.ndarray, opens_ns: np.ndarray, anchors: np.ndarray, offsets: np.ndarray, interval_ns: int,
+) -> np.ndarray:
+    """
+    Gathers values[anchor + offset] for every anchor and offset.
+
+    Returns:
+        np.ndarray: An (anchors, offsets) array; NaN where the bar is out of
+            range or a gap in the candles means it is not `offset` bars away.
+    """
+    idx = anchors[:, None] + offsets[None, :]
+    clipped = np.clip(idx, 0, len(values) - 1)
+    expected = opens_ns[np.maximum(anchors, 0)][:, None] + offsets[None, :] * interval_ns
+    inside = (anchors[:, None] >= 0) & (idx >= 0) & (idx < len(values)) & (opens_ns[clipped] == expected)
+    return np.where(inside, values[clipped], np.nan)
+
+def _window_totals(cumsum: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Sums over bars [lo, hi) from a leading-zero cumsum; bounds are clipped to the series."""
+    n = len(cumsum) - 1
+    return cumsum[np.clip(hi, 0, n)] - cumsum[np.clip(lo, 0, n)]
+
+def expected_returns(
+    returns: np.ndarray,
+    anchors: np.ndarray,
+    pre_bars: int,
+    estimation_bars: int,
+    adjustment: str = 'mean',
+    benchmark_returns: np.ndarray = None,
+    min_estimation_bars: int = None,
+    opens_ns: np.ndarray = None,
+    interval_ns: int = None,
+) -> tuple:
+    """
+    Estimates each event's normal-return model over the `estimation_bars` bars
+    ending where its window starts, with cumulative sums rather than a loop.
+
+    Args:
+        returns (np.ndarray): Bar returns of the asset.
+        anchors (np.ndarray): Event bar positions (see locate_events).
+        pre_bars (int): Bars in the window before the event bar.
+        estimation_bars (int): Length of the estimation window.
+        adjustment (str): 'mean' (constant mean return) or 'market' (market
+            model on `benchmark_returns`: alpha + beta * benchmark return).
+        benchmark_returns (np.ndarray): Bar returns of the benchmark on the same bars.
+        min_estimation_bars (int): Fewer valid bars than this give NaN; half the window by default.
+        opens_ns, interval_ns: Bar open times and the interval; if given, events
+            whose estimation window is cut by the start of the data or spans a
+            gap in the candles give NaN, as in window_matrix.
+
+    Returns:
+        tuple: (alpha, beta) arrays, one value per event (beta is 0 for 'mean').
+    """
+    min_estimation_bars = min_estimation_bars or max(estimation_bars // 2, 2)
+    hi = anchors - pre_bars
+    lo = hi - estimation_bars
+    contiguous = np.ones(len(anchors), dtype=bool)
+    if opens_ns is not None:
+        # Open times are sorted, so a span of bars is gap-free when its first
+        # bar opens exactly (anchor - lo) intervals before the anchor.
+        first = np.clip(lo, 0, len(opens_ns) - 1)
+        expected = opens_ns[np.maximum(anchors, 0)] - (anchors - lo) * interval_ns
+        contiguous = (anchors >= 0) & (lo >= 0) & (opens_ns[first] == expected)
+    r = np.asarray(returns, dtype=np.float64)
+    if adjustment == 'mean':
+        valid = ~np.isnan(r)
+        cumsum = lambda values: np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+        n = _window_totals(cumsum(np.ones_like(r)), lo, hi)
+        alpha = _window_totals(cumsum(r), lo, hi) / np.maximum(n, 1)
+        return np.where(contiguous & (n >= min_estimation_bars), alpha, np.nan), np.zeros(len(anchors))
+
+    m = np.asarray(benchmark_returns, dtype=np.float64)
+    valid = ~np.isnan(r) & ~np.isnan(m)
+    cumsum = lambda values: np.concatenate([[0.0], np.cumsum(np.where(valid, values, 0.0))])
+    n = _window_totals(cumsum(np.ones_like(r)), lo, hi)
+    sum_r, sum_m = _window_totals(cumsum(r), lo, hi), _window_totals(cumsum(m), lo, hi)
+    sum_mm, sum_rm = _window_totals(cumsum(m * m), lo, hi), _window_totals(cumsum(r * m), lo, hi)
+    safe_n = np.maximum(n, 1)
+    var_m = sum_mm / safe_n - (sum_m / safe_n) ** 2
+    cov_rm = sum_rm / safe_n - (sum_r / safe_n) * (sum_m / safe_n)
+    beta = np.where(var_m > 0, cov_rm / np.where(var_m > 0, var_m, 1.0), 0.0)
+    alpha = sum_r / safe_n - beta * sum_m / safe_n
+    ok = contiguous & (n >= min_estimation_bars)
+    return np.where(ok, alpha, np.nan), np.where(ok, beta, np.nan)
+
+def sentiment_buckets(scores: np.ndarray, bins=DEFAULT_SENTIMENT_BINS) -> tuple:
+    """
+    Buckets sentiment scores by `bins` edges (left-closed, the last bucket also
+    holds the top edge).
+
+    Returns:
+        tuple: (codes, labels); codes are -1 for NaN or out-of-range scores.
+    """
+    bins = np.asarray(bins, dtype=np.float64)
+    codes = np.searchsorted(bins, scores, side='right') - 1
+    codes[scores == bins[-1]] = len(bins) - 2
+    codes[np.isnan(scores) | (codes < 0) | (codes > len(bins) - 2)] = -1
+    labels = [f"[{lo:g}, {hi:g})" for lo, hi in zip(bins[:-1], bins[1:])]
+    labels[-1] = labels[-1][:-1] + ']'
+    return codes, labels
+
+def _entity_events(article_ids: np.ndarray, entities_df: pd.DataFrame, top: int = None, min_events: int = 1) -> tuple:
+    """
+    Expands events into one per distinct (article, entity) mention.
+
+    Returns:
+        tuple: (event rows, entity codes, entity labels), keeping the `top` most
+            mentioned entities with at least `min_events` articles.
+    """
+    rows = pd.Series(np.arange(len(article_ids)), index=article_ids)
+    mentions = entities_df[entities_df['article_id'].isin(article_ids)][['article_id', 'entity']]
+    mentions = mentions.drop_duplicates()
+    counts = mentions['entity'].value_counts()
+    counts = counts[counts >= min_events]
+    if top is not None:
+        counts = counts.iloc[:top]
+    labels = [str(label) for label in counts.index]
+    mentions = mentions[mentions['entity'].isin(counts.index)]
+    codes = pd.Categorical(mentions['entity'].astype(str), categories=labels).codes
+    return rows.loc[mentions['article_id'].to_numpy()].to_numpy(), codes.astype(np.int64), labels
+
+def event_study(
+    news_df: pd.DataFrame,
+    market_df: pd.DataFrame,
+    pre='1h',
+    post='4h',
+    adjustment: str = 'mean',
+    estimation='24h',
+    group_by: str = 'sentiment',
+    sentiment_bins=DEFAULT_SENTIMENT_BINS,
+    entities_df: pd.DataFrame = None,
+    top_entities: int = 20,
+    min_events: int = 10,
+    benchmark_df: pd.DataFrame = None,
+    publication_lag=None,
+    interval=None,
+) -> dict:
+    """
+    Runs an event study of bar returns around every article.
+
+    The event bar is the candle in which the article became available. The
+    window holds the `pre` bars before it, the event bar and the `post` bars
+    after it. The pre-event CAR runs from -pre to the event bar's open, the
+    event bar's abnormal return (which mixes moves before and after the
+    publication inside that bar) is reported on its own, and the post-event
+    CAR starts at the first bar opening after the event, so it is look-ahead
+    safe as in the aligner. Only events whose whole window (and estimation
+    window) is covered by contiguous candles are used; the estimation window
+    also needs valid returns on at least half its bars.
+
+    Args:
+        news_df (pd.DataFrame): NLP features with 'publishedAt', 'sentiment_score'
+            and, for entity grouping, 'article_id'.
+        market_df (pd.DataFrame): Candles indexed by 'Date' (open time) with 'Close'.
+        pre, post: Window lengths before and after the event bar, multiples of the interval.
+        adjustment (str): 'none' (raw returns), 'mean' (minus the mean return
+            over the estimation window) or 'market' (minus the market model on
+            `benchmark_df`).
+        estimation: Estimation window length, ending where the event window starts.
+        group_by (str): 'all', 'sentiment' (buckets of `sentiment_bins`) or
+            'entity' (the `top_entities` entities of `entities_df` mentioned in
+            at least `min_events` articles; an article counts for each).
+        benchmark_df (pd.DataFrame): Benchmark candles for 'market', e.g. BTC for altcoins.
+        publication_lag: Delay added to publishedAt before an article is usable.
+        interval: Candle interval; inferred from the candles if None.
+
+    Returns:
+        dict: DataFrames 'paths' (mean CAR, its standard deviation, t-statistic
+            and event count per group and bar offset, 0 being the event bar),
+            'summary' (pre, event bar, post and total CAR per group) and
+            'events' (per event CARs).
+
+    Raises:
+        ValueError: On an unknown adjustment or grouping, or 'market' without a benchmark.
+    """
+    if adjustment not in ADJUSTMENTS:
+        raise ValueError(f"Unknown adjustment '{adjustment}'; expected one of {ADJUSTMENTS}")
+    if group_by not in GROUP_BY:
+        raise ValueError(f"Unknown grouping '{group_by}'; expected one of {GROUP_BY}")
+    if adjustment == 'market' and benchmark_df is None:
+        raise ValueError("The 'market' adjustment needs benchmark candles.")
+    if group_by == 'entity' and entities_df is None:
+        raise ValueError("Grouping by entity needs an entity table.")
+
+    market_df = market_df.sort_index()
+    opens = pd.DatetimeIndex(pd.to_datetime(market_df.index, utc=True)).as_unit('ns')
+    interval = pd.Timedelta(interval) if interval is not None else infer_interval(opens)
+    pre_bars, post_bars = horizon_bars([pre, post], interval)
+    estimation_bars = horizon_bars([estimation], interval)[0] if adjustment != 'none' else 0
+    lag = pd.Timedelta(publication_lag) if publication_lag is not None else pd.Timedelta(0)
+    opens_ns = opens.asi8
+    returns = bar_returns(market_df['Close'].to_numpy())
+    benchmark_returns = None
+    if adjustment == 'market':
+        benchmark = benchmark_df.sort_index()['Close']
+        benchmark.index = pd.DatetimeIndex(pd.to_datetime(benchmark.index, utc=True)).as_unit('ns')
+        benchmark_close = benchmark[~benchmark.index.duplicated(keep='last')].reindex(opens).to_numpy()
+        benchmark_returns = bar_returns(benchmark_close)
+
+    news = news_df.dropna(subset=['publishedAt'])
+    event_ns = pd.DatetimeIndex(pd.to_datetime(news['publishedAt'], utc=True)).as_unit('ns').asi8 + lag.value
+    anchors = locate_events(opens_ns, event_ns, interval.value)
+    scores = news['sentiment_score'].to_numpy(dtype=np.float64)
+    article_ids = news['article_id'].to_numpy() if 'article_id' in news.columns else np.arange(len(news))
+
+    if group_by == 'all':
+        rows, codes, labels = np.arange(len(news)), np.zeros(len(news), dtype=np.int64), ['all']
+    elif group_by == 'sentiment':
+        codes, labels = sentiment_buckets(scores, sentiment_bins)
+        rows = np.arange(len(news))
+    else:
+        rows, codes, labels = _entity_events(article_ids, entities_df, top=top_entities, min_events=min_events)
+
+    offsets = np.arange(-pre_bars, post_bars + 1)
+    n_groups = len(labels)
+    sums = np.zeros((n_groups, len(offsets)))
+    sq_sums = np.zeros((n_groups, len(offsets)))
+    counts = np.zeros(n_groups)
+    car_pre = np.full(len(rows), np.nan)
+    ar_event = np.full(len(rows), np.nan)
+    car_post = np.full(len(rows), np.nan)
+
+    for start in range(0, len(rows), _EVENT_CHUNK_ROWS):
+        chunk = slice(start, start + _EVENT_CHUNK_ROWS)
+        chunk_anchors = anchors[rows[chunk]]
+        chunk_codes = codes[chunk]
+        ar = window_matrix(returns, opens_ns, chunk_anchors, offsets, interval.value)
+        if adjustment != 'none':
+            alpha, beta = expected_returns(
+                returns, chunk_anchors, pre_bars, estimation_bars, adjustment, benchmark_returns,
+                opens_ns=opens_ns, interval_ns=interval.value,
+            )
+            expected = alpha[:, None]
+            if adjustment == 'market':
+                expected = expected + beta[:, None] * window_matrix(
+                    benchmark_returns, opens_ns, chunk_anchors, offsets, interval.value,
+                )
+            ar = ar - expected
+        complete = ~np.isnan(ar).any(axis=1) & (chunk_codes >= 0)
+        car = np.cumsum(np.where(complete[:, None], ar, 0.0), axis=1)
+
+        car_pre[chunk] = np.where(complete, car[:, pre_bars - 1], np.nan)
+        ar_event[chunk] = np.where(complete, ar[:, pre_bars], np.nan)
+        car_post[chunk] = np.where(complete, car[:, -1] - car[:, pre_bars], np.nan)
+        group = chunk_codes[complete]
+        counts += np.bincount(group, minlength=n_groups)
+        # A loop over offsets (not events): one weighted bincount per column.
+        for j in range(len(offsets)):
+            sums[:, j] += np.bincount(group, weights=car[complete, j], minlength=n_groups)
+            sq_sums[:, j] += np.bincount(group, weights=car[complete, j] ** 2, minlength=n_groups)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        n = counts[:, None]
+        mean = sums / n
+        std = np.sqrt(np.maximum(sq_sums - n * mean ** 2, 0.0) / np.maximum(n - 1, 1))
+        t_stat = np.where((n >= 2) & (std > 0), mean / (std / np.sqrt(n)), np.nan)
+
+    offset_times = pd.to_timedelta(offsets * interval.value)
+    paths = pd.DataFrame({
+        'mean_car': mean.ravel(),
+        'std_car': std.ravel(),
+        't_stat': t_stat.ravel(),
+        'n': np.repeat(counts, len(offsets)).astype(np.int64),
+    }, index=pd.MultiIndex.from_product([labels, offset_times], names=['group', 'offset']))
+
+    events = pd.DataFrame({
+        'article_id': article_ids[rows],
+        'publishedAt': pd.to_datetime(news['publishedAt'], utc=True).to_numpy()[rows],
+        'group': pd.Categorical.from_codes(np.where(codes >= 0, codes, -1), categories=labels),
+        'car_pre': car_pre.astype(np.float32),
+        'ar_event': ar_event.astype(np.float32),
+        'car_post': car_post.astype(np.float32),
+    })
+    grouped = events.dropna(subset=['car_post']).groupby('group', observed=False)
+    car_means = grouped[['car_pre', 'ar_event', 'car_post']].mean().reindex(labels).astype(np.float64)
+    summary = pd.DataFrame({
+        'n': counts.astype(np.int64),
+        'car_pre': car_means['car_pre'].to_numpy(),
+        'ar_event': car_means['ar_event'].to_numpy(),
+        'car_post': car_means['car_post'].to_numpy(),
+        'car_total': mean[:, -1],
+        't_stat_post': (grouped['car_post'].mean() / grouped['car_post'].sem()).reindex(labels).to_numpy(dtype=np.float64),
+        't_stat_total': t_stat[:, -1],
+    }, index=pd.Index(labels, name='group'))
+    logger.info(
+        f"Event study: {int(counts.sum())} of {len(rows)} events with complete windows "
+        f"(pre={pre}, post={post}, adjustment={adjustment}, group_by={group_by})"
+    )
+    return {'paths': paths, 'summary': summary, 'events': events}
+
+@instrumented('event_study')
+def event_study_file(
+    features_path: str,
+    market_path: str,
+    output_dir: str,
+    ext: str = '.csv',
+    entities_path: str = None,
+    benchmark_path: str = None,
+    **kwargs,
+) -> dict:
+    """
+    Runs event_study on an NLP features table and the candles from
+    fetch_market_data, and saves each result as `output_dir/<name><ext>`.
+
+    See event_study for the keyword arguments.
+    """
+    columns = ['article_id', 'publishedAt', 'sentiment_score']
+    news_df = read_table(features_path, columns=columns if entities_path is not None else columns[1:])
+    market_df = read_table(market_path, index_col='Date')
+    entities_df = read_entities(entities_path) if entities_path is not None else None
+    benchmark_df = read_table(benchmark_path, index_col='Date') if benchmark_path is not None else None
+
+    results = event_study(news_df, market_df, entities_df=entities_df, benchmark_df=benchmark_df, **kwargs)
+    observe(rows_in=len(news_df), rows_out=int(results['summary']['n'].sum()))
+    os.makedirs(output_dir, exist_ok=True)
+    for name, table in results.items():
+        table = table.reset_index() if name != 'events' else table
+        if 'offset' in table.columns:
+            table['offset'] = table['offset'].astype(str)
+        write_table(table, os.path.join(output_dir, f"{name}{ext}"))
+    logger.info(f"Saved event study of {features_path} to {output_dir}")
+    return results
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    news_config = config['news']
+    market_config = config['market']
+    study_config = config.get('event_study', {})
+
+    QUERY = news_config['query']
+    SYMBOL = market_config['symbol']
+    INTERVAL = market_config['interval']
+    FROM_DATE = str(news_config['from_date'])
+    TO_DATE = str(news_config['to_date'])
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+
+    script_dir = os.path.dirname(__file__)
+    data_dir = os.path.join(script_dir, '..', 'data')
+    processed_news_dir = os.path.join(data_dir, 'processed_news')
+    DEFAULT_FEATURES = os.path.join(processed_news_dir, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    DEFAULT_ENTITIES = os.path.join(processed_news_dir, f"entities_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT or '.parquet'}")
+    DEFAULT_MARKET = os.path.join(data_dir, 'market_data', f"{SYMBOL}_{INTERVAL}_{FROM_DATE}_{TO_DATE}{EXT}")
+    DEFAULT_OUTPUT = os.path.join(data_dir, 'reports', f"event_study_{SYMBOL}_{FROM_DATE}_{TO_DATE}")
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--features', default=DEFAULT_FEATURES, help="NLP features table.")
+    parser.add_argument('--market', default=DEFAULT_MARKET, help="Candles from fetch_market_data.")
+    parser.add_argument('--benchmark', help="Benchmark candles for --adjustment market.")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT, help="Directory the result tables are saved to.")
+    parser.add_argument('--pre', default=study_config.get('pre', '1h'))
+    parser.add_argument('--post', default=study_config.get('post', '4h'))
+    parser.add_argument('--adjustment', choices=ADJUSTMENTS, default=study_config.get('adjustment', 'mean'))
+    parser.add_argument('--estimation', default=study_config.get('estimation', '24h'))
+    parser.add_argument('--group-by', choices=GROUP_BY, default=study_config.get('group_by', 'sentiment'))
+    parser.add_argument('--top-entities', type=int, default=study_config.get('top_entities', 20))
+    parser.add_argument('--min-events', type=int, default=study_config.get('min_events', 10))
+    args = parser.parse_args()
+
+    if not os.path.exists(args.features) or not os.path.exists(args.market):
+        logger.error("Input files not found. Please run the pipeline first:")
+        logger.error(f"- Features: {args.features}")
+        logger.error(f"- Market data: {args.market}")
+    else:
+        results = event_study_file(
+            args.features, args.market, args.output_dir, ext=EXT,
+            entities_path=DEFAULT_ENTITIES if args.group_by == 'entity' else None,
+            benchmark_path=args.benchmark,
+            pre=args.pre, post=args.post, adjustment=args.adjustment, estimation=args.estimation,
+            group_by=args.group_by,
+            sentiment_bins=study_config.get('sentiment_bins', DEFAULT_SENTIMENT_BINS),
+            top_entities=args.top_entities, min_events=args.min_events,
+            publication_lag=config.get('align', {}).get('publication_lag'),
+            interval=INTERVAL,
+        )
+        print(results['summary'].to_string(float_format='%.5f'))
@@ -0,0 +1,356 @@
+import os
+import logging
+import re
+import yaml
+import pickle
+import numpy as np
+import pandas as pd
+from src.storage import read_table, write_table, EXTENSIONS
+from src.mention_index import ENTITY_PREFIX, load_mentions, mention_column
+from src.instrumentation import instrumented, observe, configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = ('5m', '1h', '4h', '24h')
+# Keeps exp() of the decay exponent well inside float64 range when rebasing.
+_MAX_DECAY_EXPONENT = 500.0
+
+def count_keyword_mentions(texts: pd.Series, keyword: str) -> np.ndarray:
+    """Counts whole-word, case-insensitive occurrences of `keyword` in each text."""
+    pattern = rf'\b{re.escape(keyword.lower())}\b'
+    return texts.fillna('').str.lower().str.count(pattern).to_numpy(dtype=np.float64)
+
+def _window_totals(cumsum: np.ndarray, opens: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Sums rows whose open time is in [starts[i], ends[i]) using a leading-zero cumsum."""
+    lo = np.searchsorted(opens, starts, side='left')
+    hi = np.searchsorted(opens, ends, side='left')
+    return cumsum[hi] - cumsum[lo]
+
+class FeatureBuilder:
+    """
+    Builds rolling, decayed and surprise features on top of the candle grid.
+
+    Features for a candle only use articles available before it closes (see
+    align_frames). The builder keeps the per-candle base values it needs for
+    its longest lookback plus the decayed sums, so update() costs O(new rows).
+    The newest candle is treated as provisional and recomputed when a later
+    update brings the same candle again (e.g. after it was re-fetched).
+
+    Args:
+        interval: Candle interval, e.g. '15m'.
+        windows: Rolling window lengths. Windows that are not a multiple of
+            `interval` are skipped.
+        halflife: Half-life of the exponentially decayed sentiment.
+        zscore_window: Trailing window for surprise z-scores and the velocity baseline.
+        keywords: Words whose mentions are counted per window; with a mention
+            index, also word sequences and 'entity:' terms (see src/mention_index.py).
+        publication_lag: Delay added to publishedAt before an article is usable.
+    """
+
+    def __init__(
+        self,
+        interval,
+        windows=DEFAULT_WINDOWS,
+        halflife='1h',
+        zscore_window='24h',
+        keywords=('hack',),
+        publication_lag=None,
+    ):
+        self.interval = pd.Timedelta(interval)
+        self.windows = {}
+        for label in windows:
+            window = pd.Timedelta(label)
+            if window < self.interval or window % self.interval != pd.Timedelta(0):
+                logger.warning(f"Skipping window {label}: not a multiple of the candle interval {self.interval}.")
+                continue
+            self.windows[label] = window
+        self.halflife = pd.Timedelta(halflife)
+        self.zscore_window = pd.Timedelta(zscore_window)
+        self.keywords = [keyword if keyword.startswith(ENTITY_PREFIX) else keyword.lower() for keyword in keywords]
+        self.lag = pd.Timedelta(publication_lag) if publication_lag is not None else pd.Timedelta(0)
+
+        self._history = None
+        self._decay = None
+        self._provisional = None
+
+    @property
+    def params(self) -> dict:
+        """The configuration this builder's state depends on."""
+        return {
+            'interval': str(self.interval),
+            'windows': sorted(self.windows),
+            'halflife': str(self.halflife),
+            'zscore_window': str(self.zscore_window),
+            'keywords': self.keywords,
+            'publication_lag': str(self.lag),
+        }
+
+    @property
+    def last_open(self):
+        """Open time of the newest candle seen, or None before the first update."""
+        return None if self._provisional is None else self._provisional.index[-1]
+
+    def _candle_positions(self, published, opens_ns: np.ndarray) -> tuple:
+        """
+        Returns (valid, idx): which publication times fall inside a candle once the
+        lag is added, and the position of that candle for the valid ones.
+        """
+        times = pd.DatetimeIndex(pd.to_datetime(published, utc=True)).as_unit('ns').asi8 + self.lag.value
+        # First candle closing strictly after the article; it must also have opened before it.
+        idx = np.searchsorted(opens_ns + self.interval.value, times, side='right')
+        valid = idx < len(opens_ns)
+        valid[valid] = times[valid] >= opens_ns[idx[valid]]
+        return valid, idx[valid]
+
+    def base_features(self, news_df: pd.DataFrame, opens: pd.DatetimeIndex, mentions: dict = None) -> pd.DataFrame:
+        """
+        Per-candle sentiment sum, news count and keyword mentions of the articles
+        inside each candle. Keyword mentions come from `mentions` (keyword ->
+        postings, see load_mentions) if given, else from the cleaned texts.
+        """
+        opens_ns = opens.as_unit('ns').asi8
+        news = news_df.dropna(subset=['publishedAt', 'sentiment_score'])
+        valid, idx = self._candle_positions(news['publishedAt'], opens_ns)
+
+        n = len(opens_ns)
+        base = pd.DataFrame(index=opens)
+        base['sentiment_sum'] = np.bincount(idx, weights=news['sentiment_score'].to_numpy(np.float64)[valid], minlength=n)
+        base['news_count'] = np.bincount(idx, minlength=n).astype(np.float64)
+        if mentions is not None:
+            for keyword in self.keywords:
+                postings = mentions[keyword]
+                term_valid, term_idx = self._candle_positions(postings['publishedAt'], opens_ns)
+                base[mention_column(keyword)] = np.bincount(
+                    term_idx, weights=postings['count'].to_numpy(np.float64)[term_valid], minlength=n,
+                )
+        elif self.keywords:
+            text_cols = [col for col in ('title_cleaned', 'content_cleaned') if col in news.columns]
+            texts = pd.Series('', index=news.index)
+            for col in text_cols:
+                texts = texts + ' ' + news[col].fillna('').astype(str)
+            for keyword in self.keywords:
+                counts = count_keyword_mentions(texts, keyword)[valid]
+                base[mention_column(keyword)] = np.bincount(idx, weights=counts, minlength=n)
+        return base
+
+    def _decayed_sums(self, times: np.ndarray, values: np.ndarray, state: tuple) -> tuple:
+        """
+        Exponentially decayed running sums of `values` (rows x columns) at `times`,
+        starting from `state` = (sums, time). Rebases in blocks to avoid overflow;
+        the carried sums are decayed to each block's start first, so long gaps
+        between updates cannot overflow either.
+        """
+        tau = self.halflife.value / np.log(2)
+        sums, last_time = state
+        out = np.empty_like(values)
+        start = 0
+        while start < len(times):
+            end = np.searchsorted(times, times[start] + _MAX_DECAY_EXPONENT * tau, side='left')
+            end = max(end, start + 1)
+            sums = sums * np.exp(-(times[start] - last_time) / tau)
+            rel = (times[start:end] - times[start]) / tau
+            growth = np.exp(rel)[:, None]
+            block = np.exp(-rel)[:, None] * (sums + np.cumsum(values[start:end] * growth, axis=0))
+            out[start:end] = block
+            sums, last_time = block[-1], times[end - 1]
+            start = end
+        return out
+
+    def update(self, news_df: pd.DataFrame, candles_df: pd.DataFrame, mentions: dict = None) -> pd.DataFrame:
+        """
+        Computes features for candles newer than the last committed one.
+
+        Args:
+            news_df (pd.DataFrame): Articles with 'publishedAt', 'sentiment_score' and
+                optionally 'title_cleaned'/'content_cleaned'. Only articles falling in the
+                new candles are used, so passing just recent articles is enough.
+            candles_df (pd.DataFrame): Candles indexed by 'Date' (open time).
+            mentions (dict): Optional keyword -> postings from the mention index,
+                counted instead of scanning the texts (see base_features).
+
+        Returns:
+            pd.DataFrame: Feature columns indexed by 'Date' for the new candles. The
+            previously provisional candle is included again if it was not replaced.
+        """
+        opens = pd.DatetimeIndex(pd.to_datetime(candles_df.index, utc=True)).sort_values()
+        committed_end = None if self._history is None or self._history.empty else self._history.index[-1]
+        if committed_end is not None:
+            opens = opens[opens > committed_end]
+        if len(opens) == 0:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='Date', tz='UTC'))
+
+        batch = self.base_features(news_df, opens, mentions=mentions)
+        if self._provisional is not None and self._provisional.index[-1] < opens[0]:
+            batch = pd.concat([self._provisional, batch])
+        history = self._history if self._history is not None else batch.iloc[:0]
+        work = pd.concat([history, batch])
+        n_hist = len(history)
+
+        opens_ns = work.index.as_unit('ns').asi8
+        batch_opens = opens_ns[n_hist:]
+        batch_closes = batch_opens + self.interval.value
+        cumsums = {
+            col: np.concatenate([[0.0], np.cumsum(work[col].to_numpy())]) for col in work.columns
+        }
+        features = pd.DataFrame(index=batch.index)
+        features.index.name = 'Date'
+
+        zscore_count = _window_totals(cumsums['news_count'], opens_ns, batch_closes - self.zscore_window.value, batch_closes)
+        baseline_rate = zscore_count / (self.zscore_window / self.interval)
+        for label, window in self.windows.items():
+            starts = batch_closes - window.value
+            count = _window_totals(cumsums['news_count'], opens_ns, starts, batch_closes)
+            total = _window_totals(cumsums['sentiment_sum'], opens_ns, starts, batch_closes)
+            features[f'sentiment_mean_{label}'] = np.where(count > 0, total / np.maximum(count, 1), 0.0)
+            features[f'news_count_{label}'] = count
+            rate = count / (window / self.interval)
+            features[f'news_velocity_{label}'] = np.where(baseline_rate > 0, rate / np.where(baseline_rate > 0, baseline_rate, 1), 0.0)
+            for keyword in self.keywords:
+                col = mention_column(keyword)
+                features[f'{col}_{label}'] = _window_totals(cumsums[col], opens_ns, starts, batch_closes)
+
+        # Decayed sums are evaluated at each candle's close.
+        state = self._decay if self._decay is not None else (np.zeros(2), batch_closes[0])
+        decayed = self._decayed_sums(
+            batch_closes.astype(np.float64),
+            batch[['sentiment_sum', 'news_count']].to_numpy(),
+            state,
+        )
+        features['sentiment_decayed'] = np.where(decayed[:, 1] > 1e-12, decayed[:, 0] / np.maximum(decayed[:, 1], 1e-12), 0.0)
+
+        # Surprise z-scores compare each candle to the candles before it in the trailing window.
+        candle_sentiment = np.where(work['news_count'] > 0, work['sentiment_sum'] / np.maximum(work['news_count'], 1), 0.0)
+        for name, values in (('news_count', work['news_count'].to_numpy()), ('sentiment', candle_sentiment)):
+            cs = np.concatenate([[0.0], np.cumsum(values)])
+            cs2 = np.concatenate([[0.0], np.cumsum(values ** 2)])
+            starts = batch_opens - self.zscore_window.value
+            n = _window_totals(np.arange(len(values) + 1, dtype=np.float64), opens_ns, starts, batch_opens)
+            s = _window_totals(cs, opens_ns, starts, batch_opens)
+            s2 = _window_totals(cs2, opens_ns, starts, batch_opens)
+            mean = s / np.maximum(n, 1)
+            var = np.maximum(s2 - n * mean ** 2, 0.0) / np.maximum(n - 1, 1)
+            std = np.sqrt(var)
+            current = values[n_hist:]
+            features[f'{name}_surprise_z'] = np.where((n >= 2) & (std > 0), (current - mean) / np.where(std > 0, std, 1), 0.0)
+
+        # Commit everything but the newest candle, which stays provisional.
+        committed = work.iloc[:-1]
+        lookback = max([self.zscore_window] + list(self.windows.values()))
+        if not committed.empty:
+            self._history = committed[committed.index > committed.index[-1] - lookback]
+        if len(batch) > 1:
+            self._decay = (decayed[-2], batch_closes[-2].astype(np.float64))
+        self._provisional = batch.iloc[-1:]
+        return features
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path: str) -> 'FeatureBuilder':
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+@instrumented('feature_table')
+def build_feature_table(
+    aligned_path: str,
+    news_features_path: str,
+    output_path: str,
+    interval,
+    windows=DEFAULT_WINDOWS,
+    halflife='1h',
+    zscore_window='24h',
+    keywords=('hack',),
+    publication_lag=None,
+    state_path: str = None,
+    index_dir: str = None,
+):
+    """
+    Adds rolling, decayed, velocity, surprise and keyword features to the aligned table.
+
+    If `state_path` holds a builder saved with the same parameters and the
+    output exists, only candles after the last processed one are computed
+    and merged into the existing output. The builder state is saved back to
+    `state_path` afterwards.
+
+    With an `index_dir`, keyword mentions of the articles in the features table
+    are read from the mention index instead of scanning their texts.
+    """
+    builder = FeatureBuilder(
+        interval, windows=windows, halflife=halflife, zscore_window=zscore_window,
+        keywords=keywords, publication_lag=publication_lag,
+    )
+    incremental = False
+    if state_path is not None and os.path.exists(state_path) and os.path.exists(output_path):
+        saved = FeatureBuilder.load(state_path)
+        if saved.params == builder.params:
+            builder, incremental = saved, True
+
+    aligned_df = read_table(aligned_path, index_col='Date')
+    use_index = index_dir is not None and len(builder.keywords) > 0
+    news_df = read_table(
+        news_features_path, columns=['article_id', 'publishedAt', 'sentiment_score'] if use_index else None,
+    )
+    if incremental:
+        aligned_df = aligned_df[aligned_df.index >= builder.last_open]
+        start = aligned_df.index.min() - builder.interval - builder.lag
+        news_df = news_df[news_df['publishedAt'] >= start]
+
+    mentions = load_mentions(index_dir, builder.keywords, news_df['article_id']) if use_index else None
+    features = builder.update(news_df, aligned_df, mentions=mentions)
+    table = aligned_df.join(features, how='inner')
+    if incremental:
+        existing = read_table(output_path, index_col='Date')
+        table = pd.concat([existing[existing.index < table.index.min()], table])
+
+    observe(rows_in=len(aligned_df), rows_out=len(table))
+    write_table(table, output_path)
+    if state_path is not None:
+        builder.save(state_path)
+    logger.info(f"Successfully built {len(features.columns)} features for {len(features)} candles and saved to {output_path}")
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    news_config = config['news']
+    market_config = config['market']
+    feature_config = config.get('features', {})
+
+    QUERY = news_config['query']
+    FROM_DATE = str(news_config['from_date'])
+    TO_DATE = str(news_config['to_date'])
+    SYMBOL = market_config['symbol']
+    INTERVAL = market_config['interval']
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+
+    script_dir = os.path.dirname(__file__)
+    data_dir = os.path.join(script_dir, '..', 'data')
+    processed_news_dir = os.path.join(data_dir, 'processed_news')
+    final_features_dir = os.path.join(data_dir, 'final_features')
+
+    NEWS_FEATURES_PATH = os.path.join(processed_news_dir, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    ALIGNED_PATH = os.path.join(final_features_dir, f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}{EXT}")
+    OUTPUT_PATH = os.path.join(final_features_dir, f"feature_table_{SYMBOL}_{FROM_DATE}_{TO_DATE}{EXT}")
+
+    if not os.path.exists(ALIGNED_PATH) or not os.path.exists(NEWS_FEATURES_PATH):
+        logger.error("Input files not found. Please run previous scripts first:")
+        logger.error(f"- Features: {NEWS_FEATURES_PATH}")
+        logger.error(f"- Aligned: {ALIGNED_PATH}")
+    else:
+        build_feature_table(
+            ALIGNED_PATH, NEWS_FEATURES_PATH, OUTPUT_PATH, INTERVAL,
+            windows=feature_config.get('windows', DEFAULT_WINDOWS),
+            halflife=feature_config.get('halflife', '1h'),
+            zscore_window=feature_config.get('zscore_window', '24h'),
+            keywords=feature_config.get('keywords', ['hack']),
+            publication_lag=config.get('align', {}).get('publication_lag'),
+        )
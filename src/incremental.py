@@ -0,0 +1,363 @@
+import os
+import logging
+import json
+import threading
+import pandas as pd
+from src.news_fetcher import fetch_articles
+from src.raw_news import article_key, iter_raw_articles, iter_article_chunks, write_raw_articles
+from src.candle_store import CandleStore
+from src.market_data_fetcher import fetch_market_frame, date_to_msec
+from src.text_cleaner import clean_articles
+from src.deduplicator import deduplicate_articles, load_index
+from src.nlp_processor import add_nlp_features, compact_features
+from src.entities import read_entities
+from src.aligner import align_frames, infer_interval
+from src.mention_index import MentionIndex, load_mentions
+from src.universe import split_by_asset
+from src.storage import read_table, write_table
+from src.instrumentation import instrumented, observe
+
+logger = logging.getLogger(__name__)
+
+# Re-fetch this much history before the news watermark, so articles indexed
+# late by the provider are still picked up. Duplicates are dropped by URL.
+NEWS_LOOKBACK = pd.Timedelta(hours=6)
+
+class WatermarkStore:
+    """
+    Per-stage high-water marks persisted as a small JSON file.
+
+    News stages store row offsets into their (append-only) input file, the
+    market stage stores the open time of the newest stored candle. Marks can
+    be set from concurrently running stages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._marks = {}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self._marks = json.load(f)
+
+    def get(self, stage: str, default=None):
+        return self._marks.get(stage, default)
+
+    def set(self, stage: str, value):
+        with self._lock:
+            self._marks[stage] = value
+            self._save()
+
+    def reset(self, stages=None):
+        """
+        Forgets the marks of `stages` (all marks if None), so the next
+        incremental run rebuilds those stages.
+        """
+        with self._lock:
+            for stage in list(self._marks) if stages is None else stages:
+                self._marks.pop(stage, None)
+            if self._marks:
+                self._save()
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._marks, f, indent=4)
+        os.replace(tmp_path, self.path)
+
+def merge_raw_articles(existing: list, fetched: list) -> list:
+    """Appends fetched articles not already present (by URL) to the existing ones."""
+    seen = {article_key(article) for article in existing}
+    merged = list(existing)
+    for article in fetched:
+        key = article_key(article)
+        if key not in seen:
+            seen.add(key)
+            merged.append(article)
+    return merged
+
+@instrumented('fetch_news')
+def update_raw_news(
+    api_key: str,
+    query: str,
+    from_date: str,
+    to_date: str,
+    raw_path: str,
+    watermarks: WatermarkStore,
+    source: str = 'newsapi',
+    sources: list = None,
+) -> int:
+    """Fetches articles published since the news watermark and appends the new ones."""
+    mark = watermarks.get('fetch_news')
+    since = pd.Timestamp(from_date, tz='UTC')
+    seen = set()
+    total = 0
+    if mark is not None:
+        since = max(since, pd.Timestamp(mark) - NEWS_LOOKBACK)
+        for article in iter_raw_articles(raw_path):
+            seen.add(article_key(article))
+            total += 1
+
+    fetched = fetch_articles(
+        api_key, query, since.strftime('%Y-%m-%dT%H:%M:%S'), to_date, source=source, sources=sources,
+    )
+    new_articles = []
+    for article in fetched:
+        key = article_key(article)
+        if key not in seen:
+            seen.add(key)
+            new_articles.append(article)
+
+    # JSON Lines files only get the new articles appended.
+    write_raw_articles(new_articles, raw_path, append=mark is not None)
+
+    published = pd.to_datetime([a.get('publishedAt') for a in new_articles], utc=True, errors='coerce')
+    if published.notna().any():
+        newest = published.max() if mark is None else max(published.max(), pd.Timestamp(mark))
+        watermarks.set('fetch_news', newest.isoformat())
+    observe(rows_in=len(fetched), rows_out=len(new_articles))
+    logger.info(f"Incremental fetch: {len(new_articles)} new articles ({total + len(new_articles)} total)")
+    return len(new_articles)
+
+@instrumented('clean')
+def update_cleaned(
+    raw_path: str,
+    cleaned_path: str,
+    watermarks: WatermarkStore,
+    n_process: int = 1,
+    chunk_size: int = 50000,
+) -> int:
+    """
+    Cleans raw articles past the 'clean' offset and appends them to the cleaned table.
+
+    Raises:
+        ValueError: If a chunk has no content column; the chunks before it stay committed.
+    """
+    offset = watermarks.get('clean', 0)
+    added = 0
+    for articles in iter_article_chunks(raw_path, chunk_size, skip=offset):
+        cleaned_df = clean_articles(pd.json_normalize(articles), n_process=n_process)
+        if cleaned_df is None:
+            # Stopping here would leave the mark on this chunk and stall every later run.
+            raise ValueError(f"Raw articles {offset + added}+ of {raw_path} have no content column.")
+        write_table(cleaned_df, cleaned_path, append=offset + added > 0)
+        observe(rows_in=len(articles), rows_out=len(cleaned_df))
+        added += len(articles)
+        watermarks.set('clean', offset + added)
+    if added:
+        logger.info(f"Incremental clean: {added} new articles")
+    return added
+
+@instrumented('dedup')
+def update_deduped(
+    cleaned_path: str,
+    deduped_path: str,
+    duplicates_path: str,
+    watermarks: WatermarkStore,
+    state_path: str,
+    **dedup_params,
+) -> int:
+    """
+    Matches cleaned articles past the 'dedup' offset against the persisted
+    MinHash index and appends the canonical ones to the deduplicated table.
+    """
+    offset = watermarks.get('dedup', 0)
+    new_df = read_table(cleaned_path, skip=offset)
+    if new_df.empty:
+        return 0
+
+    index = load_index(state_path if offset > 0 else None, **dedup_params)
+    canonical_df, duplicates_df = deduplicate_articles(new_df, index)
+    observe(rows_in=len(new_df), rows_out=len(canonical_df))
+    write_table(canonical_df, deduped_path, append=offset > 0)
+    if not duplicates_df.empty or offset == 0:
+        write_table(duplicates_df, duplicates_path, append=offset > 0 and os.path.exists(duplicates_path))
+    index.save(state_path)
+    watermarks.set('dedup', offset + len(new_df))
+    logger.info(f"Incremental dedup: {len(canonical_df)} new articles, {len(duplicates_df)} near-duplicates")
+    return len(canonical_df)
+
+@instrumented('nlp')
+def update_features(
+    cleaned_path: str,
+    features_path: str,
+    watermarks: WatermarkStore,
+    nlp_model,
+    batch_size: int = 256,
+    n_process: int = 1,
+    cache=None,
+    sentiment_backend=None,
+    entities_path: str = None,
+    keep_text: bool = False,
+    client=None,
+    entity_matcher=None,
+) -> int:
+    """
+    Scores cleaned articles past the 'nlp' offset and appends them to the features
+    table (and their entities to the entity table, see process_nlp_features).
+    With an NLP daemon `client`, the daemon scores them and `nlp_model` may be None;
+    with an `entity_matcher` and no `nlp_model`, entities only come from the matcher.
+    """
+    offset = watermarks.get('nlp', 0)
+    new_df = read_table(cleaned_path, skip=offset)
+    if new_df.empty:
+        return 0
+
+    features_df = add_nlp_features(
+        new_df, nlp_model, batch_size=batch_size, n_process=n_process, cache=cache,
+        sentiment_backend=sentiment_backend, client=client, entity_matcher=entity_matcher,
+    )
+    if entities_path is not None:
+        # Article ids continue from the rows already in the features table.
+        features_df, entities_df = compact_features(features_df, first_article_id=offset, keep_text=keep_text)
+        write_table(entities_df, entities_path, append=offset > 0)
+    write_table(features_df, features_path, append=offset > 0)
+    observe(rows_in=len(new_df), rows_out=len(features_df))
+    watermarks.set('nlp', offset + len(new_df))
+    logger.info(f"Incremental NLP: {len(new_df)} new articles")
+    return len(new_df)
+
+@instrumented('index')
+def update_index(features_path: str, index_dir: str, watermarks: WatermarkStore, entities_path: str = None) -> int:
+    """Adds features past the 'index' offset (and their entities) to the mention index as a new part."""
+    offset = watermarks.get('index', 0)
+    new_df = read_table(features_path, skip=offset)
+    if new_df.empty:
+        return 0
+
+    index = MentionIndex(index_dir)
+    if offset == 0:
+        index.clear()
+    entities_df = None
+    if entities_path is not None:
+        entities_df = read_entities(entities_path, filters=[('article_id', '>=', offset)])
+        entities_df = entities_df[entities_df['article_id'] >= offset]
+    postings = index.add(new_df, entities_df)
+    observe(rows_in=len(new_df), rows_out=postings)
+    watermarks.set('index', offset + len(new_df))
+    logger.info(f"Incremental index: {len(new_df)} new articles, {postings} postings")
+    return len(new_df)
+
+@instrumented('route')
+def update_routed(
+    features_path: str, output_paths: dict, watermarks: WatermarkStore, router, entities_path: str = None,
+) -> int:
+    """Routes features past the 'route' offset to the assets they mention and appends them to their tables."""
+    offset = watermarks.get('route', 0)
+    new_df = read_table(features_path, skip=offset)
+    if new_df.empty:
+        return 0
+
+    entities_df = None
+    if entities_path is not None:
+        entities_df = read_entities(entities_path, filters=[('article_id', '>=', offset)])
+        entities_df = entities_df[entities_df['article_id'] >= offset]
+    observe(rows_in=len(new_df))
+    for name, asset_df in split_by_asset(new_df, router, entities_df=entities_df).items():
+        observe(rows_out=len(asset_df))
+        if offset == 0 or not asset_df.empty:
+            write_table(asset_df, output_paths[name], append=offset > 0)
+    watermarks.set('route', offset + len(new_df))
+    logger.info(f"Incremental routing: {len(new_df)} new articles")
+    return len(new_df)
+
+@instrumented('fetch_market_data')
+def update_market_data(
+    symbol: str,
+    interval: str,
+    from_date: str,
+    to_date: str,
+    market_path: str,
+    watermarks: WatermarkStore,
+    store: CandleStore = None,
+    max_workers: int = 4,
+    chunk_candles: int = 1000,
+) -> int:
+    """
+    Fetches candles from the newest stored candle onwards and merges them into
+    the market table. The newest candle is re-fetched since it may have been partial.
+    Only the new candles are fetched, but the market table is read and rewritten
+    whole (one row per candle, so small next to the news tables).
+    """
+    mark = watermarks.get('market')
+    since = date_to_msec(from_date) if mark is None else pd.Timestamp(mark).value // 10**6
+    new_df = fetch_market_frame(
+        symbol, interval, since, date_to_msec(to_date),
+        store=store, max_workers=max_workers, chunk_candles=chunk_candles,
+    )
+    if new_df is None:
+        return 0
+
+    if mark is not None and os.path.exists(market_path):
+        merged = pd.concat([read_table(market_path, index_col='Date'), new_df])
+        new_df = merged[~merged.index.duplicated(keep='last')].sort_index()
+    observe(rows_out=len(new_df))
+    write_table(new_df, market_path, symbol=symbol.replace('/', ''))
+    watermarks.set('market', new_df.index.max().isoformat())
+    logger.info(f"Incremental market data: {len(new_df)} candles stored")
+    return len(new_df)
+
+@instrumented('align')
+def update_aligned(
+    features_path: str,
+    market_path: str,
+    final_path: str,
+    watermarks: WatermarkStore,
+    interval=None,
+    window=None,
+    publication_lag=None,
+    index_dir: str = None,
+    mention_terms=(),
+):
+    """
+    Re-aligns only the candles whose news window can contain a new article,
+    plus any new or re-fetched candles, and merges them into the existing
+    final table. See align_features_with_market_data for the parameters.
+    The alignment itself only covers the tail, but the time and score columns
+    of the features and the market and final tables are read (and the final
+    table rewritten) whole.
+    """
+    news_offset = watermarks.get('align_news')
+    market_mark = watermarks.get('align_market')
+    use_index = index_dir is not None and len(mention_terms) > 0
+    columns = ['article_id', 'publishedAt', 'sentiment_score'] if use_index else ['publishedAt', 'sentiment_score']
+    news_df = read_table(features_path, columns=columns)
+    market_df = read_table(market_path).sort_values('Date', ignore_index=True)
+    mentions = load_mentions(index_dir, mention_terms, news_df['article_id']) if use_index else None
+
+    interval = pd.Timedelta(interval) if interval is not None else infer_interval(market_df['Date'])
+    window = pd.Timedelta(window) if window is not None else interval
+    lag = pd.Timedelta(publication_lag) if publication_lag is not None else pd.Timedelta(0)
+    params = [str(interval), str(window), str(lag), *(mention_terms if use_index else ())]
+
+    if (news_offset is None or market_mark is None or not os.path.exists(final_path)
+            or watermarks.get('align_params') != params):
+        final_df = align_frames(
+            news_df, market_df, interval=interval, window=window, publication_lag=lag, mentions=mentions,
+        )
+    else:
+        # Candles are recomputed from the last aligned candle (it may have been
+        # re-fetched) or from the first candle closing after a new article.
+        recompute = market_df['Date'] >= pd.Timestamp(market_mark)
+        new_published = news_df['publishedAt'].iloc[news_offset:]
+        if not new_published.empty:
+            recompute |= market_df['Date'] + interval > new_published.min() + lag
+        tail_market = market_df[recompute]
+        first_open = tail_market['Date'].min()
+        tail_news = news_df[news_df['publishedAt'] + lag >= first_open + interval - window]
+
+        tail_df = align_frames(
+            tail_news, tail_market, interval=interval, window=window, publication_lag=lag, mentions=mentions,
+        )
+        head_df = read_table(final_path, index_col='Date')
+        final_df = pd.concat([head_df[head_df.index < first_open], tail_df])
+
+    observe(rows_in=len(news_df), rows_out=len(final_df))
+    write_table(final_df, final_path)
+    watermarks.set('align_news', len(news_df))
+    watermarks.set('align_market', final_df.index.max().isoformat())
+    watermarks.set('align_params', params)
+    logger.info(f"Incremental align: final table has {len(final_df)} rows")
@@ -0,0 +1,269 @@
+import os
+import io
+import re
+import sys
+import json
+import time
+import pstats
+import logging
+import threading
+import itertools
+import functools
+import contextvars
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+PROFILERS = ('cprofile', 'pyinstrument')
+_current = contextvars.ContextVar('current_stage', default=None)
+_labels = contextvars.ContextVar('stage_labels', default={})
+
+def configure_logging(level='INFO'):
+    """Routes the pipeline's log records to stderr; `level` picks the verbosity (e.g. 'DEBUG')."""
+    logging.basicConfig(format='%(message)s', level=getattr(logging, str(level).upper(), level), force=True)
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB, or None where the resource module is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class StageMetrics:
+    """
+    Measurements of one call of an instrumented stage.
+
+    Stages report their own counts with observe(); wall time and peak RSS are
+    filled in by the registry when the stage ends.
+    """
+
+    def __init__(self, stage: str, labels: dict = None):
+        self.stage = stage
+        self.labels = dict(labels or {})
+        self.started_at = time.time()
+        self.wall_secs = None
+        self.rows_in = None
+        self.rows_out = None
+        self.cache_hits = None
+        self.cache_misses = None
+        self.peak_rss_mb = None
+        self.status = 'running'
+        self.extra = {}
+
+    @property
+    def rows_per_sec(self) -> float:
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        if rows is None or not self.wall_secs:
+            return None
+        return rows / self.wall_secs
+
+    @property
+    def cache_hit_rate(self) -> float:
+        if self.cache_hits is None:
+            return None
+        lookups = self.cache_hits + (self.cache_misses or 0)
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            'stage': self.stage,
+            'labels': self.labels,
+            'status': self.status,
+            'started_at': self.started_at,
+            'wall_secs': self.wall_secs,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'rows_per_sec': self.rows_per_sec,
+            'peak_rss_mb': self.peak_rss_mb,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_hit_rate': self.cache_hit_rate,
+            **self.extra,
+        }
+
+class MetricsRegistry:
+    """
+    Collects StageMetrics of instrumented stages and writes them as JSON or
+    in the Prometheus text exposition format.
+
+    Args:
+        profile (str): None, 'cprofile' or 'pyinstrument' (a sampling profiler,
+            which must be installed) to profile every instrumented stage.
+        profile_dir (str): Where profiles are saved, one file per stage call.
+    """
+
+    def __init__(self, profile: str = None, profile_dir: str = None):
+        self._lock = threading.Lock()
+        self._profile_ids = itertools.count()
+        self.records = []
+        self.configure(profile=profile, profile_dir=profile_dir)
+
+    def configure(self, profile: str = None, profile_dir: str = None):
+        """
+        Raises:
+            ValueError: If the profiler is unknown.
+        """
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profile}. Choose from {PROFILERS}.")
+        self.profile = profile
+        self.profile_dir = profile_dir
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+
+    @contextmanager
+    def track(self, stage: str):
+        """Measures the enclosed block as one call of `stage`; observe() inside it updates the record."""
+        metrics = StageMetrics(stage, _labels.get())
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            with self._profiled(stage, metrics.labels):
+                yield metrics
+            metrics.status = 'ok'
+        except BaseException:
+            metrics.status = 'failed'
+            raise
+        finally:
+            metrics.wall_secs = time.perf_counter() - start
+            metrics.peak_rss_mb = peak_rss_mb()
+            _current.reset(token)
+            with self._lock:
+                self.records.append(metrics)
+            logger.debug("Stage metrics: %s", metrics.as_dict())
+
+    @contextmanager
+    def _profiled(self, stage: str, labels: dict = None):
+        if self.profile is None:
+            yield
+            return
+        profile_dir = self.profile_dir or '.'
+        os.makedirs(profile_dir, exist_ok=True)
+        # Labelled calls of one stage (e.g. align per asset) run concurrently in
+        # the DAG's thread pool; the labels and a sequence number keep their
+        # profiles apart within the same second.
+        name = '_'.join([stage] + [re.sub(r'[^\w.-]+', '-', str(value)) for value in (labels or {}).values()])
+        stamp = f"{time.strftime('%Y%m%dT%H%M%S')}_{next(self._profile_ids)}"
+        if self.profile == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = os.path.join(profile_dir, f"{name}_{stamp}.prof")
+                profiler.dump_stats(path)
+                if logger.isEnabledFor(logging.DEBUG):
+                    report = io.StringIO()
+                    pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(15)
+                    logger.debug(report.getvalue())
+                logger.info("Saved %s profile to %s", stage, path)
+            return
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError as e:
+            raise ImportError("The 'pyinstrument' profiler requires the 'pyinstrument' package.") from e
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path = os.path.join(profile_dir, f"{name}_{stamp}.html")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(profiler.output_html())
+            logger.info("Saved %s profile to %s", stage, path)
+
+    def as_dicts(self) -> list:
+        with self._lock:
+            return [metrics.as_dict() for metrics in self.records]
+
+    def write_json(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.as_dicts(), f, indent=4)
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the latest record of each stage as Prometheus gauges labelled by
+        stage and by the stage_labels() it ran under, so e.g. the align stage of
+        every asset keeps its own series.
+        """
+        latest = {}
+        for record in self.as_dicts():
+            labels = {'stage': record['stage'], **record['labels']}
+            latest[tuple(sorted(labels.items()))] = record
+        gauges = [
+            ('wall_seconds', 'wall_secs', 'Wall time of the last run of the stage.'),
+            ('rows_in', 'rows_in', 'Rows read by the last run of the stage.'),
+            ('rows_out', 'rows_out', 'Rows written by the last run of the stage.'),
+            ('rows_per_second', 'rows_per_sec', 'Throughput of the last run of the stage.'),
+            ('peak_rss_megabytes', 'peak_rss_mb', 'Peak resident memory of the process after the stage.'),
+            ('cache_hit_ratio', 'cache_hit_rate', 'Cache hit rate of the last run of the stage.'),
+        ]
+        lines = []
+        for name, key, help_text in gauges:
+            samples = [(labels, record[key]) for labels, record in latest.items() if record[key] is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP news2alpha_stage_{name} {help_text}")
+            lines.append(f"# TYPE news2alpha_stage_{name} gauge")
+            lines.extend(f'news2alpha_stage_{name}{{{_format_labels(labels)}}} {float(value)}' for labels, value in samples)
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path: str):
+        """Writes to_prometheus() atomically, e.g. for node_exporter's textfile collector."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+def _format_labels(labels) -> str:
+    escape = lambda value: str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    # 'stage' first, then the others by name.
+    labels = sorted(labels, key=lambda item: (item[0] != 'stage', item[0]))
+    return ','.join(f'{name}="{escape(value)}"' for name, value in labels)
+
+# The registry instrumented stages report to.
+METRICS = MetricsRegistry()
+
+@contextmanager
+def stage_labels(**labels):
+    """Adds labels (e.g. asset='ETH') to every stage call measured inside the block."""
+    token = _labels.set({**_labels.get(), **labels})
+    try:
+        yield
+    finally:
+        _labels.reset(token)
+
+def instrumented(stage: str):
+    """Decorates a stage function so every call is measured by METRICS.track(stage)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.track(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def observe(rows_in: int = None, rows_out: int = None, cache_hits: int = None, cache_misses: int = None,
+            **extra):
+    """
+    Reports counts of the running instrumented stage; a no-op outside of one.
+    Counts add up over repeated calls (e.g. once per chunk).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return
+    for name, value in (('rows_in', rows_in), ('rows_out', rows_out),
+                        ('cache_hits', cache_hits), ('cache_misses', cache_misses)):
+        if value is not None:
+            setattr(metrics, name, (getattr(metrics, name) or 0) + int(value))
+    metrics.extra.update(extra)
@@ -1,21 +1,21 @@
 import os
+import logging
+import time
+import threading
 import yaml
 import pandas as pd
-import ccxt
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
+from src.candle_store import CandleStore, OHLCV_COLUMNS, find_duplicates, find_gaps
+from src.storage import write_table, EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
 
-def fetch_market_data(symbol: str, interval: str, start_str: str, end_str: str, output_path: str):
-    """
-    Fetches historical market data from Binance using CCXT and saves it in a format
-    compatible with the rest of the pipeline.
+logger = logging.getLogger(__name__)
 
-    Args:
-        symbol (str): The trading pair symbol in CCXT format (e.g., 'BTC/USDT').
-        interval (str): The K-line interval (e.g., '1m', '1d').
-        start_str (str): The start date (YYYY-MM-DD).
-        end_str (str): The end date (YYYY-MM-DD).
-        output_path (str): The path to save the market data CSV file.
-    """
+def _create_exchange():
+    """Creates a ccxt Binance client, honouring HTTP(S)_PROXY from the environment."""
+    # ccxt takes about half a second to import; only fetching needs it.
+    import ccxt
     exchange_params = {}
     proxies = {}
 
@@ -26,42 +26,224 @@ def fetch_market_data(symbol: str, interval: str, start_str: str, end_str: str,
 
     if proxies:
         exchange_params['proxies'] = proxies
-        print(f"Using proxies: {proxies}")
-
-    exchange = ccxt.binance(exchange_params)
-    print(f"Fetching {symbol} data for interval {interval} from Binance using CCXT...")
-
-    # Convert dates to milliseconds
-    since = int(datetime.strptime(start_str, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
-    end_msec = int(datetime.strptime(end_str, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
-
-    all_klines = []
-    while since < end_msec:
-        try:
-            klines = exchange.fetch_ohlcv(symbol, timeframe=interval, since=since)
-            if not klines:
-                break # No more data
-            all_klines.extend(klines)
-            since = klines[-1][0] + exchange.parse_timeframe(interval) * 1000 # Move to the next timeframe
-        except Exception as e:
-            print(f"An error occurred while fetching data: {e}")
-            break
-
-    if not all_klines:
-        print("No data found for the specified parameters.")
-        return
+        logger.debug(f"Using proxies: {proxies}")
+
+    return ccxt.binance(exchange_params)
+
+def date_to_msec(date_str: str) -> int:
+    """Converts a YYYY-MM-DD date to a UTC timestamp in milliseconds."""
+    return int(datetime.strptime(date_str, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+class _Throttle:
+    """Spaces request starts at least `interval_ms` apart across threads."""
 
-    # Process into a pandas DataFrame
-    data = pd.DataFrame(all_klines, columns=['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
+    def __init__(self, interval_ms: float):
+        self.interval = interval_ms / 1000
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+def plan_chunks(ranges: list, step_msec: int, chunk_candles: int) -> list:
+    """Splits (start_msec, end_msec) ranges into chunks of at most `chunk_candles` candles."""
+    span = step_msec * chunk_candles
+    return [(start, min(start + span, end)) for range_start, end in ranges for start in range(range_start, end, span)]
+
+def _klines_to_frame(klines: list) -> pd.DataFrame:
+    """Converts ccxt OHLCV rows to a frame indexed by a UTC 'Date'."""
+    data = pd.DataFrame(klines, columns=['timestamp', 'Open', 'High', 'Low', 'Close', 'Volume'])
     data['Date'] = pd.to_datetime(data['timestamp'], unit='ms').dt.tz_localize('UTC') # Localize to UTC
     data.set_index('Date', inplace=True)
 
     # Select and reorder columns for pipeline compatibility
-    output_df = data[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+    return data[OHLCV_COLUMNS].copy()
+
+def _fetch_chunk(exchange, throttle: _Throttle, symbol: str, interval: str, start: int, end: int,
+                 step_msec: int, retries: int, backoff: float) -> list:
+    """Walks fetch_ohlcv pages over [start, end), retrying network errors with exponential backoff."""
+    import ccxt
+    klines = []
+    since = start
+    while since < end:
+        for attempt in range(retries + 1):
+            throttle.wait()
+            try:
+                page = exchange.fetch_ohlcv(symbol, timeframe=interval, since=since)
+                break
+            except ccxt.NetworkError as e:
+                if attempt == retries:
+                    raise
+                logger.warning(f"Retrying {symbol} candles from {since} after error: {e}")
+                time.sleep(backoff * 2 ** attempt)
+        page = [kline for kline in page if kline[0] < end]
+        if not page or page[-1][0] < since:
+            break # No more data in this chunk
+        klines.extend(page)
+        since = page[-1][0] + step_msec # Move to the next timeframe
+    return klines
+
+def backfill_ohlcv(
+    exchange,
+    symbol: str,
+    interval: str,
+    since: int,
+    end_msec: int,
+    store: CandleStore = None,
+    max_workers: int = 4,
+    chunk_candles: int = 1000,
+    retries: int = 3,
+    backoff: float = 1.0,
+) -> pd.DataFrame:
+    """
+    Fetches candles opening in [since, end_msec) as concurrent chunks.
+
+    With a store, only the ranges missing from it are fetched and new closed
+    candles are appended to it. Requests from all workers share the exchange's
+    rate limit. Chunks that still fail after retrying are reported once the
+    others have been stored, so the next run only refetches those.
+
+    Args:
+        exchange: A ccxt exchange instance.
+        symbol (str): The trading pair symbol in CCXT format (e.g., 'BTC/USDT').
+        interval (str): The K-line interval (e.g., '1m', '1d').
+        since (int): Start timestamp in milliseconds.
+        end_msec (int): End timestamp in milliseconds.
+        store (CandleStore): Optional local candle store.
+        max_workers (int): Number of chunks fetched concurrently.
+        chunk_candles (int): Candles per chunk.
+        retries (int): Retries per page on network errors and rate limiting.
+        backoff (float): Initial retry delay in seconds, doubled on each retry.
+
+    Returns:
+        pd.DataFrame: OHLCV columns indexed by a UTC 'Date', or None if there are no candles.
+
+    Raises:
+        RuntimeError: If any chunk could not be fetched.
+    """
+    step_msec = int(exchange.parse_timeframe(interval) * 1000)
+    stored = store.read(symbol, interval, since, end_msec) if store is not None else None
+    ranges = find_gaps(stored.index, since, end_msec, step_msec) if store is not None else [(since, end_msec)]
+    chunks = plan_chunks(ranges, step_msec, chunk_candles)
+    logger.info(f"Fetching {symbol} {interval} candles in {len(chunks)} chunk(s) with {max_workers} worker(s)...")
+
+    throttle = _Throttle(float(getattr(exchange, 'rateLimit', 0) or 0))
+    klines, failed = [], []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(_fetch_chunk, exchange, throttle, symbol, interval, start, end, step_msec, retries, backoff):
+                (start, end)
+            for start, end in chunks
+        }
+        for future in as_completed(futures):
+            try:
+                klines.extend(future.result())
+            except Exception as e:
+                logger.error(f"An error occurred while fetching chunk {futures[future]}: {e}")
+                failed.append(futures[future])
+
+    frames = [] if stored is None else [stored]
+    if klines:
+        fetched = _klines_to_frame(klines).sort_index()
+        duplicates = find_duplicates(fetched.index)
+        if len(duplicates):
+            logger.warning(f"Dropping {len(duplicates)} duplicate candle(s) returned by the exchange")
+            fetched = fetched[~fetched.index.duplicated(keep='last')]
+        if store is not None:
+            # The newest candle may still be forming; keep it out of the store so it is refetched.
+            closed_before = pd.Timestamp(time.time() * 1000 - step_msec, unit='ms', tz='UTC')
+            store.append(symbol, interval, fetched[fetched.index <= closed_before])
+        frames.append(fetched)
+
+    if failed:
+        raise RuntimeError(f"Failed to fetch {len(failed)} of {len(chunks)} chunk(s) for {symbol}: {sorted(failed)}")
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return None
+    data = pd.concat(frames)
+    data = data[~data.index.duplicated(keep='last')].sort_index()
+
+    # Holes inside the fetched span are usually exchange outages; report rather than fill them.
+    first_open, last_open = (int(ts.value // 10**6) for ts in (data.index[0], data.index[-1]))
+    gaps = find_gaps(data.index, first_open, last_open + step_msec, step_msec)
+    if gaps:
+        logger.warning(f"{sum((end - start) // step_msec for start, end in gaps)} candle(s) missing in {len(gaps)} gap(s)")
+    return data
+
+def fetch_market_frame(
+    symbol: str,
+    interval: str,
+    since: int,
+    end_msec: int,
+    store: CandleStore = None,
+    max_workers: int = 4,
+    chunk_candles: int = 1000,
+) -> pd.DataFrame:
+    """
+    Fetches candles opening in [since, end_msec) from Binance.
+
+    Args:
+        symbol (str): The trading pair symbol in CCXT format (e.g., 'BTC/USDT').
+        interval (str): The K-line interval (e.g., '1m', '1d').
+        since (int): Start timestamp in milliseconds.
+        end_msec (int): End timestamp in milliseconds.
+        store (CandleStore): Optional local candle store; only missing ranges are fetched.
+        max_workers (int): Number of chunks fetched concurrently.
+        chunk_candles (int): Candles per chunk.
+
+    Returns:
+        pd.DataFrame: OHLCV columns indexed by a UTC 'Date', or None if nothing was returned.
+    """
+    exchange = _create_exchange()
+    logger.info(f"Fetching {symbol} data for interval {interval} from Binance using CCXT...")
+    return backfill_ohlcv(
+        exchange, symbol, interval, since, end_msec,
+        store=store, max_workers=max_workers, chunk_candles=chunk_candles,
+    )
+
+@instrumented('fetch_market_data')
+def fetch_market_data(
+    symbol: str,
+    interval: str,
+    start_str: str,
+    end_str: str,
+    output_path: str,
+    store: CandleStore = None,
+    max_workers: int = 4,
+    chunk_candles: int = 1000,
+):
+    """
+    Fetches historical market data from Binance using CCXT and saves it in a format
+    compatible with the rest of the pipeline.
+
+    Args:
+        symbol (str): The trading pair symbol in CCXT format (e.g., 'BTC/USDT').
+        interval (str): The K-line interval (e.g., '1m', '1d').
+        start_str (str): The start date (YYYY-MM-DD).
+        end_str (str): The end date (YYYY-MM-DD).
+        output_path (str): The path to save the market data to; the extension picks the format.
+        store (CandleStore): Optional local candle store; only missing ranges are fetched.
+        max_workers (int): Number of chunks fetched concurrently.
+        chunk_candles (int): Candles per chunk.
+    """
+    output_df = fetch_market_frame(
+        symbol, interval, date_to_msec(start_str), date_to_msec(end_str),
+        store=store, max_workers=max_workers, chunk_candles=chunk_candles,
+    )
+    if output_df is None:
+        logger.warning("No data found for the specified parameters.")
+        return
 
     # Save the data
-    output_df.to_csv(output_path)
-    print(f"Successfully saved market data to {output_path}")
+    observe(rows_out=len(output_df))
+    write_table(output_df, output_path, symbol=symbol.replace('/', ''))
+    logger.info(f"Successfully saved market data to {output_path}")
 
 def _load_config_for_main():
     config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
@@ -72,6 +254,7 @@ def _load_config_for_main():
 
 if __name__ == '__main__':
     config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
     market_config = config['market']
     news_config = config['news']
 
@@ -80,6 +263,8 @@ if __name__ == '__main__':
     INTERVAL = market_config['interval']
     FROM_DATE = news_config['from_date']
     TO_DATE = news_config['to_date']
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+    backfill_config = market_config.get('backfill', {})
 
     script_dir = os.path.dirname(__file__)
     data_dir = os.path.join(script_dir, '..', 'data')
@@ -87,7 +272,13 @@ if __name__ == '__main__':
 
     OUTPUT_DIR = market_data_dir
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"{market_config['symbol']}_{INTERVAL}_{FROM_DATE}_{TO_DATE}.csv")
+    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"{market_config['symbol']}_{INTERVAL}_{FROM_DATE}_{TO_DATE}{EXT}")
 
-    fetch_market_data(SYMBOL, INTERVAL, FROM_DATE, TO_DATE, OUTPUT_PATH)
+    store = CandleStore(os.path.join(data_dir, 'candles')) if backfill_config.get('store', False) else None
+    fetch_market_data(
+        SYMBOL, INTERVAL, FROM_DATE, TO_DATE, OUTPUT_PATH,
+        store=store,
+        max_workers=backfill_config.get('max_workers', 4),
+        chunk_candles=backfill_config.get('chunk_candles', 1000),
+    )
 
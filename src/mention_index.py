@@ -0,0 +1,366 @@
+import os
+import time
+import shutil
+import logging
+import argparse
+import yaml
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from src.storage import read_table, EXTENSIONS
+from src.entities import read_entities
+from src.instrumentation import instrumented, observe, configure_logging
+
+logger = logging.getLogger(__name__)
+
+POSTING_COLUMNS = ['term', 'ts', 'article_id', 'count']
+# Entity terms are prefixed so they never collide with words of the cleaned
+# text, which has no ':'. 'entity:SOL' looks up the entity table's 'SOL'.
+ENTITY_PREFIX = 'entity:'
+# Part files are sorted by term, so the row group statistics let a term
+# lookup skip most of each file.
+ROW_GROUP_SIZE = 64 * 1024
+
+def _utc_ns(value) -> int:
+    """A time as UTC nanoseconds; naive times are taken as UTC."""
+    ts = pd.Timestamp(value)
+    ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')
+    return ts.value
+
+def mention_column(term: str) -> str:
+    """The column holding a term's mention counts in the aligned and feature tables, e.g. 'hack_mentions'."""
+    return f"{term.replace(':', '_').replace(' ', '_')}_mentions"
+
+def article_postings(features_df: pd.DataFrame, entities_df: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Builds the postings of a batch of NLP features: one row per article and
+    distinct word of its cleaned title and content, and per article and
+    entity of `entities_df`, with the number of occurrences.
+
+    Args:
+        features_df (pd.DataFrame): Output of process_nlp_features with 'article_id' and 'publishedAt'.
+        entities_df (pd.DataFrame): The matching entity table rows.
+
+    Returns:
+        pd.DataFrame: POSTING_COLUMNS sorted by term, time and article id, plus
+            'positions', the word offsets of each occurrence in the article
+            (empty for entities); 'ts' holds publishedAt in UTC nanoseconds.
+    """
+    published = pd.to_datetime(features_df['publishedAt'], utc=True)
+    valid = published.notna().to_numpy()
+    features_df = features_df[valid]
+    times = pd.DatetimeIndex(published[valid]).as_unit('ns').asi8
+    article_ids = features_df['article_id'].to_numpy(dtype=np.int32)
+
+    texts = pd.Series('', index=range(len(features_df)))
+    for col in ('title_cleaned', 'content_cleaned'):
+        if col in features_df.columns:
+            texts = texts + ' ' + features_df[col].fillna('').astype(str).to_numpy()
+    words = texts.str.split().explode().dropna()
+    frames = [pd.DataFrame({
+        'row': words.index.to_numpy(),
+        'term': words.to_numpy(),
+        'pos': words.groupby(level=0).cumcount().to_numpy(),
+    })]
+
+    if entities_df is not None and not entities_df.empty:
+        rows = pd.Series(np.arange(len(features_df)), index=article_ids)
+        entities_df = entities_df[entities_df['article_id'].isin(article_ids)]
+        frames.append(pd.DataFrame({
+            'row': rows.loc[entities_df['article_id'].to_numpy()].to_numpy(),
+            'term': ENTITY_PREFIX + entities_df['entity'].astype(str).to_numpy(dtype=object),
+            'pos': -1,
+        }))
+
+    tokens = pd.concat(frames, ignore_index=True)
+    codes, vocabulary = pd.factorize(tokens['term'], sort=True)
+    rows = tokens['row'].to_numpy(dtype=np.int64)
+    positions = tokens['pos'].to_numpy(dtype=np.int32)
+    order = np.lexsort((positions, rows, article_ids[rows], times[rows], codes))
+    codes, rows, positions = codes[order], rows[order], positions[order]
+
+    # One posting per run of tokens with the same term and article.
+    new = np.ones(len(codes), dtype=bool)
+    new[1:] = (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])
+    starts = np.flatnonzero(new)
+    bounds = np.append(starts, len(codes))
+    has_pos = positions >= 0
+    offsets = np.concatenate([[0], np.cumsum(has_pos)])[bounds].astype(np.int32)
+    position_lists = pa.ListArray.from_arrays(pa.array(offsets, pa.int32()), pa.array(positions[has_pos], pa.int32()))
+    return pd.DataFrame({
+        'term': np.asarray(vocabulary, dtype=object)[codes[starts]],
+        'ts': times[rows[starts]],
+        'article_id': article_ids[rows[starts]],
+        'count': np.diff(bounds).astype(np.int32),
+        'positions': pd.arrays.ArrowExtensionArray(position_lists),
+    })
+
+class MentionIndex:
+    """
+    An append-only on-disk inverted index of processed articles: term or
+    entity -> posting list of (publication time, article id, occurrences),
+    sorted by time.
+
+    Each add() writes a new Parquet part file sorted by term. A lookup reads
+    the term's rows from every part (row groups of other terms are skipped),
+    merges them in time order and keeps them in memory for further queries.
+    Range queries are binary searches on the sorted times.
+
+    Terms are single words of the cleaned text ('hack'), word sequences
+    ('federal reserve', matched on adjacent word positions and counted like
+    the text scan of count_keyword_mentions) or entities ('entity:SOL').
+
+    Args:
+        root (str): Directory holding the part files.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._cache = {}
+
+    def _parts(self) -> list:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(os.path.join(self.root, name) for name in os.listdir(self.root) if name.endswith('.parquet'))
+
+    def add(self, features_df: pd.DataFrame, entities_df: pd.DataFrame = None) -> int:
+        """
+        Indexes a batch of NLP features (and their entities) as a new part file.
+
+        Returns:
+            int: The number of postings written.
+        """
+        postings = article_postings(features_df, entities_df)
+        if postings.empty:
+            return 0
+        os.makedirs(self.root, exist_ok=True)
+        # Without pandas metadata, reading a few columns back never rebuilds the list dtype.
+        table = pa.Table.from_pandas(postings, preserve_index=False).replace_schema_metadata(None)
+        pq.write_table(
+            table, os.path.join(self.root, f"part-{time.time_ns()}.parquet"),
+            row_group_size=ROW_GROUP_SIZE, compression='zstd',
+        )
+        self._cache.clear()
+        return len(postings)
+
+    def _read_terms(self, terms: list) -> dict:
+        """Reads the posting arrays (times, article ids, counts) of `terms` from every part."""
+        missing = [term for term in terms if term not in self._cache]
+        if missing:
+            tables = [
+                pq.read_table(part, columns=POSTING_COLUMNS, filters=[('term', 'in', missing)])
+                for part in self._parts()
+            ]
+            df = pa.concat_tables(tables).to_pandas() if tables else pd.DataFrame(columns=POSTING_COLUMNS)
+            groups = dict(list(df.groupby('term', sort=False))) if not df.empty else {}
+            for term in missing:
+                group = groups.get(term)
+                if group is None:
+                    self._cache[term] = (np.zeros(0, np.int64), np.zeros(0, np.int32), np.zeros(0, np.int32))
+                    continue
+                ts = group['ts'].to_numpy(dtype=np.int64)
+                article_ids = group['article_id'].to_numpy(dtype=np.int32)
+                order = np.lexsort((article_ids, ts))
+                self._cache[term] = (ts[order], article_ids[order], group['count'].to_numpy(dtype=np.int32)[order])
+        return {term: self._cache[term] for term in terms}
+
+    def _read_positions(self, words: list) -> dict:
+        """Reads, for each of `words`, the article id and word offset of every occurrence."""
+        tables = [
+            pq.read_table(part, columns=['term', 'article_id', 'positions'], filters=[('term', 'in', words)])
+            for part in self._parts()
+        ]
+        located = {}
+        for word in words:
+            lists = [table.filter(pc.equal(table['term'], word)) for table in tables]
+            lists = [(table['article_id'], table['positions']) for table in lists if table.num_rows]
+            if not lists:
+                located[word] = (np.zeros(0, np.int64), np.zeros(0, np.int64))
+                continue
+            ids = np.concatenate([id_column.to_numpy() for id_column, _ in lists]).astype(np.int64)
+            positions = pa.chunked_array([chunk for _, column in lists for chunk in column.chunks])
+            lengths = pc.list_value_length(positions).to_numpy(zero_copy_only=False)
+            located[word] = (np.repeat(ids, lengths), pc.list_flatten(positions).to_numpy().astype(np.int64))
+        return located
+
+    def _sequence_arrays(self, words: list) -> tuple:
+        """Postings of a word sequence: its non-overlapping occurrences as adjacent words."""
+        located = self._read_positions(list(dict.fromkeys(words)))
+        # An occurrence starting at offset p has word k at p + k; key it by (article, p).
+        keys = None
+        for k, word in enumerate(words):
+            ids, positions = located[word]
+            keep = positions >= k
+            word_keys = (ids[keep] << 32) | (positions[keep] - k)
+            keys = np.unique(word_keys) if keys is None else np.intersect1d(keys, word_keys, assume_unique=True)
+        found_ids, found_starts = keys >> 32, keys & 0xFFFFFFFF
+        if any(words[:n] == words[-n:] for n in range(1, len(words))):
+            # Occurrences can overlap ('hack hack' in 'hack hack hack'); the text scan
+            # counts them left to right without overlap.
+            keep = np.ones(len(keys), dtype=bool)
+            last_id, free_from = -1, 0
+            for i, (article_id, start) in enumerate(zip(found_ids.tolist(), found_starts.tolist())):
+                if article_id == last_id and start < free_from:
+                    keep[i] = False
+                    continue
+                last_id, free_from = article_id, start + len(words)
+            found_ids = found_ids[keep]
+        article_ids, counts = np.unique(found_ids, return_counts=True)
+
+        # Publication times come from the first word's postings.
+        word_ts, word_ids, _ = self._read_terms([words[0]])[words[0]]
+        order = np.argsort(word_ids, kind='stable')
+        ts = word_ts[order[np.searchsorted(word_ids[order], article_ids)]]
+        order = np.lexsort((article_ids, ts))
+        return ts[order], article_ids[order].astype(np.int32), counts[order].astype(np.int32)
+
+    def _posting_arrays(self, term: str) -> tuple:
+        if term.startswith(ENTITY_PREFIX):
+            return self._read_terms([term.strip()])[term.strip()]
+        # The cleaned text is lowercase; words match case-insensitively, as in
+        # count_keyword_mentions.
+        term = term.strip().lower()
+        if ' ' not in term:
+            return self._read_terms([term])[term]
+        if term not in self._cache:
+            self._cache[term] = self._sequence_arrays(term.split())
+        return self._cache[term]
+
+    @staticmethod
+    def _range(ts: np.ndarray, start=None, end=None) -> slice:
+        lo = 0 if start is None else np.searchsorted(ts, _utc_ns(start), side='left')
+        hi = len(ts) if end is None else np.searchsorted(ts, _utc_ns(end), side='left')
+        return slice(lo, hi)
+
+    def postings(self, term: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Returns the posting list of `term` for articles published in [start, end).
+
+        Returns:
+            pd.DataFrame: 'publishedAt' (UTC), 'article_id' and 'count', in time order.
+        """
+        ts, article_ids, counts = self._posting_arrays(term)
+        window = self._range(ts, start, end)
+        return pd.DataFrame({
+            'publishedAt': pd.to_datetime(ts[window], utc=True),
+            'article_id': article_ids[window],
+            'count': counts[window],
+        })
+
+    def mention_series(self, terms: list, interval: str, start=None, end=None, articles: bool = False) -> pd.DataFrame:
+        """
+        Counts mentions of each term per `interval` bucket of publication time.
+
+        Args:
+            terms (list): Words, word sequences or 'entity:' terms.
+            interval (str): Bucket size, e.g. '1h'.
+            start, end: Time range [start, end); defaults to the range of the postings.
+            articles (bool): Count mentioning articles instead of occurrences.
+
+        Returns:
+            pd.DataFrame: Counts indexed by bucket start ('Date'), one column per term.
+        """
+        step = pd.Timedelta(interval).value
+        windows = {}
+        for term in terms:
+            ts, _, counts = self._posting_arrays(term)
+            window = self._range(ts, start, end)
+            windows[term] = (ts[window], np.ones(len(ts[window]), np.int64) if articles else counts[window])
+
+        all_ts = [ts for ts, _ in windows.values() if len(ts)]
+        first = _utc_ns(start) if start is not None else min((ts[0] for ts in all_ts), default=0)
+        last = _utc_ns(end) if end is not None else max((ts[-1] + 1 for ts in all_ts), default=0)
+        first = first // step * step
+        n_buckets = max(-(-(last - first) // step), 0)
+        index = pd.DatetimeIndex(pd.to_datetime(first + step * np.arange(n_buckets), utc=True), name='Date')
+
+        series = pd.DataFrame(index=index)
+        for term, (ts, values) in windows.items():
+            series[term] = np.bincount((ts - first) // step, weights=values, minlength=n_buckets).astype(np.int64)
+        return series
+
+    def compact(self):
+        """Rewrites all part files as a single file."""
+        parts = self._parts()
+        if len(parts) <= 1:
+            return
+        table = pa.concat_tables([pq.read_table(part) for part in parts])
+        table = table.sort_by([('term', 'ascending'), ('ts', 'ascending'), ('article_id', 'ascending')])
+        pq.write_table(
+            table, os.path.join(self.root, f"part-{time.time_ns()}.parquet"),
+            row_group_size=ROW_GROUP_SIZE, compression='zstd',
+        )
+        for part in parts:
+            os.remove(part)
+
+    def clear(self):
+        """Removes every part file."""
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+        self._cache.clear()
+
+def load_mentions(index_dir: str, terms, article_ids=None) -> dict:
+    """
+    Reads the posting lists of `terms` from the index in `index_dir`, keeping
+    only articles in `article_ids` (e.g. those routed to one asset) if given.
+
+    Returns:
+        dict: term -> postings DataFrame (see MentionIndex.postings).
+    """
+    index = MentionIndex(index_dir)
+    mentions = {}
+    for term in terms:
+        postings = index.postings(term)
+        if article_ids is not None:
+            postings = postings[np.isin(postings['article_id'].to_numpy(), np.asarray(article_ids))]
+        mentions[term] = postings
+    return mentions
+
+@instrumented('index')
+def build_mention_index(features_path: str, index_dir: str, entities_path: str = None):
+    """Rebuilds the mention index in `index_dir` from a features table and its entity table."""
+    features_df = read_table(features_path)
+    entities_df = read_entities(entities_path) if entities_path is not None else None
+    index = MentionIndex(index_dir)
+    index.clear()
+    postings = index.add(features_df, entities_df)
+    observe(rows_in=len(features_df), rows_out=postings)
+    logger.info(f"Indexed {len(features_df)} articles ({postings} postings) in {index_dir}")
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    news_config = config['news']
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+    RUN = f"{news_config['query']}_{news_config['from_date']}_{news_config['to_date']}"
+    data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
+
+    parser = argparse.ArgumentParser(description="Count term and entity mentions per interval from the mention index.")
+    parser.add_argument('terms', nargs='+', help="Words, quoted word sequences or 'entity:<id>' terms.")
+    parser.add_argument('--interval', default='1h')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--articles', action='store_true', help="Count mentioning articles instead of occurrences.")
+    parser.add_argument('--build', action='store_true', help="Rebuild the index from the NLP features first.")
+    parser.add_argument('--index-dir', default=os.path.join(data_dir, 'index', RUN))
+    args = parser.parse_args()
+
+    if args.build:
+        processed_news_dir = os.path.join(data_dir, 'processed_news')
+        build_mention_index(
+            os.path.join(processed_news_dir, f"features_{RUN}{EXT}"), args.index_dir,
+            entities_path=os.path.join(processed_news_dir, f"entities_{RUN}{EXT or '.parquet'}"),
+        )
+    series = MentionIndex(args.index_dir).mention_series(
+        args.terms, args.interval, start=args.start, end=args.end, articles=args.articles,
+    )
+    print(series[(series != 0).any(axis=1)].to_string())
@@ -1,79 +1,154 @@
 import os
-import json
+import logging
 import yaml
 import requests
 from dotenv import load_dotenv
-from newsapi import NewsApiClient
+from concurrent.futures import ThreadPoolExecutor
+from src.raw_news import article_key, write_raw_articles, RAW_NEWS_EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-def _fetch_newsapi_news(api_key: str, query: str, from_date: str, to_date: str) -> list:
-    """Fetches news articles from NewsAPI."""
-    print("Fetching news from NewsAPI...")
+NEWSAPI_PAGE_SIZE = 100
+DEFAULT_MAX_PAGES = 10
+
+def _fetch_newsapi_news(api_key: str, query: str, from_date: str, to_date: str, max_pages: int = DEFAULT_MAX_PAGES) -> list:
+    """Fetches news articles from NewsAPI, following pages up to `max_pages`."""
+    logger.info("Fetching news from NewsAPI...")
+    from newsapi import NewsApiClient
     newsapi = NewsApiClient(api_key=api_key)
-    response = newsapi.get_everything(
-        q=query,
-        from_param=from_date,
-        to=to_date,
-        language='en',
-        sort_by='publishedAt',
-    )
-    return response.get('articles', [])
-
-def _fetch_cryptopanic_news(api_key: str, query: str) -> list:
+    articles = []
+    for page in range(1, max_pages + 1):
+        try:
+            response = newsapi.get_everything(
+                q=query,
+                from_param=from_date,
+                to=to_date,
+                language='en',
+                sort_by='publishedAt',
+                page=page,
+                page_size=NEWSAPI_PAGE_SIZE,
+            )
+        except Exception as e:
+            if page == 1:
+                raise
+            # NewsAPI rejects pages past the plan's result cap; keep what we have.
+            logger.warning(f"NewsAPI page {page} failed: {e}")
+            break
+        page_articles = response.get('articles', [])
+        articles.extend(page_articles)
+        if not page_articles or len(articles) >= response.get('totalResults', 0):
+            break
+    return articles
+
+def normalize_cryptopanic_item(item: dict) -> dict:
+    """Maps a CryptoPanic post onto the NewsAPI article schema used downstream."""
+    return {
+        'publishedAt': item.get('created_at'),
+        'title': item.get('title'),
+        'description': item.get('title'),
+        'url': item.get('url'),
+        'source': {'name': item.get('source', {}).get('title')}
+    }
+
+def _fetch_cryptopanic_news(api_key: str, query: str, max_pages: int = DEFAULT_MAX_PAGES) -> list:
     """
-    Fetches news articles from CryptoPanic API.
+    Fetches news articles from CryptoPanic API, following the `next` cursor up to `max_pages`.
     """
-    print("Fetching news from CryptoPanic...")
+    logger.info("Fetching news from CryptoPanic...")
     url = f"https://cryptopanic.com/api/v2/posts/?auth_token={api_key}&currencies={query}&public=true"
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
-
     articles = []
-    for item in data.get('results', []):
-        articles.append({
-            'publishedAt': item.get('created_at'),
-            'title': item.get('title'),
-            'description': item.get('title'),
-            'url': item.get('url'),
-            'source': {'name': item.get('source', {}).get('title')}
-        })
+    for _ in range(max_pages):
+        response = requests.get(url)
+        response.raise_for_status()
+        data = response.json()
+        articles.extend(normalize_cryptopanic_item(item) for item in data.get('results', []))
+        url = data.get('next')
+        if not url:
+            break
     return articles
 
-def fetch_news(api_key: str, query: str, from_date: str, to_date: str, output_path: str, source: str = 'newsapi'):
+def fetch_articles(
+    api_key: str,
+    query: str,
+    from_date: str,
+    to_date: str,
+    source: str = 'newsapi',
+    sources: list = None,
+    max_workers: int = 4,
+) -> list:
     """
-    Fetches news articles from the specified source.
+    Fetches news articles from the specified source and returns them as a list of dicts.
+
+    With source='multi', every source spec in `sources` is fetched concurrently
+    (all pages) by src.async_news_fetcher and the results are deduplicated;
+    `api_key` is then unused and keys come from each spec. A single source
+    also follows its pages, up to the 'max_pages' of its entry in `sources`.
+
+    `query` may also be a list of terms (e.g. of every asset in the universe):
+    up to `max_workers` terms are fetched at once and articles returned for
+    more than one term are kept once.
     """
+    if not isinstance(query, str):
+        queries = list(dict.fromkeys(query))
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queries)))) as executor:
+            results = list(executor.map(
+                lambda term: fetch_articles(api_key, term, from_date, to_date, source=source, sources=sources),
+                queries,
+            ))
+        seen = set()
+        articles = []
+        for article in (article for result in results for article in result):
+            key = article_key(article)
+            if key not in seen:
+                seen.add(key)
+                articles.append(article)
+        return articles
+    if source == 'multi':
+        from src.async_news_fetcher import fetch_all_articles
+        return fetch_all_articles(sources or [], query, from_date, to_date)
+    max_pages = next((spec.get('max_pages', DEFAULT_MAX_PAGES) for spec in sources or []
+                      if spec.get('name') == source), DEFAULT_MAX_PAGES)
     if source == 'cryptopanic':
-        articles = _fetch_cryptopanic_news(api_key, query)
+        return _fetch_cryptopanic_news(api_key, query, max_pages)
     elif source == 'newsapi':
-        articles = _fetch_newsapi_news(api_key, query, from_date, to_date)
+        return _fetch_newsapi_news(api_key, query, from_date, to_date, max_pages)
     else:
         raise ValueError(f"Unknown news source: {source}")
 
+@instrumented('fetch_news')
+def fetch_news(
+    api_key: str,
+    query: str,
+    from_date: str,
+    to_date: str,
+    output_path: str,
+    source: str = 'newsapi',
+    sources: list = None,
+):
+    """
+    Fetches news articles from the specified source. The extension of
+    `output_path` picks the raw format (see RAW_NEWS_EXTENSIONS).
+    """
+    articles = fetch_articles(api_key, query, from_date, to_date, source=source, sources=sources)
+    observe(rows_out=len(articles))
+
     if not articles:
-        print(f"Warning: Fetched 0 articles from {source}. No data will be written.")
+        logger.warning(f"Fetched 0 articles from {source}. No data will be written.")
         return
 
-    output_data = {'articles': articles}
     try:
         absolute_output_path = os.path.abspath(output_path)
-        print(f"Attempting to write {len(articles)} articles to: {absolute_output_path}")
-        os.makedirs(os.path.dirname(absolute_output_path), exist_ok=True)
-        with open(absolute_output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=4)
-        print(f"Successfully saved data to {absolute_output_path}")
+        logger.debug(f"Attempting to write {len(articles)} articles to: {absolute_output_path}")
+        write_raw_articles(articles, absolute_output_path)
+        logger.info(f"Successfully saved data to {absolute_output_path}")
     except IOError as e:
-        print(f"\n--- FILE WRITE ERROR ---\n")
-        print(f"An I/O error occurred while trying to write to the file: {e}")
-        print(f"Please check if you have write permissions for the directory: {os.path.dirname(absolute_output_path)}")
-        print(f"------------------------\n")
+        logger.error(
+            f"An I/O error occurred while trying to write to the file: {e}. Please check if you have "
+            f"write permissions for the directory: {os.path.dirname(absolute_output_path)}"
+        )
     except Exception as e:
-        print(f"\n--- UNEXPECTED ERROR ---\n")
-        print(f"An unexpected error occurred during file writing: {e}")
-        print(f"------------------------\n")
+        logger.error(f"An unexpected error occurred during file writing: {e}")
 
 def _load_config_for_main():
     config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
@@ -83,7 +158,10 @@ def _load_config_for_main():
         return yaml.safe_load(f)
 
 if __name__ == '__main__':
+    # Load environment variables from .env file
+    load_dotenv()
     config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
     news_config = config['news']
     
     SOURCE = news_config.get('source', 'newsapi')
@@ -91,18 +169,24 @@ if __name__ == '__main__':
     FROM_DATE = str(news_config['from_date'])
     TO_DATE = str(news_config['to_date'])
 
-    api_key = os.getenv("NEWS_API_KEY") if SOURCE == 'newsapi' else os.getenv("CRYPTOPANIC_API_KEY")
+    # Multi-source fetching reads each source's key from its own spec.
+    api_key = None
+    if SOURCE == 'newsapi':
+        api_key = os.getenv("NEWS_API_KEY")
+    elif SOURCE == 'cryptopanic':
+        api_key = os.getenv("CRYPTOPANIC_API_KEY")
 
-    if not api_key:
-        print(f"API key for {SOURCE} not found in .env file. Skipping.")
+    if SOURCE != 'multi' and not api_key:
+        logger.warning(f"API key for {SOURCE} not found in .env file. Skipping.")
     else:
-        print(f"\n--- Running {SOURCE} Fetcher Example from Config ---")
+        logger.info(f"--- Running {SOURCE} Fetcher Example from Config ---")
         script_dir = os.path.dirname(__file__)
         data_dir = os.path.join(script_dir, '..', 'data')
         raw_news_dir = os.path.join(data_dir, 'raw_news')
 
         OUTPUT_DIR = raw_news_dir
         os.makedirs(OUTPUT_DIR, exist_ok=True)
-        OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"{SOURCE}_{QUERY}_{FROM_DATE}_{TO_DATE}.json")
-        fetch_news(api_key, QUERY, FROM_DATE, TO_DATE, OUTPUT_PATH, source=SOURCE)
+        RAW_EXT = RAW_NEWS_EXTENSIONS[config.get('storage', {}).get('raw_news_format', 'json')]
+        OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"{SOURCE}_{QUERY}_{FROM_DATE}_{TO_DATE}{RAW_EXT}")
+        fetch_news(api_key, QUERY, FROM_DATE, TO_DATE, OUTPUT_PATH, source=SOURCE, sources=news_config.get('sources'))
 
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# SQLite's default limit on host parameters in a single statement.
+_MAX_PARAMS = 500
+
+def content_key(text: str, model_id: str) -> str:
+    """Returns the cache key for a text scored by a given model configuration."""
+    return hashlib.sha256(f"{model_id}\x00{text}".encode('utf-8')).hexdigest()
+
+class NLPCache:
+    """
+    A persistent SQLite cache of sentiment scores and entities, keyed by a hash
+    of the cleaned text and the ID/version of the models that produced them.
+
+    Args:
+        path (str): Path to the SQLite database file.
+        max_entries (int): If set, evict least recently used rows beyond this count.
+        max_age_days (float): If set, evict rows created longer ago than this.
+    """
+
+    def __init__(self, path: str, max_entries: int = None, max_age_days: float = None):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS nlp_results ("
+            " key TEXT PRIMARY KEY,"
+            " sentiment_score REAL NOT NULL,"
+            " entities TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed_at ON nlp_results (accessed_at)")
+        self._conn.commit()
+
+    def get_many(self, texts: list, model_id: str) -> list:
+        """
+        Looks up cached results for each text.
+
+        Returns:
+            list: A (sentiment_score, entities) tuple per text, or None on a miss.
+        """
+        keys = [content_key(text, model_id) for text in texts]
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        for i in range(0, len(unique_keys), _MAX_PARAMS):
+            chunk = unique_keys[i:i + _MAX_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, sentiment_score, entities FROM nlp_results WHERE key IN ({placeholders})",
+                chunk,
+            )
+            for key, score, entities in rows:
+                found[key] = (score, [tuple(ent) for ent in json.loads(entities)])
+
+        if found:
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE nlp_results SET accessed_at = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._conn.commit()
+
+        results = [found.get(key) for key in keys]
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts: list, scores: list, entities: list, model_id: str):
+        """Stores sentiment scores and entities for the given texts."""
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO nlp_results VALUES (?, ?, ?, ?, ?)",
+            [
+                (content_key(text, model_id), float(score), json.dumps(ents), now, now)
+                for text, score, ents in zip(texts, scores, entities)
+            ],
+        )
+        self._conn.commit()
+
+    def evict(self) -> int:
+        """Applies the age and size limits. Returns the number of rows removed."""
+        removed = 0
+        if self.max_age_days is not None:
+            cutoff = time.time() - self.max_age_days * 86400
+            removed += self._conn.execute(
+                "DELETE FROM nlp_results WHERE created_at < ?", (cutoff,)
+            ).rowcount
+        if self.max_entries is not None:
+            removed += self._conn.execute(
+                "DELETE FROM nlp_results WHERE key NOT IN"
+                " (SELECT key FROM nlp_results ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            ).rowcount
+        self._conn.commit()
+        return removed
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM nlp_results").fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns hit/miss counts for this session and the number of stored entries."""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self),
+        }
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,256 @@
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import argparse
+import socketserver
+import yaml
+from src.instrumentation import configure_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = os.path.join('data', 'cache', 'nlp_daemon.sock')
+# Seconds to connect and get the daemon's info; scoring requests may take far longer.
+HANDSHAKE_TIMEOUT = 5.0
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Answers JSON line requests until the client disconnects."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.daemon.handle(json.loads(line))
+            except Exception as e:
+                logger.exception("NLP daemon request failed")
+                response = {'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+class NLPDaemon:
+    """
+    A long-lived local process keeping the spaCy and sentiment models loaded
+    and scoring texts for clients over a Unix socket, so frequent small runs do
+    not pay for loading the models each time.
+
+    Requests and responses are JSON lines. {"op": "info"} returns the model id
+    and sentiment backend spec; {"op": "score", "texts": [...], "batch_size": n}
+    returns {"scores": [...], "entities": [[[text, label], ...], ...]}.
+    Each connection is served in its own thread. Scoring requests take a
+    lock, so the models are never used concurrently, while info requests (the
+    handshake of a new client) are answered at once.
+
+    Args:
+        socket_path (str): Where to listen.
+        nlp_model: A spaCy pipeline as returned by load_ner_model.
+        sentiment_backend (SentimentBackend): The sentiment model.
+        idle_timeout (float): Exit after this many seconds without a request,
+            even if clients stay connected; None runs forever.
+    """
+
+    def __init__(self, socket_path: str, nlp_model, sentiment_backend, idle_timeout: float = None):
+        from src.nlp_processor import model_id
+
+        self.socket_path = socket_path
+        self.nlp_model = nlp_model
+        self.sentiment_backend = sentiment_backend
+        self.sentiment_backend.load()
+        self.model_id = model_id(nlp_model, sentiment_backend)
+        self.idle_timeout = idle_timeout
+        self.requests = 0
+        self.texts = 0
+        self._model_lock = threading.Lock()
+        self._last_request = time.monotonic()
+
+    def handle(self, request: dict) -> dict:
+        from src.nlp_processor import _score_texts
+
+        self._last_request = time.monotonic()
+        op = request.get('op')
+        if op == 'info':
+            return {'model_id': self.model_id, 'sentiment': list(self.sentiment_backend.spec), 'pid': os.getpid()}
+        if op == 'score':
+            texts = request['texts']
+            with self._model_lock:
+                try:
+                    scores, entities = _score_texts(
+                        texts, self.nlp_model, request.get('batch_size', 256), 1, self.sentiment_backend,
+                    )
+                    self.requests += 1
+                    self.texts += len(texts)
+                finally:
+                    self._last_request = time.monotonic()
+            return {'scores': scores, 'entities': entities}
+        raise ValueError(f"Unknown op: {op}")
+
+    def _idle(self) -> bool:
+        """Whether no request has arrived for `idle_timeout` seconds and none is being scored."""
+        if self.idle_timeout is None or self._model_lock.locked():
+            return False
+        return time.monotonic() - self._last_request >= self.idle_timeout
+
+    def serve(self):
+        """
+        Serves until interrupted or idle for `idle_timeout` seconds.
+
+        Raises:
+            RuntimeError: If another daemon is already listening on the socket.
+        """
+        if os.path.exists(self.socket_path):
+            if _listening(self.socket_path):
+                raise RuntimeError(f"An NLP daemon is already listening on {self.socket_path}")
+            os.remove(self.socket_path) # Left over by a daemon that did not shut down cleanly.
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+
+        with socketserver.ThreadingUnixStreamServer(self.socket_path, _Handler) as server:
+            server.daemon = self
+            server.daemon_threads = True
+            server.timeout = 1.0
+            logger.info(f"NLP daemon ({self.model_id}) listening on {self.socket_path}")
+            self._last_request = time.monotonic()
+            try:
+                while not self._idle():
+                    server.handle_request()
+                logger.info(f"NLP daemon idle for {self.idle_timeout}s, exiting.")
+            except KeyboardInterrupt:
+                logger.info("Stopping NLP daemon.")
+            finally:
+                os.remove(self.socket_path)
+                logger.info(f"NLP daemon served {self.requests} requests, {self.texts} texts.")
+
+def _listening(socket_path: str) -> bool:
+    """Whether a process accepts connections on `socket_path` (a stale socket file refuses them)."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(HANDSHAKE_TIMEOUT)
+    try:
+        sock.connect(socket_path)
+        return True
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except socket.timeout:
+        return True # A full accept backlog: alive, but busy.
+    finally:
+        sock.close()
+
+class NLPClient:
+    """
+    Client of an NLPDaemon. It scores texts like the in-process pipeline, so
+    add_nlp_features can use it in place of loading the models.
+
+    Args:
+        socket_path (str): The daemon's socket.
+        timeout (float): Seconds to wait for each scoring response.
+        handshake_timeout (float): Seconds to wait to connect and for the daemon's info.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 600, handshake_timeout: float = HANDSHAKE_TIMEOUT):
+        self.socket_path = socket_path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(handshake_timeout)
+        self._reader = self._sock.makefile('rb')
+        try:
+            self._sock.connect(socket_path)
+            info = self._request({'op': 'info'})
+        except BaseException:
+            self.close()
+            raise
+        self._sock.settimeout(timeout)
+        self.model_id = info['model_id']
+        self.sentiment_spec = (info['sentiment'][0], info['sentiment'][1])
+
+    @classmethod
+    def connect(cls, socket_path: str, timeout: float = 600):
+        """Returns a connected client, or None if no daemon is listening on `socket_path`."""
+        if socket_path is None or not os.path.exists(socket_path):
+            return None
+        try:
+            return cls(socket_path, timeout=timeout)
+        except (ConnectionRefusedError, FileNotFoundError, socket.timeout):
+            return None
+
+    def _request(self, request: dict) -> dict:
+        """
+        Raises:
+            RuntimeError: If the daemon failed the request or closed the connection.
+        """
+        self._sock.sendall((json.dumps(request) + '\n').encode('utf-8'))
+        line = self._reader.readline()
+        if not line:
+            raise RuntimeError(f"NLP daemon at {self.socket_path} closed the connection.")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"NLP daemon error: {response['error']}")
+        return response
+
+    def score(self, texts: list, batch_size: int = 256) -> tuple:
+        """Returns (sentiment scores, entity lists of (text, label) tuples) for `texts`."""
+        response = self._request({'op': 'score', 'texts': list(texts), 'batch_size': batch_size})
+        entities = [[tuple(ent) for ent in ents] for ents in response['entities']]
+        return response['scores'], entities
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def connect_daemon(socket_path: str, sentiment_backend=None, timeout: float = 600):
+    """
+    Connects to the NLP daemon on `socket_path` if one is listening and serves
+    the same sentiment backend as `sentiment_backend` (VADER if None).
+
+    Returns:
+        NLPClient: A connected client, or None to score in-process instead.
+    """
+    from src.sentiment_backends import VaderBackend
+
+    client = NLPClient.connect(socket_path, timeout=timeout)
+    if client is None:
+        logger.info(f"No NLP daemon on {socket_path}; loading the models in-process.")
+        return None
+    name, options = (sentiment_backend if sentiment_backend is not None else VaderBackend()).spec
+    # The daemon's spec went through JSON, so the local one is compared the same way.
+    if list(client.sentiment_spec) != json.loads(json.dumps([name, options])):
+        logger.warning(
+            f"NLP daemon on {socket_path} serves sentiment backend {client.sentiment_spec}, "
+            f"not {(name, options)}; loading the models in-process."
+        )
+        client.close()
+        return None
+    logger.info(f"Using NLP daemon on {socket_path} ({client.model_id}).")
+    return client
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
+    nlp_config = config.get('nlp', {})
+    daemon_config = nlp_config.get('daemon', {})
+
+    parser = argparse.ArgumentParser(description="Serve sentiment and NER with warm models over a Unix socket.")
+    parser.add_argument('--socket', default=daemon_config.get('socket', DEFAULT_SOCKET_PATH))
+    parser.add_argument('--idle-timeout', type=float, default=daemon_config.get('idle_timeout'),
+                        help="Exit after this many seconds without a request.")
+    args = parser.parse_args()
+
+    from src.nlp_processor import download_nlp_models, load_ner_model
+    from src.sentiment_backends import create_backend
+
+    download_nlp_models()
+    NLPDaemon(
+        args.socket, load_ner_model(), create_backend(**nlp_config.get('sentiment', {})),
+        idle_timeout=args.idle_timeout,
+    ).serve()
@@ -1,25 +1,62 @@
 import os
+import logging
 import yaml
+import numpy as np
 import pandas as pd
-import nltk
-import spacy
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from src.nlp_cache import NLPCache
+from src.sentiment_backends import SentimentBackend, VaderBackend, create_backend
+from src.storage import read_table, write_table, EXTENSIONS
+from src.entities import encode_entities
+from src.nlp_daemon import connect_daemon
+from src.entity_matcher import EntityMatcher, NER_MODES
+from src.universe import load_universe
+from src.instrumentation import instrumented, observe, configure_logging
 
-def download_nlp_models():
-    """Downloads the VADER lexicon for NLTK and the spaCy model."""
+logger = logging.getLogger(__name__)
+
+SPACY_MODEL = 'en_core_web_sm'
+# Only these components are needed to produce doc.ents; the tagger, parser,
+# lemmatizer etc. are disabled so nlp.pipe does not pay for them.
+NER_COMPONENTS = ('tok2vec', 'ner')
+
+# Raw text is only needed for cleaning and scoring; the cleaned columns stay for
+# keyword features and asset routing.
+RAW_TEXT_COLUMNS = ('title', 'content')
+
+# Per-process sentiment backend, built by the pool initializer and loaded on first use.
+_worker_backend = None
+
+# spaCy and NLTK take about a second to import, so they are imported by the
+# functions using them rather than with this module.
+
+def download_nlp_models(include_spacy: bool = True):
+    """Downloads the VADER lexicon for NLTK and, with `include_spacy`, the spaCy model if they are missing."""
+    import nltk
     try:
         nltk.data.find('sentiment/vader_lexicon.zip')
     except LookupError:
-        print("Downloading vader_lexicon...")
+        logger.info("Downloading vader_lexicon...")
         nltk.download("vader_lexicon")
-    try:
-        spacy.load('en_core_web_sm')
-    except OSError:
-        print("Downloading spaCy model 'en_core_web_sm'...")
-        spacy.cli.download('en_core_web_sm')
+    if not include_spacy:
+        return
+    import spacy
+    # Checks the installed packages without loading the model.
+    if not spacy.util.is_package(SPACY_MODEL):
+        import spacy.cli
+        logger.info(f"Downloading spaCy model '{SPACY_MODEL}'...")
+        spacy.cli.download(SPACY_MODEL)
 
-def analyze_sentiment(text: str, sid: SentimentIntensityAnalyzer) -> float:
-    """Analyzes the sentiment of a text and returns the compound score."""
+def load_ner_model(model_name: str = SPACY_MODEL):
+    """Loads a spaCy model with every component not needed for NER disabled."""
+    import spacy
+    nlp = spacy.load(model_name)
+    nlp.select_pipes(enable=[name for name in nlp.pipe_names if name in NER_COMPONENTS])
+    return nlp
+
+def analyze_sentiment(text: str, sid) -> float:
+    """Analyzes the sentiment of a text with a VADER SentimentIntensityAnalyzer and returns the compound score."""
     if not isinstance(text, str) or not text.strip():
         return 0.0
     return sid.polarity_scores(text)['compound']
@@ -31,21 +68,255 @@ def extract_entities(text: str, nlp_model) -> list:
     doc = nlp_model(text)
     return [(ent.text, ent.label_) for ent in doc.ents]
 
-def process_nlp_features(input_path: str, output_path: str):
+def _init_sentiment_worker(spec: tuple):
+    global _worker_backend
+    name, options = spec
+    _worker_backend = create_backend(name, **options)
+
+def _score_chunk(texts: list) -> list:
+    return _worker_backend.score(texts)
+
+def score_sentiments(
+    texts: list,
+    n_process: int = 1,
+    chunk_size: int = 1000,
+    backend: SentimentBackend = None,
+) -> list:
+    """
+    Scores a list of texts, optionally across a pool of worker processes.
+
+    Args:
+        texts (list): The texts to score.
+        n_process (int): Number of worker processes. 1 scores in-process.
+        chunk_size (int): Number of texts sent to a worker per task.
+        backend (SentimentBackend): The sentiment model; VADER if None. Workers
+            rebuild it from its spec and load the model once each.
+
+    Returns:
+        list: Scores in [-1, 1] in the same order as `texts`.
+    """
+    backend = backend if backend is not None else VaderBackend()
+    if n_process <= 1 or len(texts) <= chunk_size:
+        return backend.score(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(
+        max_workers=n_process, initializer=_init_sentiment_worker, initargs=(backend.spec,),
+    ) as pool:
+        # Executor.map yields results in submission order, keeping output deterministic.
+        return list(chain.from_iterable(pool.map(_score_chunk, chunks)))
+
+def extract_entities_batch(texts: list, nlp_model, batch_size: int = 256, n_process: int = 1) -> list:
+    """
+    Extracts named entities from many texts at once using spaCy's nlp.pipe.
+
+    Args:
+        texts (list): The texts to process.
+        nlp_model: A loaded spaCy pipeline.
+        batch_size (int): Number of texts buffered per spaCy batch.
+        n_process (int): Number of processes spaCy uses for the pipe.
+
+    Returns:
+        list: One list of (text, label) tuples per input text, in input order.
+    """
+    results = [[] for _ in texts]
+    valid_idx = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    docs = nlp_model.pipe((texts[i] for i in valid_idx), batch_size=batch_size, n_process=n_process)
+    for i, doc in zip(valid_idx, docs):
+        results[i] = [(ent.text, ent.label_) for ent in doc.ents]
+    return results
+
+def model_id(nlp_model, sentiment_backend: SentimentBackend = None) -> str:
+    """Identifies the sentiment and NER models, so cached results are tied to them."""
+    meta = getattr(nlp_model, 'meta', {})
+    sentiment_id = sentiment_backend.model_id if sentiment_backend is not None else VaderBackend().model_id
+    return f"{sentiment_id}|{meta.get('name')}:{meta.get('version')}"
+
+def _score_texts(
+    texts: list, nlp_model, batch_size: int, n_process: int, sentiment_backend=None, client=None, matcher=None,
+) -> tuple:
+    if client is not None:
+        scores, entities = client.score(texts, batch_size=batch_size)
+    else:
+        scores = score_sentiments(texts, n_process=n_process, backend=sentiment_backend)
+        if nlp_model is not None:
+            entities = extract_entities_batch(texts, nlp_model, batch_size=batch_size, n_process=n_process)
+        else:
+            entities = [[] for _ in texts]
+    if matcher is not None:
+        entities = [ents + matches for ents, matches in zip(entities, matcher.match_many(texts))]
+    return scores, entities
+
+def _score_texts_cached(
+    texts: list, nlp_model, cache: NLPCache, batch_size: int, n_process: int, sentiment_backend=None, client=None,
+    matcher=None,
+) -> tuple:
+    """Scores only texts missing from the cache, each distinct text once."""
+    texts = [text if isinstance(text, str) else '' for text in texts]
+    mid = client.model_id if client is not None else model_id(nlp_model, sentiment_backend)
+    if matcher is not None:
+        mid = f"{mid}|{matcher.model_id}"
+    cached = cache.get_many(texts, mid)
+
+    missing = list(dict.fromkeys(text for text, hit in zip(texts, cached) if hit is None))
+    if missing:
+        scores, entities = _score_texts(
+            missing, nlp_model, batch_size, n_process, sentiment_backend, client, matcher,
+        )
+        cache.put_many(missing, scores, entities, mid)
+        computed = dict(zip(missing, zip(scores, entities)))
+        cached = [hit if hit is not None else computed[text] for text, hit in zip(texts, cached)]
+    cache.evict()
+
+    return [hit[0] for hit in cached], [hit[1] for hit in cached]
+
+def add_nlp_features(
+    df: pd.DataFrame,
+    nlp_model,
+    batch_size: int = 256,
+    n_process: int = 1,
+    cache: NLPCache = None,
+    sentiment_backend: SentimentBackend = None,
+    client=None,
+    entity_matcher: EntityMatcher = None,
+) -> pd.DataFrame:
+    """
+    Adds 'sentiment_score' and 'entities' columns computed from 'content_cleaned'.
+
+    Args:
+        df (pd.DataFrame): Cleaned news articles.
+        nlp_model: A spaCy pipeline as returned by load_ner_model, or None to
+            only take entities from `entity_matcher`.
+        batch_size (int): Number of texts per spaCy batch.
+        n_process (int): Number of worker processes for sentiment and spaCy.
+        cache (NLPCache): Optional result cache; only texts not in it are scored.
+        sentiment_backend (SentimentBackend): The sentiment model; VADER if None.
+        client (NLPClient): A connected NLP daemon client scoring the texts in
+            place of `nlp_model` and `sentiment_backend` (see src/nlp_daemon.py).
+        entity_matcher (EntityMatcher): Adds the dictionary entities it matches
+            after spaCy's (see src/entity_matcher.py).
+
+    Returns:
+        pd.DataFrame: A copy of `df` with the NLP feature columns.
+    """
+    df = df.copy()
+    texts = df['content_cleaned'].tolist()
+
+    if cache is None:
+        scores, entities = _score_texts(
+            texts, nlp_model, batch_size, n_process, sentiment_backend, client, entity_matcher,
+        )
+    else:
+        hits, misses = cache.hits, cache.misses
+        scores, entities = _score_texts_cached(
+            texts, nlp_model, cache, batch_size, n_process, sentiment_backend, client, entity_matcher,
+        )
+        observe(cache_hits=cache.hits - hits, cache_misses=cache.misses - misses)
+        logger.info(f"NLP cache stats: {cache.stats()}")
+    if sentiment_backend is not None and sentiment_backend.metrics.texts:
+        logger.info(f"Sentiment backend '{sentiment_backend.name}' metrics: {sentiment_backend.metrics.as_dict()}")
+    df['sentiment_score'] = scores
+    df['entities'] = entities
+    return df
+
+def compact_features(df: pd.DataFrame, first_article_id: int = 0, keep_text: bool = False) -> tuple:
+    """
+    Shrinks NLP features for storage: adds an int32 'article_id' (the row in the
+    features table), stores scores as float32, drops the raw text columns and
+    moves the entities into a separate entity table (see src/entities.py).
+
+    Args:
+        df (pd.DataFrame): Output of add_nlp_features.
+        first_article_id (int): Id of the first row, e.g. the rows already in the table.
+        keep_text (bool): Keep the raw 'title' and 'content' columns.
+
+    Returns:
+        tuple: (features_df, entities_df).
+    """
+    article_ids = np.arange(first_article_id, first_article_id + len(df), dtype=np.int32)
+    entities_df = encode_entities(df['entities'].tolist(), article_ids)
+    df = df.drop(columns=['entities'])
+    if not keep_text:
+        df = df.drop(columns=[col for col in RAW_TEXT_COLUMNS if col in df.columns])
+    df['sentiment_score'] = df['sentiment_score'].astype(np.float32)
+    df.insert(0, 'article_id', article_ids)
+    return df, entities_df
+
+@instrumented('nlp')
+def process_nlp_features(
+    input_path: str,
+    output_path: str,
+    batch_size: int = 256,
+    n_process: int = 1,
+    cache: NLPCache = None,
+    sentiment_backend: SentimentBackend = None,
+    entities_path: str = None,
+    keep_text: bool = False,
+    daemon_socket: str = None,
+    ner: str = 'spacy',
+    entity_matcher: EntityMatcher = None,
+):
     """
     Reads cleaned news data, applies sentiment analysis and NER,
     and saves the enriched data.
+
+    With `entities_path`, the features are compacted (see compact_features) and
+    the entities are written to their own table; otherwise they stay a column
+    of (text, label) lists.
+
+    Args:
+        input_path (str): Path to the cleaned news table.
+        output_path (str): Path to save the features table; the extension picks the format.
+        batch_size (int): Number of texts per spaCy batch.
+        n_process (int): Number of worker processes for sentiment and spaCy.
+        cache (NLPCache): Optional result cache; only texts not in it are scored.
+        sentiment_backend (SentimentBackend): The sentiment model; VADER if None.
+        entities_path (str): Path to save the entity table.
+        keep_text (bool): Keep the raw 'title' and 'content' columns in a compact table.
+        daemon_socket (str): Socket of an NLP daemon with the models loaded. When
+            one is listening there with the same sentiment backend, it scores the
+            texts and no model is loaded here; otherwise scoring runs in-process.
+        ner (str): Where entities come from: 'spacy', 'matcher' (the alias
+            dictionary of `entity_matcher`, no spaCy model is loaded) or 'both'.
+        entity_matcher (EntityMatcher): The matcher of the 'matcher' and 'both'
+            modes; the built-in dictionary if None.
+
+    Raises:
+        ValueError: If `ner` is not one of NER_MODES.
     """
-    download_nlp_models()
-    sid = SentimentIntensityAnalyzer()
-    nlp = spacy.load('en_core_web_sm')
-    df = pd.read_csv(input_path)
+    if ner not in NER_MODES:
+        raise ValueError(f"Unknown NER mode '{ner}'; expected one of {NER_MODES}")
+    use_spacy = ner != 'matcher'
+    if ner != 'spacy' and entity_matcher is None:
+        entity_matcher = EntityMatcher()
+    elif ner == 'spacy':
+        entity_matcher = None
 
-    df['sentiment_score'] = df['content_cleaned'].apply(lambda text: analyze_sentiment(text, sid))
-    df['entities'] = df['content_cleaned'].apply(lambda text: extract_entities(text, nlp))
+    # The daemon serves spaCy's entities; the matcher needs no warm model.
+    client = connect_daemon(daemon_socket, sentiment_backend) if daemon_socket and use_spacy else None
+    if client is None:
+        download_nlp_models(include_spacy=use_spacy)
+        nlp = load_ner_model() if use_spacy else None
+    else:
+        nlp = None
+    df = read_table(input_path)
+
+    try:
+        df = add_nlp_features(
+            df, nlp, batch_size=batch_size, n_process=n_process, cache=cache,
+            sentiment_backend=sentiment_backend, client=client, entity_matcher=entity_matcher,
+        )
+    finally:
+        if client is not None:
+            client.close()
+    observe(rows_in=len(df), rows_out=len(df))
 
-    df.to_csv(output_path, index=False, encoding='utf-8')
-    print(f"Successfully processed NLP features and saved to {output_path}")
+    if entities_path is not None:
+        df, entities_df = compact_features(df, keep_text=keep_text)
+        write_table(entities_df, entities_path)
+        logger.info(f"Saved {len(entities_df)} entity mentions to {entities_path}")
+    write_table(df, output_path)
+    logger.info(f"Successfully processed NLP features and saved to {output_path}")
 
 def _load_config_for_main():
     config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
@@ -56,7 +327,10 @@ def _load_config_for_main():
 
 if __name__ == '__main__':
     config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
     news_config = config['news']
+    nlp_config = config.get('nlp', {})
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
 
     QUERY = news_config['query']
     FROM_DATE = str(news_config['from_date'])
@@ -66,12 +340,41 @@ if __name__ == '__main__':
     data_dir = os.path.join(script_dir, '..', 'data')
     processed_news_dir = os.path.join(data_dir, 'processed_news')
 
-    INPUT_PATH = os.path.join(processed_news_dir, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}.csv")
+    INPUT_PATH = os.path.join(processed_news_dir, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
     OUTPUT_DIR = processed_news_dir
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}.csv")
+    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"features_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
+    # Datasets are partitioned by time, which entity mentions do not have.
+    ENTITIES_PATH = os.path.join(OUTPUT_DIR, f"entities_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT or '.parquet'}")
 
     if not os.path.exists(INPUT_PATH):
-        print(f"Input file not found: {INPUT_PATH}")
+        logger.error(f"Input file not found: {INPUT_PATH}")
     else:
-        process_nlp_features(INPUT_PATH, OUTPUT_PATH)
+        cache_config = nlp_config.get('cache', {})
+        cache = None
+        if cache_config.get('enabled', False):
+            cache = NLPCache(
+                os.path.join(data_dir, 'cache', 'nlp_cache.sqlite'),
+                max_entries=cache_config.get('max_entries'),
+                max_age_days=cache_config.get('max_age_days'),
+            )
+        daemon_config = nlp_config.get('daemon', {})
+        daemon_socket = None
+        if daemon_config.get('enabled', False):
+            daemon_socket = daemon_config.get('socket', os.path.join(data_dir, 'cache', 'nlp_daemon.sock'))
+        ner = nlp_config.get('ner', 'spacy')
+        entity_matcher = None
+        if ner != 'spacy':
+            entity_matcher = EntityMatcher.from_config(nlp_config.get('matcher', {}), assets=load_universe(config))
+        process_nlp_features(
+            INPUT_PATH, OUTPUT_PATH,
+            batch_size=nlp_config.get('batch_size', 256),
+            n_process=nlp_config.get('n_process', 1),
+            cache=cache,
+            sentiment_backend=create_backend(**nlp_config.get('sentiment', {})),
+            entities_path=ENTITIES_PATH,
+            keep_text=nlp_config.get('keep_text', False),
+            daemon_socket=daemon_socket,
+            ner=ner,
+            entity_matcher=entity_matcher,
+        )
@@ -1,31 +1,211 @@
 import os
+import gzip
+import json
+import base64
+import logging
 import yaml
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from src.storage import read_table, EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
 
+logger = logging.getLogger(__name__)
+
+PLOT_MODES = ('full', 'fast')
+DOWNSAMPLERS = ('lttb', 'minmax')
+# Global the data file of a 'fast' plot assigns its gzipped, base64-encoded traces to.
+_DATA_GLOBAL = 'NEWS2ALPHA_PLOT_DATA'
+
+def bucket_edges(n: int, buckets: int) -> np.ndarray:
+    """Start offsets of `buckets` near-equal runs of `n` rows, followed by `n`."""
+    return np.unique(np.linspace(0, n, min(buckets, n) + 1).astype(np.int64))
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: picks `n_out` points keeping
+    the visual shape of the line, always including the first and last points.
+
+    Returns:
+        np.ndarray: Sorted row positions of the kept points.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        # Twice the area of the triangle (previous point, candidate, next bucket's average).
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+def minmax_downsample(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Keeps the minimum and maximum of each of `n_out // 2` buckets, so spikes
+    survive at any zoom level of the overview.
+
+    Returns:
+        np.ndarray: Sorted row positions of the kept points.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = bucket_edges(n, max(n_out // 2, 1))
+    kept = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        kept += [start + int(np.argmin(y[start:end])), start + int(np.argmax(y[start:end]))]
+    return np.unique(kept)
+
+def downsample_series(series: pd.Series, n_out: int, method: str = 'lttb') -> pd.Series:
+    """
+    Downsamples a time-indexed series to about `n_out` points, ignoring NaNs.
+
+    Raises:
+        ValueError: If the method is unknown.
+    """
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method: {method}. Choose from {DOWNSAMPLERS}.")
+    series = series.dropna()
+    if method == 'lttb':
+        kept = lttb(series.index.as_unit('ns').asi8, series.to_numpy(), n_out)
+    else:
+        kept = minmax_downsample(series.to_numpy(), n_out)
+    return series.iloc[kept]
+
+def aggregate_ohlc(df: pd.DataFrame, buckets: int) -> pd.DataFrame:
+    """
+    Aggregates candles into about `buckets` wider OHLC bars, and sums the news
+    volume of each bar. Without Open/High/Low columns, they are built from Close.
+    """
+    edges = bucket_edges(len(df), buckets)
+    starts, lasts = edges[:-1], edges[1:] - 1
+    close = df['Close'].to_numpy(dtype=np.float64)
+    high = df['High'].to_numpy(dtype=np.float64) if 'High' in df else close
+    low = df['Low'].to_numpy(dtype=np.float64) if 'Low' in df else close
+    open_ = df['Open'].to_numpy(dtype=np.float64) if 'Open' in df else close
+    bars = pd.DataFrame({
+        'Open': open_[starts],
+        'High': np.maximum.reduceat(high, starts),
+        'Low': np.minimum.reduceat(low, starts),
+        'Close': close[lasts],
+    }, index=df.index[starts])
+    if 'news_count' in df:
+        bars['news_count'] = np.add.reduceat(df['news_count'].fillna(0).to_numpy(dtype=np.float64), starts)
+    return bars
+
+def _write_split_html(fig, output_html_path: str):
+    """
+    Writes the figure's layout to `output_html_path` and its traces to a
+    gzipped data file next to it, which the page loads and renders. The data
+    file is a script, so the page also works when opened from disk; plotly.js
+    is written once to the same directory instead of being inlined.
+    """
+    import plotly.graph_objects as go
+
+    data_path = f"{os.path.splitext(output_html_path)[0]}.data.js"
+    traces = json.loads(fig.to_json())['data']
+    payload = base64.b64encode(gzip.compress(json.dumps(traces).encode('utf-8'))).decode('ascii')
+    with open(data_path, 'w') as f:
+        f.write(f'window.{_DATA_GLOBAL} = "{payload}";\n')
+
+    layout_only = go.Figure(layout=fig.layout)
+    post_script = f"""
+var gd = document.getElementById('{{plot_id}}');
+var script = document.createElement('script');
+script.src = {json.dumps(os.path.basename(data_path))};
+script.onload = function() {{
+    var bytes = Uint8Array.from(atob(window.{_DATA_GLOBAL}), function(c) {{ return c.charCodeAt(0); }});
+    var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+    new Response(stream).json().then(function(data) {{ Plotly.react(gd, data, gd.layout); }});
+}};
+document.head.appendChild(script);
+"""
+    layout_only.write_html(output_html_path, include_plotlyjs='directory', post_script=post_script)
+    return data_path
+
+@instrumented('plot')
 def plot_signals(
     final_features_path: str, 
     output_html_path: str, 
-    ticker: str
+    ticker: str,
+    mode: str = 'full',
+    width_px: int = 2000,
+    downsample: str = 'lttb',
+    ohlc: bool = False,
 ):
     """
     Creates an interactive plot of market price, sentiment, and news volume.
+
+    The 'full' mode plots every candle into one self-contained HTML file. The
+    'fast' mode is meant for long ranges: series are downsampled to about one
+    point per horizontal pixel and drawn with WebGL, and the traces go to a
+    compressed data file next to the HTML.
+
+    Args:
+        final_features_path (str): Path to the aligned features table.
+        output_html_path (str): Path of the HTML page.
+        ticker (str): Symbol shown in the titles.
+        mode (str): 'full' or 'fast'.
+        width_px (int): Plot width in pixels; the 'fast' point budget per trace.
+        downsample (str): 'lttb' (shape preserving) or 'minmax' (keeps spikes) in 'fast' mode.
+        ohlc (bool): In 'fast' mode, draw price as about `width_px / 4` OHLC bars
+            instead of a downsampled close line.
+
+    Raises:
+        ValueError: If the mode or downsampling method is unknown.
     """
-    df = pd.read_csv(final_features_path, index_col='Date', parse_dates=True)
+    # Plotly is imported here, not with the module, to keep CLI startup fast.
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown plot mode: {mode}. Choose from {PLOT_MODES}.")
+    if downsample not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method: {downsample}. Choose from {DOWNSAMPLERS}.")
+    df = read_table(final_features_path, index_col='Date')
+    observe(rows_in=len(df))
 
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, 
                           vertical_spacing=0.1, 
                           subplot_titles=(f'{ticker} Price', 'Sentiment and News Volume'),
                           row_heights=[0.7, 0.3])
 
-    fig.add_trace(go.Scatter(x=df.index, y=df['Close'], name='Close Price'), row=1, col=1)
+    if mode == 'full':
+        fig.add_trace(go.Scatter(x=df.index, y=df['Close'], name='Close Price'), row=1, col=1)
 
-    fig.add_trace(go.Scatter(x=df.index, y=df['sentiment_mean'], name='Mean Sentiment', 
-                               line=dict(color='orange')), row=2, col=1)
-    
-    fig.add_trace(go.Bar(x=df.index, y=df['news_count'], name='News Volume', 
-                           marker=dict(color='lightblue'), opacity=0.5), row=2, col=1)
+        fig.add_trace(go.Scatter(x=df.index, y=df['sentiment_mean'], name='Mean Sentiment', 
+                                   line=dict(color='orange')), row=2, col=1)
+        
+        fig.add_trace(go.Bar(x=df.index, y=df['news_count'], name='News Volume', 
+                               marker=dict(color='lightblue'), opacity=0.5), row=2, col=1)
+    else:
+        if ohlc:
+            # Candlesticks need a few pixels each to be readable.
+            bars = aggregate_ohlc(df, max(width_px // 4, 1))
+            fig.add_trace(go.Candlestick(x=bars.index, open=bars['Open'], high=bars['High'], low=bars['Low'],
+                                         close=bars['Close'], name='Price'), row=1, col=1)
+        else:
+            close = downsample_series(df['Close'], width_px, downsample)
+            fig.add_trace(go.Scattergl(x=close.index, y=close, name='Close Price'), row=1, col=1)
+
+        sentiment = downsample_series(df['sentiment_mean'], width_px, downsample)
+        fig.add_trace(go.Scattergl(x=sentiment.index, y=sentiment, name='Mean Sentiment',
+                                   line=dict(color='orange')), row=2, col=1)
+
+        # Volume is summed, not sampled, so the bars keep the total news count.
+        volume = aggregate_ohlc(df, width_px)['news_count']
+        fig.add_trace(go.Bar(x=volume.index, y=volume, name='News Volume',
+                             marker=dict(color='lightblue'), opacity=0.5), row=2, col=1)
+        observe(rows_out=sum(len(trace.x) for trace in fig.data))
 
     fig.update_layout(
         title_text=f'Crypto Alpha Signals: {ticker}',
@@ -35,8 +215,13 @@ def plot_signals(
     fig.update_yaxes(title_text="Price (USD)", row=1, col=1)
     fig.update_yaxes(title_text="Sentiment", row=2, col=1)
 
-    fig.write_html(output_html_path)
-    print(f"Successfully created and saved plot to {output_html_path}")
+    if mode == 'full':
+        fig.write_html(output_html_path)
+    else:
+        fig.update_layout(width=width_px)
+        data_path = _write_split_html(fig, output_html_path)
+        logger.info(f"Saved plot data to {data_path}")
+    logger.info(f"Successfully created and saved plot to {output_html_path}")
 
 def _load_config_for_main():
     config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
@@ -47,12 +232,15 @@ def _load_config_for_main():
 
 if __name__ == '__main__':
     config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
     news_config = config['news']
     market_config = config['market']
 
     FROM_DATE = str(news_config['from_date'])
     TO_DATE = str(news_config['to_date'])
     SYMBOL = market_config['symbol']
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+    plot_config = config.get('plot', {})
 
     script_dir = os.path.dirname(__file__)
     data_dir = os.path.join(script_dir, '..', 'data')
@@ -60,7 +248,7 @@ if __name__ == '__main__':
 
     INPUT_PATH = os.path.join(
         final_features_dir,
-        f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}.csv"
+        f"final_{SYMBOL}_{FROM_DATE}_{TO_DATE}{EXT}"
     )
 
     OUTPUT_DIR = final_features_dir
@@ -68,6 +256,12 @@ if __name__ == '__main__':
     OUTPUT_HTML_PATH = os.path.join(OUTPUT_DIR, f"plot_{SYMBOL}_{FROM_DATE}_{TO_DATE}.html")
 
     if not os.path.exists(INPUT_PATH):
-        print(f"Input file not found: {INPUT_PATH}")
+        logger.error(f"Input file not found: {INPUT_PATH}")
     else:
-        plot_signals(INPUT_PATH, OUTPUT_HTML_PATH, SYMBOL)
+        plot_signals(
+            INPUT_PATH, OUTPUT_HTML_PATH, SYMBOL,
+            mode=plot_config.get('mode', 'full'),
+            width_px=plot_config.get('width_px', 2000),
+            downsample=plot_config.get('downsample', 'lttb'),
+            ohlc=plot_config.get('ohlc', False),
+        )
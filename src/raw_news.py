@@ -0,0 +1,129 @@
+import os
+import io
+import gzip
+import json
+from itertools import islice
+
+# File extension for each raw news format. JSON Lines files hold one article
+# per line and can be read, appended to and cleaned in bounded memory; '.json'
+# is the original single {"articles": [...]} document.
+RAW_NEWS_EXTENSIONS = {
+    'json': '.json',
+    'jsonl': '.jsonl',
+    'jsonl.gz': '.jsonl.gz',
+    'jsonl.zst': '.jsonl.zst',
+}
+
+def is_jsonl(path: str) -> bool:
+    """Whether a raw news path is JSON Lines (possibly compressed)."""
+    return any(path.endswith(ext) for ext in ('.jsonl', '.jsonl.gz', '.jsonl.zst'))
+
+def article_key(article: dict):
+    """
+    Identifies a raw article by its URL, or by (publishedAt, title) when it has
+    none. URLs are compared without their fragment, trailing slash and case, as
+    sources link the same article in slightly different forms.
+    """
+    url = article.get('url')
+    if url:
+        return url.split('#')[0].rstrip('/').lower()
+    return (article.get('publishedAt'), article.get('title'))
+
+def _open(path: str, mode: str):
+    """Opens a raw news file as text, (de)compressing by extension."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError("Reading or writing .zst raw news requires the 'zstandard' package.") from e
+        # Appending adds a new zstd frame; concatenated frames decode as one stream.
+        raw = open(path, mode + 'b')
+        if mode == 'r':
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True, read_across_frames=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+def iter_raw_articles(path: str):
+    """
+    Yields the articles of a raw news file one at a time.
+
+    JSON Lines files are streamed; a legacy '.json' document is loaded whole.
+
+    Raises:
+        ValueError: If the file is not valid JSON or a legacy document has no 'articles' key.
+    """
+    if not os.path.exists(path):
+        return
+    if not is_jsonl(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if 'articles' not in data:
+            raise ValueError(f"JSON file {path} does not have an 'articles' key.")
+        yield from data['articles']
+        return
+
+    with _open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def iter_article_chunks(path: str, chunk_size: int = 50000, skip: int = 0):
+    """Yields lists of at most `chunk_size` articles, after skipping the first `skip`."""
+    articles = islice(iter_raw_articles(path), skip, None)
+    while True:
+        chunk = list(islice(articles, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def read_raw_articles(path: str) -> list:
+    """Reads all articles of a raw news file, or [] if it does not exist."""
+    return list(iter_raw_articles(path))
+
+def write_raw_articles(articles, path: str, append: bool = False):
+    """
+    Writes articles to a raw news file in the format implied by its extension.
+
+    JSON Lines files are written (or appended to) one article at a time. A
+    legacy '.json' document is always rewritten whole.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if not is_jsonl(path):
+        if append:
+            articles = read_raw_articles(path) + list(articles)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'articles': list(articles)}, f, ensure_ascii=False, indent=4)
+        return
+
+    with _open(path, 'a' if append else 'w') as f:
+        for article in articles:
+            f.write(json.dumps(article, ensure_ascii=False))
+            f.write('\n')
+
+class RawArticleWriter:
+    """
+    Appends articles to a JSON Lines raw news file through one handle kept open
+    until close(), flushing after each, for long sessions such as recording a
+    stream. Legacy '.json' documents cannot be appended to without rewriting.
+
+    Raises:
+        ValueError: If `path` is not a JSON Lines path.
+    """
+
+    def __init__(self, path: str):
+        if not is_jsonl(path):
+            raise ValueError(f"Cannot append articles to {path}; use a JSON Lines extension.")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = _open(path, 'a')
+
+    def __call__(self, article: dict):
+        self._file.write(json.dumps(article, ensure_ascii=False))
+        self._file.write('\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,260 @@
+import time
+import numpy as np
+from collections import deque
+
+DEFAULT_TRANSFORMER_MODEL = 'ProsusAI/finbert'
+# Label order of ProsusAI/finbert, used when an ONNX export carries no label names.
+FINBERT_LABELS = ('positive', 'negative', 'neutral')
+
+class InferenceMetrics:
+    """
+    Throughput and latency counters of a sentiment backend.
+
+    Args:
+        maxlen (int): Number of batch latencies kept for the percentiles.
+    """
+
+    def __init__(self, maxlen: int = 10000):
+        self.texts = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self._latencies = deque(maxlen=maxlen)
+
+    def record(self, n_texts: int, seconds: float, tokens: int = 0, padded_tokens: int = 0):
+        self.texts += n_texts
+        self.batches += 1
+        self.seconds += seconds
+        self.tokens += tokens
+        self.padded_tokens += padded_tokens
+        self._latencies.append(seconds)
+
+    def as_dict(self) -> dict:
+        """Texts scored, texts/sec, p50/p95 batch latency and the share of non-padding tokens."""
+        latencies = np.asarray(self._latencies) * 1000
+        return {
+            'texts': self.texts,
+            'batches': self.batches,
+            'texts_per_sec': self.texts / self.seconds if self.seconds else 0.0,
+            'p50_batch_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+            'p95_batch_ms': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+            'padding_efficiency': self.tokens / self.padded_tokens if self.padded_tokens else 1.0,
+        }
+
+class SentimentBackend:
+    """
+    Scores texts with a sentiment model, returning one score in [-1, 1] per text.
+
+    Models are loaded lazily on the first call to score(), so a backend can be
+    built cheaply in the parent process and loads once in each worker.
+    """
+    name = None
+
+    def __init__(self, **options):
+        self.options = options
+        self.metrics = InferenceMetrics()
+
+    @property
+    def spec(self) -> tuple:
+        """A picklable (name, options) pair that create_backend rebuilds this backend from."""
+        return self.name, self.options
+
+    @property
+    def model_id(self) -> str:
+        """Identifies the model, so cached results are tied to it."""
+        raise NotImplementedError
+
+    def load(self):
+        """Loads the model if it is not loaded yet."""
+
+    def score(self, texts: list) -> list:
+        """Scores texts in input order; empty or non-string texts score 0.0."""
+        scores = [0.0] * len(texts)
+        valid_idx = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+        if valid_idx:
+            self.load()
+            for i, score in zip(valid_idx, self._score([texts[i] for i in valid_idx])):
+                scores[i] = float(score)
+        return scores
+
+    def _score(self, texts: list) -> list:
+        raise NotImplementedError
+
+class VaderBackend(SentimentBackend):
+    """NLTK's VADER lexicon; the score is the compound polarity."""
+    name = 'vader'
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._sid = None
+
+    @property
+    def model_id(self) -> str:
+        import nltk
+        return f"vader:{nltk.__version__}"
+
+    def load(self):
+        if self._sid is None:
+            from nltk.sentiment import vader
+            self._sid = vader.SentimentIntensityAnalyzer()
+
+    def _score(self, texts: list) -> list:
+        start = time.perf_counter()
+        scores = [self._sid.polarity_scores(text)['compound'] for text in texts]
+        self.metrics.record(len(texts), time.perf_counter() - start)
+        return scores
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+class _TransformerBackend(SentimentBackend):
+    """
+    Shared batching for sequence-classification transformers.
+
+    Texts are sorted by length and cut into batches, and each batch is padded
+    only to its own longest text, so little compute is spent on padding. The
+    score is P(positive) - P(negative).
+    """
+
+    def __init__(self, model=DEFAULT_TRANSFORMER_MODEL, batch_size=32, max_length=256, num_threads=None,
+                 tokenizer=None, **options):
+        super().__init__(model=model, batch_size=batch_size, max_length=max_length, num_threads=num_threads, **options)
+        self.model_name = model
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.tokenizer = tokenizer
+        self.labels = None
+
+    def _load_tokenizer(self):
+        if self.tokenizer is None:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+
+    def _label_index(self, label: str) -> int:
+        return [name.lower() for name in self.labels].index(label)
+
+    def _score(self, texts: list) -> list:
+        scores = np.zeros(len(texts))
+        positive, negative = self._label_index('positive'), self._label_index('negative')
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            batch_start = time.perf_counter()
+            encoded = self.tokenizer(
+                [texts[i] for i in idx], padding='longest', truncation=True,
+                max_length=self.max_length, return_tensors=self._tensor_type,
+            )
+            probs = _softmax(np.asarray(self._logits(encoded), dtype=np.float64))
+            scores[idx] = probs[:, positive] - probs[:, negative]
+            mask = np.asarray(encoded['attention_mask'])
+            self.metrics.record(len(idx), time.perf_counter() - batch_start, int(mask.sum()), mask.size)
+        return scores.tolist()
+
+class TransformerBackend(_TransformerBackend):
+    """
+    A Hugging Face transformer (FinBERT by default) run with PyTorch on CPU.
+
+    Args:
+        model: Hugging Face model name or path.
+        batch_size: Texts per inference batch.
+        max_length: Tokens per text; longer texts are truncated.
+        quantize: Apply dynamic int8 quantization to the Linear layers.
+        num_threads: torch intra-op threads, or None for torch's default.
+    """
+    name = 'finbert'
+    _tensor_type = 'pt'
+
+    def __init__(self, model=DEFAULT_TRANSFORMER_MODEL, batch_size=32, max_length=256, quantize=False,
+                 num_threads=None, tokenizer=None):
+        super().__init__(model=model, batch_size=batch_size, max_length=max_length, num_threads=num_threads,
+                         tokenizer=tokenizer, quantize=quantize)
+        self.quantize = quantize
+        self._model = None
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}:{self.model_name}:{'int8' if self.quantize else 'fp32'}:{self.max_length}"
+
+    def load(self):
+        if self._model is not None:
+            return
+        import torch
+        from transformers import AutoModelForSequenceClassification
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        self._load_tokenizer()
+        model = AutoModelForSequenceClassification.from_pretrained(self.model_name).eval()
+        if self.quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self._model = model
+        self.labels = [model.config.id2label[i] for i in range(model.config.num_labels)]
+
+    def _logits(self, encoded):
+        import torch
+        with torch.inference_mode():
+            return self._model(**encoded).logits.float().numpy()
+
+class OnnxBackend(_TransformerBackend):
+    """
+    A transformer exported to ONNX (optionally int8-quantized) run with onnxruntime on CPU.
+
+    Args:
+        onnx_path: Path of the .onnx model.
+        model: Hugging Face name or path of the matching tokenizer.
+        labels: Output label names in logit order.
+        batch_size: Texts per inference batch.
+        max_length: Tokens per text; longer texts are truncated.
+        num_threads: onnxruntime intra-op threads, or None for its default.
+        session: An already created inference session (e.g. a test double).
+    """
+    name = 'onnx'
+    _tensor_type = 'np'
+
+    def __init__(self, onnx_path=None, model=DEFAULT_TRANSFORMER_MODEL, labels=FINBERT_LABELS, batch_size=32,
+                 max_length=256, num_threads=None, tokenizer=None, session=None):
+        super().__init__(model=model, batch_size=batch_size, max_length=max_length, num_threads=num_threads,
+                         tokenizer=tokenizer, onnx_path=onnx_path, labels=list(labels))
+        self.onnx_path = onnx_path
+        self.labels = list(labels)
+        self._session = session
+
+    @property
+    def model_id(self) -> str:
+        return f"{self.name}:{self.onnx_path}:{self.model_name}:{self.max_length}"
+
+    def load(self):
+        self._load_tokenizer()
+        if self._session is not None:
+            return
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self._session = onnxruntime.InferenceSession(
+            self.onnx_path, sess_options=options, providers=['CPUExecutionProvider'],
+        )
+
+    def _logits(self, encoded):
+        names = {model_input.name for model_input in self._session.get_inputs()}
+        feeds = {name: np.asarray(value, dtype=np.int64) for name, value in encoded.items() if name in names}
+        return self._session.run(None, feeds)[0]
+
+SENTIMENT_BACKENDS = {
+    'vader': VaderBackend,
+    'finbert': TransformerBackend,
+    'onnx': OnnxBackend,
+}
+
+def create_backend(backend: str = 'vader', **options) -> SentimentBackend:
+    """
+    Builds a sentiment backend by name, e.g. from the nlp.sentiment config section.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend not in SENTIMENT_BACKENDS:
+        raise ValueError(f"Unknown sentiment backend: {backend}. Choose from {sorted(SENTIMENT_BACKENDS)}.")
+    return SENTIMENT_BACKENDS[backend](**options)
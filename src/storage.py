@@ -0,0 +1,305 @@
+import os
+import re
+import ast
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# File extension for each storage format. A path without an extension is a
+# hive-partitioned Parquet dataset directory.
+EXTENSIONS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+    'dataset': '',
+}
+TIME_COLUMNS = ('publishedAt', 'Date')
+PARTITION_COLUMNS = ('symbol', 'date')
+# Datasets record when and in which order rows were written, so reads return
+# rows in append order regardless of how they are spread over partitions.
+ORDER_COLUMNS = ('_write_seq', '_row')
+ENTITIES_TYPE = pa.list_(pa.struct([('text', pa.string()), ('label', pa.string())]))
+_PART_NAME = re.compile(r'^part-(\d+)-\d+\.parquet$')
+
+def storage_format(path: str) -> str:
+    """Infers the storage format of a path from its extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '':
+        return 'dataset'
+    if ext == '.feather':
+        return 'arrow'
+    for fmt, fmt_ext in EXTENSIONS.items():
+        if fmt_ext == ext:
+            return fmt
+    raise ValueError(f"Unknown storage format for path: {path}")
+
+def _parse_entities(value) -> list:
+    """
+    Normalizes an entities cell to a list of (text, label) tuples. Handles
+    stringified lists from CSV and list<struct> values from Arrow.
+    """
+    if isinstance(value, str):
+        try:
+            value = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+    if value is None or isinstance(value, float):
+        return []
+    return [(ent['text'], ent['label']) if isinstance(ent, dict) else tuple(ent) for ent in value]
+
+def _restore_types(df: pd.DataFrame) -> pd.DataFrame:
+    """Parses timestamps as UTC and entities as lists of (text, label) tuples."""
+    for col in TIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True)
+    if 'entities' in df.columns:
+        df['entities'] = [_parse_entities(value) for value in df['entities']]
+    return df
+
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    """Converts a frame to Arrow with UTC timestamp and list<struct> entity columns."""
+    df = df.copy()
+    for col in TIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], utc=True)
+    if df.index.name in TIME_COLUMNS:
+        df.index = pd.to_datetime(df.index, utc=True)
+
+    entities = None
+    if 'entities' in df.columns:
+        entities = pa.array([_parse_entities(value) for value in df['entities']], type=ENTITIES_TYPE)
+        df = df.drop(columns=['entities'])
+    table = pa.Table.from_pandas(df, preserve_index=df.index.name is not None)
+    if entities is not None:
+        table = table.append_column('entities', entities)
+    return table
+
+def with_partition_columns(df: pd.DataFrame, symbol: str = None) -> pd.DataFrame:
+    """Adds the 'date' (and optionally 'symbol') columns used to partition datasets."""
+    df = df.copy()
+    if df.index.name in TIME_COLUMNS:
+        times = pd.to_datetime(df.index, utc=True)
+    else:
+        time_col = next(col for col in TIME_COLUMNS if col in df.columns)
+        times = pd.to_datetime(df[time_col], utc=True)
+    df['date'] = pd.DatetimeIndex(times).strftime('%Y-%m-%d')
+    if symbol is not None:
+        df['symbol'] = symbol
+    return df
+
+def _dataset_tail_filter(dataset, skip: int):
+    """A filter on the write order columns keeping the rows after the first `skip` in append order."""
+    order = dataset.to_table(columns=list(ORDER_COLUMNS)).to_pandas()
+    if skip >= len(order):
+        return None
+    order = order.sort_values(list(ORDER_COLUMNS), ignore_index=True)
+    seq, row = (int(value) for value in order.iloc[skip])
+    return (ds.field('_write_seq') > seq) | ((ds.field('_write_seq') == seq) & (ds.field('_row') >= row))
+
+def read_table(path: str, index_col: str = None, columns: list = None, filters=None, skip: int = 0) -> pd.DataFrame:
+    """
+    Reads a stage output written by write_table (or a plain CSV).
+
+    Args:
+        path (str): File path, or a directory for a partitioned dataset.
+        index_col (str): Column to set as the index, e.g. 'Date'.
+        columns (list): Optional subset of columns to read.
+        filters: Optional pyarrow filter expression or DNF list, e.g.
+            [('symbol', '=', 'BTCUSDT')] (Parquet/dataset only).
+        skip (int): Number of leading rows (in append order) to leave out, so
+            incremental stages only decode the rows past their offset. Parquet
+            skips whole row groups and datasets filter on the write order;
+            CSV and Arrow files are still scanned.
+
+    Returns:
+        pd.DataFrame: The table with UTC timestamps and list-valued entities.
+    """
+    fmt = storage_format(path)
+    if fmt == 'csv':
+        df = pd.read_csv(path, usecols=columns, skiprows=range(1, skip + 1) if skip else None)
+    elif fmt == 'parquet':
+        if skip:
+            parquet_file = pq.ParquetFile(path)
+            metadata = parquet_file.metadata
+            first, start = 0, 0
+            while first < metadata.num_row_groups and start + metadata.row_group(first).num_rows <= skip:
+                start += metadata.row_group(first).num_rows
+                first += 1
+            table = parquet_file.read_row_groups(range(first, metadata.num_row_groups), columns=columns)
+            table = table.slice(skip - start)
+            if filters is not None:
+                table = table.filter(pq.filters_to_expression(filters) if isinstance(filters, list) else filters)
+            df = table.to_pandas()
+        else:
+            df = pq.read_table(path, columns=columns, filters=filters).to_pandas()
+    elif fmt == 'arrow':
+        df = feather.read_table(path, columns=columns).slice(skip).to_pandas()
+    else:
+        dataset = ds.dataset(path, format='parquet', partitioning='hive')
+        if isinstance(filters, list):
+            filters = pq.filters_to_expression(filters)
+        if skip:
+            tail = _dataset_tail_filter(dataset, skip)
+            if tail is None:
+                tail = ds.field('_write_seq') < 0
+            filters = tail if filters is None else filters & tail
+        scan_columns = None if columns is None else list(columns) + list(ORDER_COLUMNS)
+        df = dataset.to_table(columns=scan_columns, filter=filters).to_pandas()
+        if df.index.name is not None:
+            df = df.reset_index()
+        df = df.sort_values(list(ORDER_COLUMNS), ignore_index=True)
+        df = df.drop(columns=[col for col in PARTITION_COLUMNS + ORDER_COLUMNS if col in df.columns])
+
+    if df.index.name is not None:
+        df = df.reset_index()
+    df = _restore_types(df)
+    if index_col is not None:
+        df = df.set_index(index_col)
+    return df
+
+def _next_write_seq(path: str) -> int:
+    """The sequence number of the next write to a dataset: one past the highest part file name."""
+    seqs = [
+        int(match.group(1))
+        for _, _, names in os.walk(path)
+        for match in map(_PART_NAME.match, names) if match
+    ]
+    return max(seqs) + 1 if seqs else 0
+
+def write_table(df: pd.DataFrame, path: str, append: bool = False, symbol: str = None):
+    """
+    Writes a stage output in the format implied by `path`.
+
+    A named index (e.g. 'Date') is kept. Partitioned datasets are split by
+    symbol (when given) and UTC date; rewriting replaces the whole dataset
+    (or the symbol's partition), appending adds new files next to them. Part
+    files are numbered by write, so rewriting the same rows gives the same bytes.
+
+    CSV files and datasets append in O(new rows). Parquet and Arrow files
+    cannot be appended to in place, so appending rewrites the whole file;
+    incremental runs over a long history should use 'dataset' storage.
+
+    Args:
+        df (pd.DataFrame): The table to write.
+        path (str): Destination file, or a directory for a partitioned dataset.
+        append (bool): Append to an existing table instead of replacing it.
+        symbol (str): Market symbol used as the outer dataset partition.
+    """
+    fmt = storage_format(path)
+    if fmt != 'dataset':
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    exists = os.path.exists(path)
+
+    if fmt == 'csv':
+        write_index = df.index.name is not None
+        if append and exists:
+            df.to_csv(path, mode='a', header=False, index=write_index, encoding='utf-8')
+        else:
+            df.to_csv(path, index=write_index, encoding='utf-8')
+    elif fmt in ('parquet', 'arrow'):
+        if append and exists:
+            existing = read_table(path, index_col=df.index.name)
+            df = pd.concat([existing, df])
+        table = _to_arrow(df)
+        if fmt == 'parquet':
+            pq.write_table(table, path, compression='zstd')
+        else:
+            feather.write_feather(table, path, compression='zstd')
+    else:
+        partition_cols = [col for col in PARTITION_COLUMNS if col != 'symbol' or symbol is not None]
+        if not append:
+            # delete_matching would only replace the partitions (dates) present in `df`.
+            target = path if symbol is None else os.path.join(path, f"symbol={symbol}")
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+        write_seq = _next_write_seq(path) if os.path.isdir(path) else 0
+        df = with_partition_columns(df, symbol=symbol)
+        df['_write_seq'] = write_seq
+        df['_row'] = range(len(df))
+        table = _to_arrow(df)
+        ds.write_dataset(
+            table,
+            path,
+            format='parquet',
+            partitioning=partition_cols,
+            partitioning_flavor='hive',
+            basename_template=f"part-{write_seq}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+        )
+
+class TableWriter:
+    """
+    Writes a stage output chunk by chunk, so memory is bounded by the chunk size.
+
+    Parquet chunks become row groups and Arrow chunks record batches of a
+    single file; CSV files and datasets are appended to. The first chunk fixes
+    the schema (all-null columns are taken to be strings).
+
+    Args:
+        path (str): Destination file, or a directory for a partitioned dataset.
+        symbol (str): Market symbol used as the outer dataset partition.
+    """
+
+    def __init__(self, path: str, symbol: str = None):
+        self.path = path
+        self.symbol = symbol
+        self.format = storage_format(path)
+        self.rows = 0
+        self._writer = None
+        self._sink = None
+        self._schema = None
+
+    def write(self, df: pd.DataFrame):
+        if self.format in ('csv', 'dataset'):
+            write_table(df, self.path, append=self.rows > 0, symbol=self.symbol)
+        else:
+            table = _to_arrow(df)
+            if self._writer is None:
+                self._open(table.schema)
+            self._writer.write_table(table.select(self._schema.names).cast(self._schema))
+        self.rows += len(df)
+
+    def _open(self, schema: pa.Schema):
+        self._schema = pa.schema(
+            [field.with_type(pa.string()) if pa.types.is_null(field.type) else field for field in schema],
+            metadata=schema.metadata,
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.format == 'parquet':
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression='zstd')
+        else:
+            self._sink = pa.OSFile(self.path, 'wb')
+            options = pa.ipc.IpcWriteOptions(compression='zstd')
+            self._writer = pa.ipc.new_file(self._sink, self._schema, options=options)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._sink is not None:
+            self._sink.close()
+        self._writer = self._sink = None
+
+    def discard(self):
+        """Closes the writer and removes whatever was written so far."""
+        self.close()
+        if os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+        self.rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def export_csv(path: str, csv_path: str):
+    """Exports any stored table to CSV."""
+    df = read_table(path)
+    if 'Date' in df.columns:
+        df = df.set_index('Date')
+    write_table(df, csv_path)
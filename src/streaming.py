@@ -0,0 +1,323 @@
+import os
+import logging
+import json
+import time
+import socket
+import bisect
+import numpy as np
+import pandas as pd
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from src.text_cleaner import clean_text
+from src.nlp_processor import analyze_sentiment, extract_entities
+from src.news_fetcher import fetch_articles
+from src.raw_news import article_key, iter_raw_articles
+from src.incremental import NEWS_LOOKBACK
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('clean', 'dedup', 'sentiment', 'ner', 'aggregate', 'emit', 'total')
+
+class LatencyTracker:
+    """
+    Keeps the most recent per-stage latencies of the streaming processor.
+
+    Args:
+        maxlen (int): Number of samples kept per stage.
+    """
+
+    def __init__(self, maxlen: int = 10000):
+        self._samples = defaultdict(lambda: deque(maxlen=maxlen))
+
+    def record(self, stage: str, seconds: float):
+        self._samples[stage].append(seconds)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def summary(self) -> pd.DataFrame:
+        """Returns count and p50/p95/p99/max latency in milliseconds per stage."""
+        rows = []
+        for stage in sorted(self._samples, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            ms = np.asarray(self._samples[stage]) * 1000
+            rows.append({
+                'stage': stage,
+                'count': len(ms),
+                'p50_ms': np.percentile(ms, 50),
+                'p95_ms': np.percentile(ms, 95),
+                'p99_ms': np.percentile(ms, 99),
+                'max_ms': ms.max(),
+            })
+        return pd.DataFrame(rows, columns=['stage', 'count', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+
+class CandleAggregator:
+    """
+    Maintains in memory the news aggregates of the candle each article lands in.
+
+    Uses the same look-ahead-safe rule as align_frames: an article counts for
+    a candle if close - window <= publishedAt + publication_lag < close. Articles
+    arriving up to `window` late still update the candle they belong to.
+
+    Args:
+        interval: Candle interval, e.g. '15m'.
+        window: News lookback per candle, a multiple of `interval`. Defaults to `interval`.
+        publication_lag: Delay added to publishedAt before an article is usable.
+    """
+
+    def __init__(self, interval, window=None, publication_lag=None):
+        self.interval = pd.Timedelta(interval)
+        self.window = pd.Timedelta(window) if window is not None else self.interval
+        self.lag = pd.Timedelta(publication_lag) if publication_lag is not None else pd.Timedelta(0)
+        if self.window < self.interval or self.window % self.interval != pd.Timedelta(0):
+            raise ValueError(f"Window {self.window} must be a multiple of the candle interval {self.interval}.")
+        self._times = [] # available time (ns), sorted
+        self._scores = []
+
+    def add(self, published_at, score: float) -> dict:
+        """
+        Adds an article and returns the updated aggregates of its candle.
+
+        Returns:
+            dict: 'Date' (candle open), 'sentiment_mean' and 'news_count'.
+        """
+        available = pd.Timestamp(published_at).tz_convert('UTC') + self.lag
+        pos = bisect.bisect_right(self._times, available.value)
+        self._times.insert(pos, available.value)
+        self._scores.insert(pos, score)
+
+        open_time = available.floor(self.interval)
+        close = (open_time + self.interval).value
+        lo = bisect.bisect_left(self._times, close - self.window.value)
+        hi = bisect.bisect_left(self._times, close)
+        count = hi - lo
+        row = {
+            'Date': open_time,
+            'sentiment_mean': sum(self._scores[lo:hi]) / count if count else 0.0,
+            'news_count': float(count),
+        }
+        self._evict(self._times[-1] - 2 * self.window.value)
+        return row
+
+    def _evict(self, cutoff: int):
+        drop = bisect.bisect_left(self._times, cutoff)
+        if drop:
+            del self._times[:drop]
+            del self._scores[:drop]
+
+class StreamProcessor:
+    """
+    Pushes single articles through cleaning, (optional) dedup, sentiment and
+    NER, updates the in-memory candle aggregates and emits a signal row.
+
+    Args:
+        nlp_model: A spaCy pipeline as returned by load_ner_model, or None for
+            entities from `entity_matcher` only.
+        sid: A VADER SentimentIntensityAnalyzer, used when no sentiment backend is given.
+        interval: Candle interval, e.g. '15m'.
+        window: News lookback per candle. Defaults to `interval`.
+        publication_lag: Delay added to publishedAt before an article is usable.
+        sinks: Callables each emitted row is passed to (e.g. JsonlSink, UnixSocketSink).
+        dedup_index: Optional MinHashLSH; near-duplicates of indexed articles are dropped.
+        tracker (LatencyTracker): Records per-stage latencies.
+        sentiment_backend (SentimentBackend): Optional sentiment model used instead of VADER.
+        entity_matcher (EntityMatcher): Optional alias dictionary matcher whose
+            entities are added after spaCy's.
+    """
+
+    def __init__(
+        self,
+        nlp_model,
+        sid=None,
+        interval='15m',
+        window=None,
+        publication_lag=None,
+        sinks=(),
+        dedup_index=None,
+        tracker: LatencyTracker = None,
+        sentiment_backend=None,
+        entity_matcher=None,
+    ):
+        self.nlp_model = nlp_model
+        self.entity_matcher = entity_matcher
+        self.sentiment_backend = sentiment_backend
+        self.sid = sid
+        if sid is None and sentiment_backend is None:
+            from nltk.sentiment import vader
+            self.sid = vader.SentimentIntensityAnalyzer()
+        self.aggregator = CandleAggregator(interval, window=window, publication_lag=publication_lag)
+        self.sinks = list(sinks)
+        self.dedup_index = dedup_index
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+
+    def process(self, article: dict, received_at: float = None) -> dict:
+        """
+        Processes one raw article.
+
+        Args:
+            article (dict): A raw article as returned by the news fetchers.
+            received_at (float): time.perf_counter() when the article arrived; defaults to now.
+
+        Returns:
+            dict: The emitted signal row, or None if the article was skipped.
+        """
+        start = received_at if received_at is not None else time.perf_counter()
+        published = pd.to_datetime(article.get('publishedAt'), utc=True, errors='coerce')
+        if pd.isna(published):
+            return None
+
+        tracker = self.tracker
+        with tracker.time('clean'):
+            content = article.get('description')
+            if content is None:
+                content = article.get('content')
+            content_cleaned = clean_text(content)
+
+        if self.dedup_index is not None:
+            with tracker.time('dedup'):
+                url = article.get('url')
+                text = f"{clean_text(article.get('title'))} {content_cleaned}".strip()
+                signature = self.dedup_index.signature(text)
+                if signature is not None and url:
+                    self.dedup_index.advance(published)
+                    if url in self.dedup_index or self.dedup_index.query(signature)[0] is not None:
+                        return None
+                    self.dedup_index.insert(url, signature, published)
+
+        with tracker.time('sentiment'):
+            if self.sentiment_backend is not None:
+                score = self.sentiment_backend.score([content_cleaned])[0]
+            else:
+                score = analyze_sentiment(content_cleaned, self.sid)
+        with tracker.time('ner'):
+            entities = extract_entities(content_cleaned, self.nlp_model) if self.nlp_model is not None else []
+            if self.entity_matcher is not None:
+                entities += self.entity_matcher.match(content_cleaned)
+        with tracker.time('aggregate'):
+            row = self.aggregator.add(published, score)
+
+        row.update({
+            'publishedAt': published,
+            'url': article.get('url'),
+            'sentiment_score': score,
+            'entities': entities,
+            'latency_ms': (time.perf_counter() - start) * 1000,
+        })
+        with tracker.time('emit'):
+            for sink in self.sinks:
+                sink(row)
+        tracker.record('total', time.perf_counter() - start)
+        return row
+
+def _serialize_row(row: dict) -> str:
+    return json.dumps({
+        key: value.isoformat() if isinstance(value, pd.Timestamp) else value for key, value in row.items()
+    })
+
+class JsonlSink:
+    """Appends each signal row as a JSON line and flushes, so the file can be tailed."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, row: dict):
+        self._file.write(_serialize_row(row) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+class UnixSocketSink:
+    """Sends each signal row as a JSON line to a listening Unix stream socket."""
+
+    def __init__(self, path: str):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(path)
+
+    def __call__(self, row: dict):
+        self._sock.sendall((_serialize_row(row) + '\n').encode('utf-8'))
+
+    def close(self):
+        self._sock.close()
+
+def replay_articles(path: str, speed: float = None):
+    """
+    Yields the articles of a recorded raw news file in publication order.
+
+    Args:
+        path (str): A raw news file (see src/raw_news.py).
+        speed (float): If set, sleeps between articles to replay at this multiple
+            of real time (e.g. 60 replays an hour per minute). None replays at once.
+    """
+    articles = []
+    for article in iter_raw_articles(path):
+        published = pd.to_datetime(article.get('publishedAt'), utc=True, errors='coerce')
+        if pd.notna(published):
+            articles.append((published, article))
+    articles.sort(key=lambda item: item[0])
+
+    previous = None
+    for published, article in articles:
+        if speed and previous is not None:
+            time.sleep(max((published - previous).total_seconds(), 0) / speed)
+        previous = published
+        yield article
+
+def poll_articles(api_key: str, query: str, source: str = 'newsapi', sources: list = None,
+                  poll_secs: float = 30, since=None):
+    """
+    Polls a news source forever and yields each article not seen before.
+
+    Each poll re-requests NEWS_LOOKBACK of history before the newest article,
+    so articles indexed late by the provider are still picked up. Only the keys
+    of articles that a later poll can return again are remembered.
+    """
+    seen = {} # article key -> publishedAt (or the newest time when it was seen, if it has none)
+    newest = pd.Timestamp(since, tz='UTC') if since is not None else pd.Timestamp.now(tz='UTC') - NEWS_LOOKBACK
+    while True:
+        from_date = (newest - NEWS_LOOKBACK).strftime('%Y-%m-%dT%H:%M:%S')
+        to_date = pd.Timestamp.now(tz='UTC').strftime('%Y-%m-%dT%H:%M:%S')
+        try:
+            fetched = fetch_articles(api_key, query, from_date, to_date, source=source, sources=sources)
+        except Exception as e:
+            logger.warning(f"Polling {source} failed, retrying in {poll_secs}s: {e}")
+            fetched = []
+        for article in sorted(fetched, key=lambda a: str(a.get('publishedAt'))):
+            key = article_key(article)
+            if key in seen:
+                continue
+            published = pd.to_datetime(article.get('publishedAt'), utc=True, errors='coerce')
+            if pd.notna(published):
+                newest = max(newest, published)
+            seen[key] = published if pd.notna(published) else newest
+            yield article
+        cutoff = newest - NEWS_LOOKBACK
+        seen = {key: published for key, published in seen.items() if published >= cutoff}
+        time.sleep(poll_secs)
+
+def run_stream(articles, processor: StreamProcessor, on_article=None) -> int:
+    """
+    Feeds articles from any iterable (replay, polling, a websocket client...)
+    through the processor.
+
+    Args:
+        articles: An iterable of raw article dicts.
+        processor (StreamProcessor): The processor to feed.
+        on_article: Optional callable invoked with each raw article before processing (e.g. to record it).
+
+    Returns:
+        int: The number of signal rows emitted.
+    """
+    emitted = 0
+    for article in articles:
+        received_at = time.perf_counter()
+        if on_article is not None:
+            on_article(article)
+        if processor.process(article, received_at=received_at) is not None:
+            emitted += 1
+    return emitted
@@ -1,7 +1,25 @@
 import os
+import logging
 import re
 import yaml
 import pandas as pd
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from src.raw_news import iter_article_chunks, RAW_NEWS_EXTENSIONS
+from src.storage import TableWriter, EXTENSIONS
+from src.instrumentation import instrumented, observe, configure_logging
+
+logger = logging.getLogger(__name__)
+
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+# Non-ASCII characters that str.split() (and the regex \s) treat as whitespace.
+_UNICODE_SPACE_PATTERN = re.compile('[\x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]')
+# After tags are gone, only ASCII letters and whitespace survive. The separators
+# \x1c-\x1f are whitespace to str.split() but not to bytes.split(), so they map to a space.
+_ASCII_TABLE = bytes.maketrans(b'\x1c\x1d\x1e\x1f', b'    ')
+_ASCII_DELETE = bytes(
+    c for c in range(128) if not (chr(c).isascii() and chr(c).isalpha() or chr(c).isspace())
+)
 
 def clean_text(text: str) -> str:
     """
@@ -10,41 +28,107 @@ def clean_text(text: str) -> str:
     """
     if not isinstance(text, str):
         return ""
-    text = re.sub(r'<[^>]+>', '', text)
-    text = re.sub(r'[^a-zA-Z\s]', '', text)
-    text = text.lower()
-    text = " ".join(text.split())
-    return text
+    if '<' in text:
+        text = _TAG_PATTERN.sub('', text)
+    if not text.isascii():
+        # Every other non-ASCII character is dropped by the ASCII encode below.
+        text = _UNICODE_SPACE_PATTERN.sub(' ', text)
+    data = text.encode('ascii', 'ignore').translate(_ASCII_TABLE, _ASCII_DELETE).lower()
+    return b' '.join(data.split()).decode('ascii')
+
+def _clean_chunk(texts: list) -> list:
+    return [clean_text(text) for text in texts]
+
+def clean_texts(texts, n_process: int = 1, chunk_size: int = 50000) -> list:
+    """
+    Cleans many texts, optionally across a pool of worker processes.
+
+    Args:
+        texts: An iterable of texts (non-strings clean to "").
+        n_process (int): Number of worker processes. 1 cleans in-process.
+        chunk_size (int): Number of texts sent to a worker per task.
+
+    Returns:
+        list: The cleaned texts, in input order.
+    """
+    texts = list(texts)
+    if n_process <= 1 or len(texts) <= chunk_size:
+        return _clean_chunk(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_process) as pool:
+        # Executor.map yields results in submission order, keeping output deterministic.
+        return list(chain.from_iterable(pool.map(_clean_chunk, chunks)))
+
+CLEANED_COLUMNS = ['publishedAt', 'title', 'title_cleaned', 'content', 'content_cleaned', 'url']
 
-def clean_news_data(input_path: str, output_path: str):
+def clean_articles(articles_df: pd.DataFrame, n_process: int = 1) -> pd.DataFrame:
     """
-    Reads raw news data from a JSON file, cleans the text content,
-    and saves the result to a CSV file.
+    Cleans the title and content of a frame of raw articles.
+
+    Args:
+        articles_df (pd.DataFrame): Flattened articles as returned by the news APIs.
+        n_process (int): Number of worker processes used for cleaning.
+
+    Returns:
+        pd.DataFrame: The articles with CLEANED_COLUMNS, or None if no content column exists.
+    """
+    # The content field might be named 'description' or 'content'; prefer
+    # 'description' and fall back to 'content' row by row.
+    if 'description' not in articles_df.columns and 'content' not in articles_df.columns:
+        logger.error(f"Neither 'description' nor 'content' column found in the input data.")
+        return None
+    content = articles_df.get('description', pd.Series(None, index=articles_df.index, dtype=object))
+    if 'content' in articles_df.columns:
+        content = content.fillna(articles_df['content'])
+
+    cleaned_df = pd.DataFrame({
+        'publishedAt': articles_df.get('publishedAt'),
+        'title': articles_df.get('title'),
+        'title_cleaned': clean_texts(articles_df['title'], n_process=n_process),
+        'content': content,
+        'content_cleaned': clean_texts(content, n_process=n_process),
+        'url': articles_df.get('url'),
+    }, index=articles_df.index)
+    return cleaned_df[CLEANED_COLUMNS]
+
+@instrumented('clean')
+def clean_news_data(input_path: str, output_path: str, n_process: int = 1, chunk_size: int = 50000):
     """
+    Reads raw news data, cleans the text content, and saves the result in the
+    format implied by `output_path`.
+
+    JSON Lines input is streamed in chunks of `chunk_size` articles and each
+    cleaned chunk is written before the next is read, so peak memory does not
+    grow with the file size. Legacy single-document JSON files are also accepted.
+
+    Raises:
+        ValueError: If a chunk after the first cannot be parsed or has no content
+            column. The partly written output is removed first, so a failed run
+            never leaves a truncated table behind for the stages downstream.
+    """
+    writer = TableWriter(output_path)
     try:
-        df = pd.read_json(input_path)
-        if 'articles' not in df:
-            print(f"Error: JSON file {input_path} does not have an 'articles' key.")
-            return
-        articles_df = pd.json_normalize(df['articles'])
-    except Exception as e:
-        print(f"Error reading or parsing JSON file: {e}")
+        with writer:
+            for chunk in iter_article_chunks(input_path, chunk_size):
+                cleaned_df = clean_articles(pd.json_normalize(chunk), n_process=n_process)
+                if cleaned_df is None:
+                    if writer.rows:
+                        raise ValueError(f"A chunk of {input_path} has no content column.")
+                    return
+                writer.write(cleaned_df)
+                observe(rows_in=len(chunk), rows_out=len(cleaned_df))
+    except ValueError as e:
+        if writer.rows:
+            writer.discard()
+            raise
+        logger.error(f"Error reading or parsing JSON file: {e}")
         return
 
-    # The content field might be named 'description' or 'content'
-    content_col = 'description' if 'description' in articles_df.columns else 'content'
-    if content_col not in articles_df.columns:
-        print(f"Error: Neither 'description' nor 'content' column found in the input data.")
+    if writer.rows == 0:
+        logger.warning(f"No articles found in {input_path}.")
         return
-
-    articles_df['title_cleaned'] = articles_df['title'].apply(clean_text)
-    articles_df['content_cleaned'] = articles_df[content_col].apply(clean_text)
-
-    cleaned_df = articles_df[['publishedAt', 'title', 'title_cleaned', content_col, 'content_cleaned', 'url']]
-    cleaned_df.rename(columns={content_col: 'content'}, inplace=True)
-    
-    cleaned_df.to_csv(output_path, index=False, encoding='utf-8')
-    print(f"Successfully cleaned news data and saved to {output_path}")
+    logger.info(f"Successfully cleaned news data and saved to {output_path}")
 
 def _load_config_for_main():
     config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
@@ -55,25 +139,33 @@ def _load_config_for_main():
 
 if __name__ == '__main__':
     config = _load_config_for_main()
+    configure_logging(config.get('instrumentation', {}).get('log_level', 'INFO'))
     news_config = config['news']
 
     SOURCE = news_config.get('source', 'newsapi')
     QUERY = news_config['query']
     FROM_DATE = str(news_config['from_date'])
     TO_DATE = str(news_config['to_date'])
+    EXT = EXTENSIONS[config.get('storage', {}).get('format', 'csv')]
+    RAW_EXT = RAW_NEWS_EXTENSIONS[config.get('storage', {}).get('raw_news_format', 'json')]
 
     script_dir = os.path.dirname(__file__)
     data_dir = os.path.join(script_dir, '..', 'data')
     raw_news_dir = os.path.join(data_dir, 'raw_news')
     processed_news_dir = os.path.join(data_dir, 'processed_news')
 
-    INPUT_PATH = os.path.join(raw_news_dir, f"{SOURCE}_{QUERY}_{FROM_DATE}_{TO_DATE}.json")
+    INPUT_PATH = os.path.join(raw_news_dir, f"{SOURCE}_{QUERY}_{FROM_DATE}_{TO_DATE}{RAW_EXT}")
     OUTPUT_DIR = processed_news_dir
     os.makedirs(OUTPUT_DIR, exist_ok=True)
-    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}.csv")
+    OUTPUT_PATH = os.path.join(OUTPUT_DIR, f"cleaned_{QUERY}_{FROM_DATE}_{TO_DATE}{EXT}")
 
     if not os.path.exists(INPUT_PATH):
-        print(f"Input file not found: {INPUT_PATH}")
-        print("Please run the news_fetcher.py script first.")
+        logger.error(f"Input file not found: {INPUT_PATH}")
+        logger.error("Please run the news_fetcher.py script first.")
     else:
-        clean_news_data(INPUT_PATH, OUTPUT_PATH)
+        clean_config = config.get('clean', {})
+        clean_news_data(
+            INPUT_PATH, OUTPUT_PATH,
+            n_process=clean_config.get('n_process', 1),
+            chunk_size=clean_config.get('chunk_size', 50000),
+        )
@@ -0,0 +1,182 @@
+import os
+import logging
+import re
+import numpy as np
+import yaml
+import pandas as pd
+from src.text_cleaner import clean_text
+from src.storage import read_table, write_table
+from src.entities import read_entities
+from src.instrumentation import instrumented, observe
+
+logger = logging.getLogger(__name__)
+
+class Asset:
+    """
+    A tradable asset of the universe: its news query terms, market symbol and
+    the names articles refer to it by.
+
+    Args:
+        name (str): Short unique name, e.g. 'BTC'; used in file and stage names.
+        symbol (str): Binance trading pair, e.g. 'BTCUSDT'.
+        queries (list): News search terms; they are also aliases.
+        aliases (list): Names that identify the asset anywhere in an article.
+        entity_aliases (list): Ambiguous names (e.g. 'sol', 'link') that only
+            count when spaCy tagged them as an entity.
+    """
+
+    def __init__(self, name: str, symbol: str, queries=(), aliases=(), entity_aliases=()):
+        self.name = name
+        self.symbol = symbol
+        self.queries = list(queries) or [name]
+        self.aliases = sorted({clean_text(alias) for alias in [*self.queries, *aliases]} - {''})
+        self.entity_aliases = sorted({clean_text(alias) for alias in entity_aliases} - {''})
+
+    @property
+    def ccxt_symbol(self) -> str:
+        # CCXT uses '/' in symbols, e.g., BTC/USDT
+        return self.symbol.replace('USDT', '/USDT')
+
+    def __repr__(self):
+        return f"Asset({self.name!r}, {self.symbol!r})"
+
+def load_universe(config: dict) -> list:
+    """
+    Builds the assets of the `universe` config section. Without one, the
+    universe is the single news.query / market.symbol pair.
+
+    Raises:
+        ValueError: If two assets share a name.
+    """
+    specs = config.get('universe')
+    if not specs:
+        query = config['news']['query']
+        symbol = config['market']['symbol']
+        return [Asset(symbol.replace('USDT', ''), symbol, queries=[query])]
+
+    assets = [
+        Asset(
+            spec['name'], spec['symbol'],
+            queries=spec.get('queries', ()),
+            aliases=spec.get('aliases', ()),
+            entity_aliases=spec.get('entity_aliases', ()),
+        )
+        for spec in specs
+    ]
+    names = [asset.name for asset in assets]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Universe asset names must be unique: {names}")
+    return assets
+
+def universe_queries(assets: list) -> list:
+    """The distinct news query terms of all assets, in universe order."""
+    return list(dict.fromkeys(query for asset in assets for query in asset.queries))
+
+class AssetRouter:
+    """
+    Maps articles to the assets they mention.
+
+    An article mentions an asset if one of its aliases occurs as whole words in
+    the cleaned title or content, or one of its aliases or entity aliases is
+    the text of an entity spaCy found in the content. Its name also matches
+    entities, as the entity matcher reports assets by their canonical id.
+    """
+
+    def __init__(self, assets: list):
+        self.assets = list(assets)
+        self._patterns = {
+            asset.name: re.compile(r'\b(?:' + '|'.join(map(re.escape, asset.aliases)) + r')\b')
+            for asset in self.assets if asset.aliases
+        }
+        self._entity_names = {}
+        for asset in self.assets:
+            for alias in [*asset.aliases, *asset.entity_aliases, clean_text(asset.name)]:
+                self._entity_names.setdefault(alias, []).append(asset.name)
+
+    def route(self, text: str, entities=(), entity_matches=()) -> list:
+        """
+        Returns the names of the assets an article mentions, in universe order.
+        `entity_matches` are asset names already matched from an entity table.
+        """
+        matched = {name for name, pattern in self._patterns.items() if pattern.search(text)}
+        matched.update(entity_matches)
+        for entity in entities or ():
+            matched.update(self._entity_names.get(clean_text(entity[0]), ()))
+        return [asset.name for asset in self.assets if asset.name in matched]
+
+    def entity_matches(self, entities_df: pd.DataFrame) -> dict:
+        """
+        Maps article ids to the asset names their entities match, from an entity
+        table. Each distinct entity text is looked up once.
+        """
+        entity_assets = [self._entity_names.get(clean_text(text), ()) for text in entities_df['entity'].cat.categories]
+        codes = entities_df['entity'].cat.codes.to_numpy()
+        is_alias = np.array([bool(names) for names in entity_assets] + [False])[codes]
+        matches = {}
+        for article_id, code in zip(entities_df['article_id'].to_numpy()[is_alias], codes[is_alias]):
+            matches.setdefault(article_id, set()).update(entity_assets[code])
+        return matches
+
+    def route_frame(self, features_df: pd.DataFrame, entities_df: pd.DataFrame = None) -> pd.Series:
+        """
+        Returns, per article of an NLP features table, the list of asset names it
+        mentions. Entities come from `entities_df` (matched on 'article_id') if
+        given, else from the 'entities' column.
+        """
+        texts = features_df['content_cleaned'].fillna('')
+        if 'title_cleaned' in features_df:
+            texts = features_df['title_cleaned'].fillna('') + ' ' + texts
+        if entities_df is not None:
+            matches = self.entity_matches(entities_df)
+            routes = [
+                self.route(text, entity_matches=matches.get(article_id, ()))
+                for text, article_id in zip(texts, features_df['article_id'])
+            ]
+        else:
+            entities = features_df['entities'] if 'entities' in features_df else [()] * len(features_df)
+            routes = [self.route(text, ents) for text, ents in zip(texts, entities)]
+        return pd.Series(routes, index=features_df.index, dtype=object)
+
+def split_by_asset(features_df: pd.DataFrame, router: AssetRouter, entities_df: pd.DataFrame = None) -> dict:
+    """
+    Splits NLP features into one table per asset. An article mentioning several
+    assets is in each of their tables; one mentioning none is in no table.
+    """
+    routes = router.route_frame(features_df, entities_df=entities_df)
+    return {
+        asset.name: features_df[routes.map(lambda names: asset.name in names).astype(bool)]
+        for asset in router.assets
+    }
+
+@instrumented('route')
+def route_news_features(features_path: str, output_paths: dict, router: AssetRouter, entities_path: str = None):
+    """
+    Routes a shared NLP features table to per-asset features tables, so every
+    article is cleaned and scored once however many assets it mentions.
+
+    Args:
+        features_path (str): Path to the NLP features table of the whole universe.
+        output_paths (dict): Asset name -> path of its features table.
+        router (AssetRouter): Maps articles to assets.
+        entities_path (str): The entity table of the features, if they have one.
+    """
+    features_df = read_table(features_path)
+    entities_df = read_entities(entities_path) if entities_path is not None else None
+    observe(rows_in=len(features_df))
+    for name, asset_df in split_by_asset(features_df, router, entities_df=entities_df).items():
+        observe(rows_out=len(asset_df))
+        write_table(asset_df, output_paths[name])
+        logger.info(f"Routed {len(asset_df)} articles to {name}: {output_paths[name]}")
+
+def _load_config_for_main():
+    config_path = os.path.join(os.path.dirname(__file__), '..', '..', 'config.yaml')
+    if not os.path.exists(config_path):
+        config_path = 'config.yaml'
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+if __name__ == '__main__':
+    config = _load_config_for_main()
+    for asset in load_universe(config):
+        print(f"{asset.name}: symbol={asset.symbol}, queries={asset.queries}, "
+              f"aliases={asset.aliases}, entity_aliases={asset.entity_aliases}")
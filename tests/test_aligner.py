@@ -1,6 +1,6 @@
 import pytest
 import pandas as pd
-from src.aligner import align_features_with_market_data
+from src.aligner import align_features_with_market_data, align_frames
 
 @pytest.fixture
 def nlp_features_file(tmp_path):
@@ -55,3 +55,28 @@ def test_align_features_with_market_data(nlp_features_file, market_data_file, tm
     # Check values for 2024-01-03 (day with no news)
     assert df.loc['2024-01-03']['sentiment_mean'] == 0.0
     assert df.loc['2024-01-03']['news_count'] == 0
+
+def test_align_frames_has_no_look_ahead():
+    """Test that news only counts towards candles that close after it is available."""
+    # Arrange
+    news_df = pd.DataFrame({
+        'publishedAt': ['2024-01-01T00:10:00Z', '2024-01-01T00:14:59Z', '2024-01-01T00:15:00Z', '2024-01-01T00:40:00Z'],
+        'sentiment_score': [0.2, 0.4, -1.0, 0.6],
+    })
+    market_df = pd.DataFrame({
+        'Date': pd.date_range('2024-01-01', periods=4, freq='15min'),
+        'Close': [1.0, 2.0, 3.0, 4.0],
+    })
+
+    # Act
+    per_candle = align_frames(news_df, market_df, interval='15m')
+    lagged = align_frames(news_df, market_df, interval='15m', publication_lag='1min')
+    hourly = align_frames(news_df, market_df, interval='15m', window='30m')
+
+    # Assert
+    assert per_candle['news_count'].tolist() == [2, 1, 1, 0]
+    assert per_candle['sentiment_mean'].iloc[0] == pytest.approx(0.3)
+    assert lagged['news_count'].tolist() == [1, 2, 1, 0]
+    assert hourly['news_count'].tolist() == [2, 3, 2, 1]
+    with pytest.raises(ValueError):
+        align_frames(news_df, market_df, interval='15m', window='20m')
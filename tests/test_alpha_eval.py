@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+from src.alpha_eval import evaluate_alpha, forward_returns, correlation_matrix
+
+def _aligned_table(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=rows, freq='15min', tz='UTC', name='Date')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    sentiment = np.r_[np.diff(np.log(close)), 0.0] + rng.normal(0, 0.01, rows)
+    news_count = rng.poisson(2, rows).astype(float)
+    news_count[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({'Close': close, 'sentiment_mean': sentiment, 'news_count': news_count}, index=dates)
+
+def test_evaluate_alpha_matches_pandas_per_pair():
+    """Test that the vectorized IC, hit ratio and quantile returns match naive per-pair computations."""
+    # Arrange
+    df = _aligned_table()
+    horizons = ['15m', '1h', 8]
+
+    # Act
+    results = evaluate_alpha(df, horizons=horizons, quantiles=4, period='1D')
+
+    # Assert
+    sample = df.iloc[:-8]
+    for bars, label in zip([1, 4, 8], horizons):
+        fwd = df['Close'].shift(-bars).iloc[:-8] / sample['Close'] - 1
+        for feature in ['sentiment_mean', 'news_count']:
+            x = sample[feature]
+            assert np.isclose(results['ic_pearson'].loc[feature, str(label)], x.corr(fwd))
+            signs = np.sign(x) * np.sign(fwd)
+            assert np.isclose(results['hit_ratio'].loc[feature, str(label)], (signs > 0).sum() / signs.abs().sum())
+        for feature in ['sentiment_mean', 'news_count']:
+            # Spearman ranks both sides over the rows where the feature is present.
+            present = sample[feature].notna()
+            spearman = sample[feature][present].rank().corr(fwd[present].rank())
+            assert np.isclose(results['ic_spearman'].loc[feature, str(label)], spearman)
+        buckets = pd.qcut(sample['sentiment_mean'].rank(method='average'), 4, labels=False)
+        expected = fwd.groupby(buckets).mean().to_numpy()
+        assert np.allclose(results['quantile_returns'].loc['sentiment_mean'][str(label)].to_numpy(), expected)
+    assert results['period_ic'].shape == (len(df.index.floor('1D').unique()), 6)
+    assert results['summary'].loc[('sentiment_mean', '15m'), 'ic_spearman'] > 0.5
+
+def test_correlation_matrix_excludes_nans_pairwise():
+    """Test pairwise NaN handling against pandas and that the tail of forward returns is NaN."""
+    # Arrange
+    rng = np.random.default_rng(1)
+    x = rng.normal(size=(200, 3))
+    y = rng.normal(size=(200, 2)) + x[:, :2]
+    x[rng.random((200, 3)) < 0.2] = np.nan
+    y[rng.random((200, 2)) < 0.2] = np.nan
+
+    # Act
+    corr = correlation_matrix(x, y)
+    returns = forward_returns(np.array([1.0, 2.0, 4.0]), np.array([1, 2]))
+
+    # Assert
+    expected = [[pd.Series(x[:, i]).corr(pd.Series(y[:, j])) for j in range(2)] for i in range(3)]
+    assert np.allclose(corr, expected)
+    assert np.allclose(returns, [[1.0, 3.0], [1.0, np.nan], [np.nan, np.nan]], equal_nan=True)
@@ -0,0 +1,83 @@
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from src.async_news_fetcher import fetch_all_articles_async, merge_articles
+
+RSS_FEED = """<?xml version="1.0"?>
+<rss version="2.0"><channel><title>Stub Feed</title>
+<item><title>Bitcoin ETF approved</title><link>http://stub/rss/1</link>
+<description>bitcoin news</description><pubDate>Mon, 01 Jan 2024 12:00:00 GMT</pubDate></item>
+<item><title>Dogecoin rallies</title><link>http://stub/rss/2</link>
+<description>not about it</description><pubDate>Mon, 01 Jan 2024 13:00:00 GMT</pubDate></item>
+<item><title>Bitcoin duplicate</title><link>http://stub/newsapi/0/</link>
+<description>bitcoin</description><pubDate>Mon, 01 Jan 2024 14:00:00 GMT</pubDate></item>
+</channel></rss>"""
+
+def _stub_app(calls):
+    """A local stand-in for NewsAPI (150 results, 2 pages), CryptoPanic (cursor) and an RSS feed."""
+    async def newsapi(request):
+        page = int(request.query['page'])
+        calls.append(('newsapi', page, request.headers.get('X-Api-Key')))
+        if page == 2 and calls.count(('newsapi', 2, 'key')) == 1:
+            return web.Response(status=429, headers={'Retry-After': '0'})
+        start = (page - 1) * 100
+        articles = [
+            {'publishedAt': f'2024-01-01T00:{i % 60:02d}:00Z', 'title': f'a{i}', 'url': f'http://stub/newsapi/{i}'}
+            for i in range(start, min(start + 100, 150))
+        ]
+        return web.json_response({'totalResults': 150, 'articles': articles})
+
+    async def cryptopanic(request):
+        cursor = request.query.get('cursor')
+        calls.append(('cryptopanic', cursor))
+        item = {'created_at': '2024-01-02T00:00:00Z', 'title': f'cp{cursor}', 'url': f'http://stub/cp/{cursor}',
+                'source': {'title': 'CP'}}
+        next_url = str(request.url.with_query({'cursor': '2'})) if cursor is None else None
+        return web.json_response({'results': [item], 'next': next_url})
+
+    async def rss(request):
+        return web.Response(text=RSS_FEED, content_type='application/rss+xml')
+
+    app = web.Application()
+    app.router.add_get('/newsapi', newsapi)
+    app.router.add_get('/cryptopanic', cryptopanic)
+    app.router.add_get('/rss', rss)
+    return app
+
+def test_fetch_all_articles_against_stub_server():
+    """Test pagination, cursors, retry on 429, RSS parsing and cross-source dedup."""
+    calls = []
+
+    async def run():
+        async with TestServer(_stub_app(calls)) as server:
+            sources = [
+                {'name': 'newsapi', 'api_key': 'key', 'base_url': str(server.make_url('/newsapi')),
+                 'rate_per_sec': 100, 'backoff': 0.01},
+                {'name': 'cryptopanic', 'api_key': 'cp', 'base_url': str(server.make_url('/cryptopanic')),
+                 'rate_per_sec': 100},
+                {'name': 'rss', 'urls': [str(server.make_url('/rss'))], 'rate_per_sec': 100},
+            ]
+            return await fetch_all_articles_async(sources, 'bitcoin', '2024-01-01', '2024-01-02')
+
+    # Act
+    articles = asyncio.run(run())
+
+    # Assert
+    urls = [article['url'] for article in articles]
+    assert len(urls) == len(set(urls))
+    assert sum(url.startswith('http://stub/newsapi/') for url in urls) == 150
+    assert {'http://stub/cp/None', 'http://stub/cp/2', 'http://stub/rss/1'} <= set(urls)
+    assert 'http://stub/rss/2' not in urls
+    assert calls.count(('newsapi', 2, 'key')) == 2
+    assert [a['publishedAt'] for a in articles] == sorted((a['publishedAt'] for a in articles), reverse=True)
+
+def test_merge_articles_keeps_first_source():
+    """Test that duplicate URLs keep the first source's copy and recurring URL-less headlines are kept."""
+    merged = merge_articles([
+        [{'url': 'http://x/1', 'title': 'first', 'publishedAt': '2024-01-01T00:00:00Z'}],
+        [{'url': 'HTTP://x/1/', 'title': 'second', 'publishedAt': '2024-01-01T00:00:00Z'}],
+        [{'title': 'Daily recap', 'publishedAt': '2024-01-02T00:00:00Z'},
+         {'title': 'Daily recap', 'publishedAt': '2024-01-03T00:00:00Z'},
+         {'title': 'Daily recap', 'publishedAt': '2024-01-03T00:00:00Z'}],
+    ])
+    assert [article['title'] for article in merged] == ['Daily recap', 'Daily recap', 'first']
@@ -0,0 +1,37 @@
+import pandas as pd
+from src.candle_store import CandleStore, find_gaps, find_duplicates
+
+def _candles(opens):
+    index = pd.DatetimeIndex(pd.to_datetime(opens, unit='ms', utc=True), name='Date')
+    return pd.DataFrame({'Open': 1.0, 'High': 2.0, 'Low': 0.5, 'Close': range(len(opens)), 'Volume': 10.0}, index=index)
+
+def test_find_gaps_and_duplicates():
+    """Test that missing runs are reported as ranges and repeated open times as duplicates."""
+    # Arrange
+    index = _candles([0, 10, 10, 40, 50]).index
+
+    # Act
+    gaps = find_gaps(index, 0, 80, 10)
+    duplicates = find_duplicates(index)
+
+    # Assert
+    assert gaps == [(20, 40), (60, 80)]
+    assert list(duplicates.asi8 // 10**6) == [10]
+
+def test_candle_store_appends_and_compacts(tmp_path):
+    """Test that reads merge part files, keep the latest copy, and survive compaction."""
+    # Arrange
+    store = CandleStore(str(tmp_path))
+    store.append('BTC/USDT', '1h', _candles([0, 10, 20]))
+    revised = _candles([20, 30])
+    revised['Close'] = [99.0, 100.0]
+    store.append('BTC/USDT', '1h', revised)
+
+    # Act
+    df = store.read('BTC/USDT', '1h', start_msec=10)
+    store.compact('BTC/USDT', '1h')
+
+    # Assert
+    assert list(df['Close']) == [1.0, 99.0, 100.0]
+    assert len(store._parts('BTC/USDT', '1h')) == 1
+    pd.testing.assert_frame_equal(store.read('BTC/USDT', '1h', start_msec=10), df, check_freq=False)
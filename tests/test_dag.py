@@ -0,0 +1,91 @@
+import json
+import threading
+from datetime import datetime, timezone
+from src.dag import Stage, DAGRunner, range_is_open
+
+def _copy_stage(name, src, dst, calls, params=None):
+    def run():
+        calls.append(name)
+        dst.write_text(src.read_text().upper())
+    return Stage(name, run, inputs=[str(src)], outputs=[str(dst)], params=params)
+
+def test_skips_unchanged_stages_and_reruns_on_content_change(tmp_path):
+    """Test that stages rerun only when their input content or params change."""
+    # Arrange
+    raw, cleaned, features = tmp_path / "raw.txt", tmp_path / "cleaned.txt", tmp_path / "features.txt"
+    raw.write_text("btc rallies")
+    state_path = str(tmp_path / "state" / "dag.json")
+    calls = []
+
+    def stages(params):
+        return [
+            _copy_stage('clean', raw, cleaned, calls),
+            _copy_stage('nlp', cleaned, features, calls, params=params),
+        ]
+
+    # Act
+    first = DAGRunner(stages({'model': 'vader'}), state_path).run()
+    raw.touch() # a new mtime alone does not invalidate the cache
+    second = DAGRunner(stages({'model': 'vader'}), state_path).run()
+    third = DAGRunner(stages({'model': 'finbert'}), state_path).run()
+    raw.write_text("eth dips")
+    fourth = DAGRunner(stages({'model': 'finbert'}), state_path, manifest_dir=str(tmp_path / "runs")).run()
+
+    # Assert
+    assert calls == ['clean', 'nlp', 'nlp', 'clean', 'nlp']
+    assert [r['status'] for r in second['stages'].values()] == ['cached', 'cached']
+    assert [r['status'] for r in third['stages'].values()] == ['cached', 'ran']
+    assert first['status'] == fourth['status'] == 'succeeded'
+    assert features.read_text() == "ETH DIPS"
+    with open(fourth['path']) as f:
+        assert set(json.load(f)['stages']) == {'clean', 'nlp'}
+
+def test_runs_independent_stages_concurrently_and_blocks_dependents_of_failures(tmp_path):
+    """Test that independent stages overlap and a failed stage's dependents do not run."""
+    # Arrange
+    news, market, final = tmp_path / "news.txt", tmp_path / "market.txt", tmp_path / "final.txt"
+    barrier = threading.Barrier(2, timeout=5)
+
+    def fetch_news():
+        barrier.wait() # returns only once both fetches are running
+        news.write_text("news")
+
+    def fetch_market_data():
+        barrier.wait()
+        raise ConnectionError("exchange down")
+
+    stages = [
+        Stage('fetch_news', fetch_news, outputs=[str(news)]),
+        Stage('fetch_market_data', fetch_market_data, outputs=[str(market)]),
+        Stage('align', lambda: final.write_text("aligned"), inputs=[str(news), str(market)], outputs=[str(final)]),
+    ]
+
+    # Act
+    manifest = DAGRunner(stages, str(tmp_path / "dag.json")).run()
+
+    # Assert
+    statuses = {name: record['status'] for name, record in manifest['stages'].items()}
+    assert statuses == {'fetch_news': 'ran', 'fetch_market_data': 'failed', 'align': 'blocked'}
+    assert manifest['status'] == 'failed'
+    assert 'exchange down' in manifest['stages']['fetch_market_data']['error']
+    assert not final.exists()
+
+def test_fetch_ranges_reaching_the_present_are_refetched(tmp_path):
+    """Test that a fetch stage over an open range reruns with unchanged params while a closed one is cached."""
+    # Arrange
+    now = datetime(2025, 7, 9, 12, tzinfo=timezone.utc)
+    raw = tmp_path / "raw.txt"
+    calls = []
+
+    def fetch_stage(to_date):
+        return Stage('fetch_news', lambda: (calls.append(to_date), raw.write_text(to_date)), outputs=[str(raw)],
+                     params={'to_date': to_date}, always_run=range_is_open(to_date, now=now))
+
+    # Act
+    for to_date in ('2025-07-09', '2025-07-09', '2025-07-08', '2025-07-08'):
+        DAGRunner([fetch_stage(to_date)], str(tmp_path / "dag.json")).run()
+
+    # Assert
+    assert calls == ['2025-07-09', '2025-07-09', '2025-07-08']
+    assert range_is_open('2025-07-09T12:30:00', now=now)
+    assert not range_is_open('2025-07-09T11:00:00+00:00', now=now)
@@ -0,0 +1,55 @@
+import pandas as pd
+from src.deduplicator import MinHashLSH, deduplicate_articles, deduplicate_news_data
+from src.storage import read_table, write_table
+
+STORY = ("bitcoin surged past its previous record high on tuesday as spot etf inflows accelerated "
+         "and analysts pointed to renewed institutional demand across major exchanges")
+
+def _articles(rows):
+    return pd.DataFrame([
+        {'publishedAt': published, 'title': title, 'title_cleaned': title.lower(), 'content': content,
+         'content_cleaned': content, 'url': url}
+        for published, title, content, url in rows
+    ])
+
+def test_deduplicate_articles_links_copies_to_earliest():
+    """Test that syndicated and lightly reworded copies link to the earliest article."""
+    # Arrange
+    df = _articles([
+        ('2024-01-01T12:05:00Z', 'Bitcoin hits record', STORY.replace('tuesday', 'tuesday morning'), 'http://b/copy'),
+        ('2024-01-01T12:00:00Z', 'Bitcoin hits record', STORY, 'http://a/original'),
+        ('2024-01-01T12:10:00Z', 'Ethereum upgrade delayed',
+         'developers postponed the next network upgrade after bugs surfaced on a public testnet', 'http://c/other'),
+    ])
+    index = MinHashLSH(threshold=0.7)
+
+    # Act
+    canonical_df, duplicates_df = deduplicate_articles(df, index)
+
+    # Assert
+    assert list(canonical_df['url']) == ['http://a/original', 'http://c/other']
+    assert list(duplicates_df['url']) == ['http://b/copy']
+    assert list(duplicates_df['duplicate_of']) == ['http://a/original']
+    assert duplicates_df['similarity'].iloc[0] >= 0.7
+    assert len(index) == 2
+
+def test_deduplicate_news_data_reuses_rolling_index(tmp_path):
+    """Test that a persisted index matches later articles and evicts old ones."""
+    # Arrange
+    state_path = str(tmp_path / 'dedup.pkl')
+    first, second = tmp_path / 'first.csv', tmp_path / 'second.csv'
+    write_table(_articles([('2024-01-01T00:00:00Z', 'Bitcoin hits record', STORY, 'http://a/original')]), str(first))
+    write_table(_articles([
+        ('2024-01-02T00:00:00Z', 'Bitcoin hits record', STORY, 'http://b/copy'),
+        ('2024-02-01T00:00:00Z', 'Bitcoin hits record', STORY, 'http://c/much-later'),
+    ]), str(second))
+    params = dict(threshold=0.8, max_age='7d', state_path=state_path)
+
+    # Act
+    deduplicate_news_data(str(first), str(tmp_path / 'd1.csv'), str(tmp_path / 'x1.csv'), **params)
+    deduplicate_news_data(str(second), str(tmp_path / 'd2.csv'), str(tmp_path / 'x2.csv'), **params)
+
+    # Assert
+    assert list(read_table(str(tmp_path / 'd2.csv'))['url']) == ['http://c/much-later']
+    assert list(read_table(str(tmp_path / 'x2.csv'))['duplicate_of']) == ['http://a/original']
+    assert len(MinHashLSH.load(state_path)) == 1
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from src.entities import encode_entities, decode_entities, read_entities, entity_mention_counts
+from src.nlp_processor import compact_features
+from src.storage import write_table
+from src.universe import Asset, AssetRouter
+
+def test_compact_features_round_trips_entities_and_counts_mentions(tmp_path):
+    """Test that entities survive dictionary encoding and storage, and mention counts per bucket."""
+    # Arrange
+    features_df = pd.DataFrame({
+        'publishedAt': pd.to_datetime(['2024-01-01T00:10:00Z', '2024-01-01T00:50:00Z', '2024-01-01T01:20:00Z'], utc=True),
+        'title': ['BTC up', 'Quiet', 'SEC and BTC'],
+        'title_cleaned': ['btc up', 'quiet', 'sec and btc'],
+        'content_cleaned': ['btc rallies', 'nothing', 'sec sues'],
+        'sentiment_score': [0.5, 0.0, -0.5],
+        'entities': [[('BTC', 'ORG')], [], [('SEC', 'ORG'), ('BTC', 'ORG'), ('Monday', 'DATE')]],
+    })
+    entities_path = str(tmp_path / "entities.parquet")
+
+    # Act
+    compact_df, entities_df = compact_features(features_df, first_article_id=10)
+    write_table(entities_df, entities_path)
+    stored = read_entities(entities_path)
+    counts = entity_mention_counts(stored, compact_df, '1h', labels=['ORG'])
+
+    # Assert
+    assert list(compact_df.columns) == ['article_id', 'publishedAt', 'title_cleaned', 'content_cleaned', 'sentiment_score']
+    assert compact_df['article_id'].tolist() == [10, 11, 12] and compact_df['article_id'].dtype == np.int32
+    assert compact_df['sentiment_score'].dtype == np.float32
+    assert stored['entity'].dtype == 'category' and stored['article_id'].dtype == np.int32
+    assert list(stored['entity'].cat.categories) == ['BTC', 'Monday', 'SEC']
+    assert decode_entities(stored, [10, 11, 12]) == features_df['entities'].tolist()
+    assert counts.to_dict('list') == {'BTC': [1, 1], 'SEC': [0, 1]}
+    assert counts.index.tolist() == list(pd.to_datetime(['2024-01-01T00:00:00Z', '2024-01-01T01:00:00Z'], utc=True))
+
+def test_router_matches_entity_aliases_from_entity_table():
+    """Test that routing with an entity table matches the same assets as per-row entity lists."""
+    # Arrange
+    router = AssetRouter([
+        Asset('BTC', 'BTCUSDT', queries=['Bitcoin']),
+        Asset('SOL', 'SOLUSDT', queries=['Solana'], entity_aliases=['SOL']),
+    ])
+    entities = [[], [('SOL', 'ORG')], [('Sol', 'PERSON'), ('Bitcoin', 'ORG')]]
+    features_df = pd.DataFrame({
+        'article_id': np.arange(3, dtype=np.int32),
+        'title_cleaned': ['bitcoin', 'sol jumps', 'a sunny day'],
+        'content_cleaned': ['', '', ''],
+    })
+
+    # Act
+    routes = router.route_frame(features_df, entities_df=encode_entities(entities, features_df['article_id']))
+
+    # Assert
+    assert routes.tolist() == [['BTC'], ['SOL'], ['BTC', 'SOL']]
+    assert routes.tolist() == router.route_frame(features_df.assign(entities=entities)).tolist()
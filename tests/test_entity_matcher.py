@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest_mock # Added for mocker fixture
+from src.entity_matcher import EntityMatcher
+from src.nlp_processor import process_nlp_features
+from src.universe import Asset
+
+def test_matcher_returns_canonical_ids_for_whole_word_longest_matches():
+    """Test that tickers and names map to one id, multi-word aliases win and word parts never match."""
+    # Arrange
+    matcher = EntityMatcher({
+        'ASSET': {'BTC': ['bitcoin'], 'SOL': ['solana']},
+        'REGULATOR': {'SEC': ['securities and exchange commission']},
+        'EXCHANGE': {'SECURITIES': ['securities']},
+        'EVENT': {'ETF': ['etfs', 'exchange-traded fund']},
+    })
+
+    # Act
+    matches = matcher.match_many([
+        'btc and sol etfs filed with the securities and exchange commission',
+        'bitcoin exchangetraded fund solana',
+        'second solar btcs securities',
+        None,
+    ])
+
+    # Assert
+    assert matches == [
+        [('BTC', 'ASSET'), ('SOL', 'ASSET'), ('ETF', 'EVENT'), ('SEC', 'REGULATOR')],
+        [('BTC', 'ASSET'), ('ETF', 'EVENT'), ('SOL', 'ASSET')],
+        [('SECURITIES', 'EXCHANGE')],
+        [],
+    ]
+
+def test_process_nlp_features_matcher_mode_loads_no_spacy_model(mocker, tmp_path):
+    """Test that the 'matcher' NER mode takes entities from the dictionary, including universe assets."""
+    # Arrange
+    mocker.patch('src.nlp_processor.download_nlp_models')
+    mock_load = mocker.patch('src.nlp_processor.load_ner_model')
+    mock_sid = mocker.patch('nltk.sentiment.vader.SentimentIntensityAnalyzer').return_value
+    mock_sid.polarity_scores.return_value = {'compound': 0.1}
+    matcher = EntityMatcher.from_config(
+        {'dictionary': {'EXCHANGE': {'HYPERLIQUID': []}}},
+        assets=[Asset('PEPE', 'PEPEUSDT', queries=['Pepe'])],
+    )
+    input_path = tmp_path / 'cleaned.parquet'
+    pd.DataFrame({
+        'publishedAt': pd.to_datetime(['2024-01-01T12:00:00Z'] * 2, utc=True),
+        'content_cleaned': ['pepe lists on hyperliquid after binance hack', 'quiet day'],
+    }).to_parquet(input_path)
+    entities_path = tmp_path / 'entities.parquet'
+
+    # Act
+    process_nlp_features(
+        str(input_path), str(tmp_path / 'features.parquet'), entities_path=str(entities_path),
+        ner='matcher', entity_matcher=matcher,
+    )
+
+    # Assert
+    mock_load.assert_not_called()
+    entities = pd.read_parquet(entities_path)
+    assert entities['article_id'].tolist() == [0, 0, 0, 0]
+    assert entities['entity'].astype(str).tolist() == ['PEPE', 'HYPERLIQUID', 'BINANCE', 'HACK']
+    assert entities['label'].astype(str).tolist() == ['ASSET', 'EXCHANGE', 'EXCHANGE', 'EVENT']
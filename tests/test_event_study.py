@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.event_study import event_study
+from src.entities import encode_entities
+
+def _market(rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2024-01-01', periods=rows, freq='15min', tz='UTC', name='Date')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    return pd.DataFrame({'Close': close}, index=dates)
+
+def _news(market, n=60, seed=1):
+    rng = np.random.default_rng(seed)
+    published = market.index[0] + pd.to_timedelta(rng.integers(0, 400 * 15 * 60, n), unit='s')
+    return pd.DataFrame({
+        'article_id': np.arange(n, dtype=np.int32),
+        'publishedAt': published,
+        'sentiment_score': rng.uniform(-1, 1, n),
+    })
+
+def test_event_study_matches_per_event_loop():
+    """Test that the vectorized mean-adjusted CARs equal a per-event pandas computation."""
+    # Arrange
+    market = _market()
+    news = _news(market)
+    returns = market['Close'].pct_change()
+
+    # Act
+    results = event_study(news, market, pre='1h', post='2h', adjustment='mean', estimation='6h', group_by='all')
+
+    # Assert
+    expected_pre, expected_event, expected_post = [], [], []
+    for published in news['publishedAt']:
+        bar = market.index.searchsorted(published.floor('15min'))
+        estimation = returns.iloc[max(bar - 4 - 24, 0):max(bar - 4, 0)]
+        # Estimation windows cut by the start of the data are not used.
+        if bar - 4 - 24 < 0 or estimation.count() < 12 or bar + 9 > len(market):
+            expected_pre.append(np.nan)
+            expected_event.append(np.nan)
+            expected_post.append(np.nan)
+            continue
+        normal = estimation.mean()
+        expected_pre.append((returns.iloc[bar - 4:bar] - normal).sum())
+        # The event bar holds the publication; the post window starts at the next bar.
+        expected_event.append(returns.iloc[bar] - normal)
+        expected_post.append((returns.iloc[bar + 1:bar + 9] - normal).sum())
+    events = results['events']
+    np.testing.assert_allclose(events['car_pre'], expected_pre, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(events['ar_event'], expected_event, rtol=1e-5, atol=1e-7)
+    np.testing.assert_allclose(events['car_post'], expected_post, rtol=1e-5, atol=1e-7)
+    path = results['paths'].loc['all', 'mean_car']
+    assert len(path) == 13
+    assert np.isclose(path.iloc[-1], np.nanmean(np.add(np.add(expected_pre, expected_event), expected_post)))
+    assert results['summary'].loc['all', 'n'] == np.isfinite(expected_post).sum()
+
+def test_event_study_groups_by_sentiment_and_entity_and_skips_gaps():
+    """Test sentiment buckets, per-entity events and that event or estimation windows over missing candles are dropped."""
+    # Arrange
+    market = _market()
+    market = market.drop(market.index[200])  # a missing candle
+    news = _news(market)
+    news.loc[0, 'publishedAt'] = market.index[199] + pd.Timedelta('20min')  # window covers the gap
+    news.loc[0, 'sentiment_score'] = 0.9
+    news.loc[1, 'publishedAt'] = market.index[210]  # only the estimation window covers the gap
+    entities = encode_entities([[('BTC', 'ASSET'), ('BTC', 'ASSET')] if i % 2 else [('SEC', 'REGULATOR')]
+                                for i in range(len(news))], news['article_id'])
+
+    # Act
+    by_sentiment = event_study(news, market, adjustment='none', group_by='sentiment')
+    by_mean = event_study(news, market, adjustment='mean', group_by='all')
+    by_entity = event_study(news, market, adjustment='none', group_by='entity', entities_df=entities, min_events=1)
+
+    # Assert
+    assert list(by_sentiment['summary'].index) == ['[-1, -0.05)', '[-0.05, 0.05)', '[0.05, 1]']
+    assert np.isnan(by_sentiment['events'].loc[0, 'car_post'])
+    assert np.isfinite(by_sentiment['events'].loc[1, 'car_post'])
+    assert np.isnan(by_mean['events'].loc[1, 'car_post'])
+    assert by_sentiment['summary']['n'].sum() == by_sentiment['events']['car_post'].notna().sum()
+    assert sorted(by_entity['summary'].index) == ['BTC', 'SEC']
+    assert len(by_entity['events']) == len(news)  # repeated mentions count once per article
+    with pytest.raises(ValueError):
+        event_study(news, market, adjustment='market')
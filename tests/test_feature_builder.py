@@ -0,0 +1,75 @@
+import pytest
+import numpy as np
+import pandas as pd
+from src.feature_builder import FeatureBuilder, build_feature_table
+from src.storage import read_table, write_table
+
+@pytest.fixture
+def candles_df():
+    """A day of 15m candles."""
+    index = pd.date_range('2024-01-01', periods=96, freq='15min', tz='UTC', name='Date')
+    return pd.DataFrame({'Close': np.linspace(100, 110, len(index))}, index=index)
+
+@pytest.fixture
+def news_df():
+    """Articles spread over the day, some mentioning a hack."""
+    rng = np.random.default_rng(0)
+    published = pd.Timestamp('2024-01-01', tz='UTC') + pd.to_timedelta(rng.integers(0, 86400, 200), unit='s')
+    return pd.DataFrame({
+        'publishedAt': published,
+        'sentiment_score': rng.uniform(-1, 1, 200),
+        'title_cleaned': rng.choice(['exchange hack reported', 'bitcoin etf flows', 'market update'], 200),
+        'content_cleaned': rng.choice(['the hack drained funds', 'quiet session', ''], 200),
+    })
+
+def test_feature_builder_incremental_matches_full(candles_df, news_df):
+    """Test that updating in batches (with a re-sent last candle) equals one full pass."""
+    # Arrange
+    full = FeatureBuilder('15m', windows=('5m', '1h', '4h'), zscore_window='2h').update(news_df, candles_df)
+    builder = FeatureBuilder('15m', windows=('5m', '1h', '4h'), zscore_window='2h')
+
+    # Act
+    parts = [
+        builder.update(news_df, candles_df.iloc[:40]),
+        builder.update(news_df, candles_df.iloc[39:41]),
+        builder.update(news_df, candles_df.iloc[41:]),
+    ]
+    incremental = pd.concat(parts)
+    incremental = incremental[~incremental.index.duplicated(keep='last')]
+    # An update after a long gap (far beyond the decay overflow horizon).
+    later = candles_df.index[-1] + pd.Timedelta(days=73) + pd.to_timedelta(np.arange(3) * 15, unit='min')
+    later_news = pd.DataFrame({'publishedAt': [later[1] + pd.Timedelta('1min')], 'sentiment_score': [0.5],
+                               'title_cleaned': [''], 'content_cleaned': ['']})
+    after_gap = builder.update(later_news, pd.DataFrame({'Close': 1.0}, index=pd.DatetimeIndex(later, name='Date')))
+
+    # Assert
+    assert 'sentiment_mean_5m' not in full.columns
+    assert {'sentiment_mean_1h', 'news_velocity_4h', 'hack_mentions_1h',
+            'sentiment_decayed', 'news_count_surprise_z'} <= set(full.columns)
+    pd.testing.assert_frame_equal(incremental, full, check_freq=False)
+    assert after_gap.loc[later[1], 'sentiment_decayed'] == pytest.approx(0.5)
+
+def test_build_feature_table_keyword_counts_have_no_look_ahead(tmp_path, candles_df):
+    """Test keyword counts and that an article at a candle's close goes to the next candle."""
+    # Arrange
+    news = pd.DataFrame({
+        'publishedAt': ['2024-01-01T00:05:00Z', '2024-01-01T00:15:00Z'],
+        'sentiment_score': [0.5, -0.5],
+        'title_cleaned': ['hack at exchange', 'no news'],
+        'content_cleaned': ['second hack confirmed', 'quiet'],
+    })
+    aligned_path = str(tmp_path / "final.parquet")
+    news_path = str(tmp_path / "features.parquet")
+    output_path = str(tmp_path / "feature_table.parquet")
+    write_table(candles_df, aligned_path)
+    write_table(news, news_path)
+
+    # Act
+    build_feature_table(aligned_path, news_path, output_path, '15m', windows=('15m', '1h'), keywords=['hack'])
+
+    # Assert
+    df = read_table(output_path, index_col='Date')
+    assert df['hack_mentions_15m'].iloc[:3].tolist() == [2, 0, 0]
+    assert df['news_count_15m'].iloc[:3].tolist() == [1, 1, 0]
+    assert df['sentiment_mean_1h'].iloc[1] == pytest.approx(0.0)
+    assert 'Close' in df.columns
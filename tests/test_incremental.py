@@ -0,0 +1,159 @@
+import json
+import pytest
+import pandas as pd
+from src.incremental import (
+    WatermarkStore, merge_raw_articles, update_raw_news, update_cleaned, update_deduped, update_features,
+    update_routed, update_aligned,
+)
+from src.news_fetcher import fetch_news
+from src.text_cleaner import clean_news_data
+from src.deduplicator import deduplicate_news_data
+from src.nlp_processor import process_nlp_features
+from src.entity_matcher import EntityMatcher
+from src.entities import read_entities
+from src.universe import Asset, AssetRouter, route_news_features
+from src.aligner import align_features_with_market_data
+from src.storage import read_table, write_table
+
+@pytest.fixture
+def features_df():
+    """NLP features spread over three days, in publication order."""
+    return pd.DataFrame({
+        'publishedAt': [
+            '2024-01-01T10:00:00Z', '2024-01-01T14:00:00Z', '2024-01-02T11:00:00Z',
+            '2024-01-01T23:50:00Z', '2024-01-03T05:00:00Z',
+        ],
+        'sentiment_score': [0.5, -0.1, 0.9, 0.3, -0.4],
+    })
+
+@pytest.fixture
+def market_df():
+    """Six-hourly candles over three days."""
+    dates = pd.date_range('2024-01-01', periods=12, freq='6h')
+    return pd.DataFrame({'Date': dates, 'Close': range(len(dates))})
+
+@pytest.mark.parametrize("ext", [".csv", ".parquet"])
+def test_update_aligned_matches_full_rebuild(features_df, market_df, tmp_path, ext):
+    """Test that aligning in two incremental steps gives the full-rebuild table."""
+    # Arrange
+    features_path = tmp_path / f"features{ext}"
+    market_path = tmp_path / f"market{ext}"
+    final_path = tmp_path / f"final{ext}"
+    full_path = tmp_path / f"full{ext}"
+    watermarks = WatermarkStore(str(tmp_path / "state" / "watermarks.json"))
+
+    write_table(features_df.iloc[:3], str(features_path))
+    write_table(market_df.iloc[:6], str(market_path))
+    update_aligned(str(features_path), str(market_path), str(final_path), watermarks, window='1d')
+
+    # Act
+    write_table(features_df, str(features_path))
+    write_table(market_df, str(market_path))
+    update_aligned(str(features_path), str(market_path), str(final_path), watermarks, window='1d')
+    align_features_with_market_data(str(features_path), str(market_path), str(full_path), window='1d')
+
+    # Assert
+    incremental_df = read_table(str(final_path), index_col='Date')
+    full_df = read_table(str(full_path), index_col='Date')
+    pd.testing.assert_frame_equal(incremental_df, full_df)
+    assert incremental_df.loc['2024-01-01 18:00:00+00:00', 'news_count'] == 3
+    assert watermarks.get('align_news') == 5
+
+def test_update_cleaned_appends_only_new_articles(tmp_path):
+    """Test that merged raw articles are deduplicated and only new ones are cleaned."""
+    # Arrange
+    raw_path = tmp_path / "raw.json"
+    cleaned_path = tmp_path / "cleaned.csv"
+    watermarks = WatermarkStore(str(tmp_path / "watermarks.json"))
+    first = [{'publishedAt': '2024-01-01T10:00:00Z', 'title': 'First', 'description': 'One!', 'url': 'u1'}]
+    second = first + [{'publishedAt': '2024-01-01T11:00:00Z', 'title': 'Second', 'content': 'Two?', 'url': 'u2'}]
+
+    raw_path.write_text(json.dumps({'articles': merge_raw_articles([], first)}))
+    update_cleaned(str(raw_path), str(cleaned_path), watermarks)
+
+    # Act
+    raw_path.write_text(json.dumps({'articles': merge_raw_articles(first, second)}))
+    added = update_cleaned(str(raw_path), str(cleaned_path), watermarks)
+
+    # Assert
+    assert added == 1
+    df = pd.read_csv(cleaned_path)
+    assert df['url'].tolist() == ['u1', 'u2']
+    assert df['content_cleaned'].tolist() == ['one', 'two']
+    assert watermarks.get('clean') == 2
+
+def _article(hour: int, title: str, content: str, url: str) -> dict:
+    return {'publishedAt': f"2024-01-01T{hour:02d}:00:00Z", 'title': title, 'content': content, 'url': url}
+
+def test_incremental_pipeline_matches_full_rebuild(mocker, market_df, tmp_path):
+    """Test that fetch, clean, dedup, NLP, routing and alignment run in two increments give the full-run tables."""
+    # Arrange
+    first = [
+        _article(1, 'Bitcoin rallies', 'Bitcoin rallies as ETF inflows keep growing this week', 'u1'),
+        _article(3, 'Ethereum upgrade', 'Ethereum developers schedule the next network upgrade', 'u2'),
+        _article(4, 'Bitcoin rallies', 'Bitcoin rallies as ETF inflows keep growing this week!', 'u3'),
+    ]
+    second = [
+        first[2],
+        _article(9, 'Markets slide', 'Bitcoin and ethereum slide after the rate decision', 'u4'),
+        _article(15, 'Quiet day', 'Nothing much happened in the markets today', 'u5'),
+    ]
+    mocker.patch('src.nlp_processor.download_nlp_models', return_value=None)
+    sid = mocker.patch('nltk.sentiment.vader.SentimentIntensityAnalyzer').return_value
+    sid.polarity_scores.side_effect = lambda text: {'compound': len(text) % 7 / 10}
+    fetch = mocker.patch('src.incremental.fetch_articles', side_effect=[first, second])
+    mocker.patch('src.news_fetcher.fetch_articles', return_value=first + second[1:])
+    router = AssetRouter([Asset('BTC', 'BTCUSDT', queries=['bitcoin']), Asset('ETH', 'ETHUSDT', queries=['ethereum'])])
+    market_path = str(tmp_path / "market.parquet")
+    write_table(market_df, market_path)
+    dedup_params = dict(threshold=0.8, num_perm=64, shingle_size=5, max_age='21d')
+
+    def paths(name):
+        root = tmp_path / name
+        stages = ('cleaned', 'deduped', 'duplicates', 'features', 'entities')
+        stage_paths = {stage: str(root / f"{stage}.parquet") for stage in stages}
+        stage_paths['raw'] = str(root / "raw.jsonl")
+        stage_paths['dedup_state'] = str(root / "dedup.pkl")
+        stage_paths['routed'] = {asset.name: str(root / f"features_{asset.name}.parquet") for asset in router.assets}
+        stage_paths['final'] = {asset.name: str(root / f"final_{asset.name}.parquet") for asset in router.assets}
+        return stage_paths
+
+    inc, full = paths('incremental'), paths('full')
+    watermarks = WatermarkStore(str(tmp_path / "incremental" / "watermarks.json"))
+
+    # Act
+    for _ in range(2):
+        update_raw_news('key', 'bitcoin', '2024-01-01', '2024-01-03', inc['raw'], watermarks)
+        update_cleaned(inc['raw'], inc['cleaned'], watermarks)
+        update_deduped(
+            inc['cleaned'], inc['deduped'], inc['duplicates'], watermarks, inc['dedup_state'], **dedup_params,
+        )
+        update_features(
+            inc['deduped'], inc['features'], watermarks, None,
+            entities_path=inc['entities'], entity_matcher=EntityMatcher(),
+        )
+        update_routed(inc['features'], inc['routed'], watermarks, router, entities_path=inc['entities'])
+        for name in inc['routed']:
+            asset_marks = WatermarkStore(str(tmp_path / "incremental" / f"watermarks_{name}.json"))
+            update_aligned(inc['routed'][name], market_path, inc['final'][name], asset_marks, window='1d')
+
+    fetch_news('key', 'bitcoin', '2024-01-01', '2024-01-03', full['raw'])
+    clean_news_data(full['raw'], full['cleaned'])
+    deduplicate_news_data(
+        full['cleaned'], full['deduped'], full['duplicates'], state_path=full['dedup_state'], **dedup_params,
+    )
+    process_nlp_features(full['deduped'], full['features'], entities_path=full['entities'], ner='matcher')
+    route_news_features(full['features'], full['routed'], router, entities_path=full['entities'])
+    for name in full['routed']:
+        align_features_with_market_data(full['routed'][name], market_path, full['final'][name], window='1d')
+
+    # Assert
+    assert fetch.call_count == 2
+    for stage in ('cleaned', 'deduped', 'duplicates', 'features'):
+        pd.testing.assert_frame_equal(read_table(inc[stage]), read_table(full[stage]))
+    pd.testing.assert_frame_equal(read_entities(inc['entities']), read_entities(full['entities']))
+    for name in full['routed']:
+        pd.testing.assert_frame_equal(read_table(inc['routed'][name]), read_table(full['routed'][name]))
+        pd.testing.assert_frame_equal(read_table(inc['final'][name]), read_table(full['final'][name]))
+    assert len(read_table(full['deduped'])) == 4
+    assert read_table(full['routed']['ETH'])['article_id'].tolist() == [1, 2]
@@ -0,0 +1,76 @@
+import json
+import pandas as pd
+import pytest
+from src.instrumentation import METRICS, MetricsRegistry, instrumented, observe, stage_labels
+from src.text_cleaner import clean_news_data
+
+@pytest.fixture(autouse=True)
+def _reset_metrics():
+    METRICS.configure()
+    METRICS.reset()
+    yield
+    METRICS.reset()
+
+def test_instrumented_stage_records_rows_and_exports(tmp_path):
+    """Test that an instrumented stage records its counts and exports them as JSON and Prometheus gauges."""
+    # Arrange
+    raw_path = tmp_path / "raw.json"
+    raw_path.write_text(json.dumps({'articles': [
+        {'title': 'BTC rallies', 'content': 'Bitcoin is up', 'publishedAt': '2024-01-01T00:00:00Z'},
+        {'title': 'ETH dips', 'content': 'Ether is down', 'publishedAt': '2024-01-01T01:00:00Z'},
+    ]}))
+    cleaned_path = tmp_path / "cleaned.csv"
+
+    @instrumented('align')
+    def align(rows):
+        observe(rows_in=rows)
+
+    # Act
+    clean_news_data(str(raw_path), str(cleaned_path))
+    for asset, rows in (('BTC', 5), ('ETH', 7)):
+        with stage_labels(asset=asset):
+            align(rows)
+    METRICS.write_json(str(tmp_path / "metrics.json"))
+    METRICS.write_prometheus(str(tmp_path / "metrics.prom"))
+
+    # Assert
+    records = json.loads((tmp_path / "metrics.json").read_text())
+    assert [record['stage'] for record in records] == ['clean', 'align', 'align']
+    assert records[2]['labels'] == {'asset': 'ETH'}
+    assert records[0]['status'] == 'ok'
+    assert records[0]['rows_in'] == 2 and records[0]['rows_out'] == len(pd.read_csv(cleaned_path))
+    assert records[0]['wall_secs'] > 0 and records[0]['peak_rss_mb'] > 0
+    prom = (tmp_path / "metrics.prom").read_text()
+    assert 'news2alpha_stage_rows_in{stage="clean"} 2.0' in prom
+    assert 'news2alpha_stage_rows_in{stage="align",asset="BTC"} 5.0' in prom
+    assert 'news2alpha_stage_rows_in{stage="align",asset="ETH"} 7.0' in prom
+    assert 'cache_hit_ratio' not in prom
+
+def test_failed_stage_and_cprofile_hook(tmp_path):
+    """Test cache hit rates, failure status and that the cProfile hook saves one profile per stage call."""
+    # Arrange
+    registry = MetricsRegistry(profile='cprofile', profile_dir=str(tmp_path))
+
+    @instrumented('broken')
+    def broken():
+        observe(rows_in=3)
+        raise ValueError("boom")
+
+    # Act
+    with registry.track('nlp'):
+        observe(cache_hits=3, cache_misses=1)
+        observe(cache_hits=1)
+    with pytest.raises(ValueError):
+        broken()
+    for asset in ('BTC/USDT', 'ETH/USDT', 'ETH/USDT'):
+        with stage_labels(asset=asset), registry.track('align'):
+            pass
+
+    # Assert
+    assert registry.as_dicts()[0]['cache_hit_rate'] == 0.8
+    assert METRICS.as_dicts()[0]['status'] == 'failed' and METRICS.as_dicts()[0]['rows_in'] == 3
+    assert len(list(tmp_path.glob('nlp_*.prof'))) == 1
+    assert len(list(tmp_path.glob('align_BTC-USDT_*.prof'))) == 1
+    assert len(list(tmp_path.glob('align_ETH-USDT_*.prof'))) == 2
+    with pytest.raises(ValueError):
+        MetricsRegistry(profile='perf')
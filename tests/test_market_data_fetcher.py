@@ -1,6 +1,8 @@
 import pytest
+import ccxt
 import pandas as pd
-from src.market_data_fetcher import fetch_market_data
+from src.candle_store import CandleStore
+from src.market_data_fetcher import fetch_market_data, backfill_ohlcv
 
 @pytest.fixture
 def mock_ccxt_exchange(mocker):
@@ -49,3 +51,46 @@ def test_fetch_market_data_ccxt_success(mock_ccxt_exchange, tmp_path):
     assert df['Close'].iloc[0] == 47500.0
     assert df['Close'].iloc[1] == 48000.0
 
+
+class FakeExchange:
+    """A ccxt-like exchange serving 1h candles from `first_open`, 500 per page."""
+    rateLimit = 0
+
+    def __init__(self, first_open, fail_once_at=None):
+        self.first_open = first_open
+        self.fail_once_at = set(fail_once_at or [])
+        self.calls = []
+
+    def parse_timeframe(self, timeframe):
+        return 3600
+
+    def fetch_ohlcv(self, symbol, timeframe, since):
+        self.calls.append(since)
+        if since in self.fail_once_at:
+            self.fail_once_at.discard(since)
+            raise ccxt.RateLimitExceeded('429')
+        start = max(since, self.first_open)
+        start += -(start - self.first_open) % 3_600_000
+        return [[t, 1.0, 2.0, 0.5, 1.5, 10.0] for t in range(start, start + 500 * 3_600_000, 3_600_000)]
+
+def test_backfill_ohlcv_fetches_only_missing_ranges(tmp_path):
+    """Test chunked backfill with retries, and that a second run only fetches the new range."""
+    # Arrange
+    start = 1704067200000 # 2024-01-01
+    hour = 3_600_000
+    exchange = FakeExchange(start, fail_once_at=[start + 100 * hour])
+    store = CandleStore(str(tmp_path / 'candles'))
+
+    # Act
+    first = backfill_ohlcv(exchange, 'BTC/USDT', '1h', start, start + 300 * hour,
+                           store=store, max_workers=3, chunk_candles=100, backoff=0)
+    first_calls = len(exchange.calls)
+    second = backfill_ohlcv(exchange, 'BTC/USDT', '1h', start, start + 350 * hour,
+                            store=store, max_workers=3, chunk_candles=100, backoff=0)
+
+    # Assert
+    assert len(first) == 300 and first.index.is_unique and first.index.is_monotonic_increasing
+    assert first_calls == 4 # three chunks, one retried
+    assert exchange.calls[first_calls:] == [start + 300 * hour]
+    assert len(second) == 350
+    assert len(store.read('BTC/USDT', '1h')) == 350
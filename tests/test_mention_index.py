@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from src.mention_index import MentionIndex, load_mentions
+from src.entities import encode_entities
+from src.feature_builder import FeatureBuilder, count_keyword_mentions
+
+def _features(article_ids, published, texts):
+    return pd.DataFrame({
+        'article_id': np.asarray(article_ids, dtype=np.int32),
+        'publishedAt': pd.to_datetime(published, utc=True),
+        'title_cleaned': [''] * len(texts),
+        'content_cleaned': texts,
+        'sentiment_score': np.zeros(len(texts), dtype=np.float32),
+    })
+
+def test_index_appends_and_answers_range_and_bucket_queries(tmp_path):
+    """Test postings across appended parts, time ranges, hourly counts, word sequences and entities."""
+    # Arrange
+    first = _features([0, 1], ['2025-01-01 10:30', '2025-01-01 09:10'], ['sol hack hack', 'federal reserve holds'])
+    second = _features([2, 3], ['2025-01-01 09:50', '2025-01-01 12:05'], ['reserve federal hack', 'quiet'])
+    index = MentionIndex(str(tmp_path / 'index'))
+    index.add(first, encode_entities([[('SOL', 'ASSET')], []], first['article_id']))
+    index.add(second, encode_entities([[('SOL', 'ASSET'), ('SOL', 'ASSET')], []], second['article_id']))
+
+    # Act
+    reopened = MentionIndex(str(tmp_path / 'index'))
+    hack = reopened.postings('hack', start='2025-01-01 09:00', end='2025-01-01 11:00')
+    series = reopened.mention_series(
+        ['hack', 'federal reserve', 'hack hack', 'entity:SOL'], '1h', start='2025-01-01 09:00', end='2025-01-01 13:00',
+    )
+    articles = reopened.mention_series(['hack'], '1h', start='2025-01-01 09:00', end='2025-01-01 13:00', articles=True)
+    aware = reopened.postings(
+        'hack', start=pd.Timestamp('2025-01-01 10:00', tz='Europe/Berlin'), end=pd.Timestamp('2025-01-01 11:00', tz='UTC'),
+    )
+
+    # Assert
+    assert hack['article_id'].tolist() == [2, 0]
+    assert hack['count'].tolist() == [1, 2]
+    assert aware['article_id'].tolist() == [2, 0]  # 10:00 in Berlin is 09:00 UTC
+    assert series['hack'].tolist() == [1, 2, 0, 0]
+    assert series['federal reserve'].tolist() == [1, 0, 0, 0]  # not 'reserve federal'
+    assert series['hack hack'].tolist() == [0, 1, 0, 0]
+    assert series['entity:SOL'].tolist() == [2, 1, 0, 0]
+    assert articles['hack'].tolist() == [1, 1, 0, 0]
+    assert str(series.index[0]) == '2025-01-01 09:00:00+00:00'
+
+def test_feature_builder_counts_from_index_match_text_scan(tmp_path):
+    """Test that keyword and word sequence features built from index postings equal those from scanning the texts."""
+    # Arrange
+    rng = np.random.default_rng(0)
+    words = np.array(['hack', 'etf', 'price', 'sec', 'rally'])
+    published = pd.Timestamp('2025-01-01', tz='UTC') + pd.to_timedelta(np.sort(rng.integers(0, 6 * 3600, 200)), unit='s')
+    texts = [' '.join(words[rng.integers(0, len(words), 8)]) for _ in range(200)]
+    news_df = _features(np.arange(200), published, texts)
+    index = MentionIndex(str(tmp_path / 'index'))
+    index.add(news_df)
+    candles = pd.DataFrame(index=pd.date_range('2025-01-01', periods=24, freq='15min', tz='UTC', name='Date'))
+    routed = news_df.iloc[::2]  # e.g. the articles routed to one asset
+    keywords = ['hack', 'etf', 'price sec', 'hack hack']
+
+    # Act
+    scanned = FeatureBuilder('15min', windows=['1h'], keywords=keywords).update(routed, candles)
+    indexed = FeatureBuilder('15min', windows=['1h'], keywords=keywords).update(
+        routed[['article_id', 'publishedAt', 'sentiment_score']], candles,
+        mentions=load_mentions(str(tmp_path / 'index'), keywords, routed['article_id']),
+    )
+
+    # Assert
+    pd.testing.assert_frame_equal(indexed, scanned)
+    assert scanned['hack_mentions_1h'].sum() > 0
+    assert scanned['price_sec_mentions_1h'].sum() > 0
+    assert scanned['hack_hack_mentions_1h'].sum() > 0
+
+def test_index_counts_match_keyword_scan_regardless_of_case(tmp_path):
+    """Test that word and word sequence postings count like count_keyword_mentions, whatever the term's case."""
+    # Arrange
+    texts = ['sec sues exchange', 'the sec and the sec', 'federal reserve cuts', 'nothing here']
+    news_df = _features(np.arange(4), ['2025-01-01 09:00'] * 4, texts)
+    index = MentionIndex(str(tmp_path / 'index'))
+    index.add(news_df)
+
+    for term in ['SEC', 'sec', 'Federal Reserve']:
+        # Act
+        postings = index.postings(term)
+        counts = pd.Series(postings['count'].to_numpy(), index=postings['article_id']).reindex(range(4), fill_value=0)
+
+        # Assert
+        np.testing.assert_array_equal(counts.to_numpy(), count_keyword_mentions(news_df['content_cleaned'], term))
+    assert index.postings('SEC')['count'].sum() == 3
+
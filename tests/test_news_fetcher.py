@@ -1,7 +1,7 @@
 import pytest
 import json
 import pytest_mock # Added for mocker fixture
-from src.news_fetcher import fetch_news
+from src.news_fetcher import fetch_news, fetch_articles
 
 @pytest.fixture
 def temp_output_dir(tmp_path):
@@ -68,3 +68,28 @@ def test_fetch_news_cryptopanic_success(mocker, temp_output_dir):
         data = json.load(f)
     assert data['articles'][0]['title'] == 'CryptoPanic Article'
     assert data['articles'][0]['description'] == 'CryptoPanic Article' # Check normalization
+
+def test_fetch_articles_follows_pages_of_a_single_source(mocker):
+    """Test that single-source fetching follows NewsAPI pages and CryptoPanic cursors."""
+    # Arrange
+    mock_instance = mocker.patch('newsapi.NewsApiClient').return_value
+    mock_instance.get_everything.side_effect = [
+        {'totalResults': 150, 'articles': [{'title': f'a{i}'} for i in range(100)]},
+        {'totalResults': 150, 'articles': [{'title': f'b{i}'} for i in range(50)]},
+    ]
+    pages = [
+        {'results': [{'title': 'first', 'source': {}}], 'next': 'http://cp.com/page2'},
+        {'results': [{'title': 'second', 'source': {}}], 'next': None},
+    ]
+    mock_requests_get = mocker.patch('requests.get')
+    mock_requests_get.return_value.json.side_effect = pages
+
+    # Act
+    newsapi = fetch_articles('key', 'BTC', '2024-01-01', '2024-01-02', source='newsapi')
+    cryptopanic = fetch_articles('key', 'BTC', '', '', source='cryptopanic', sources=[{'name': 'cryptopanic', 'max_pages': 5}])
+
+    # Assert
+    assert len(newsapi) == 150
+    assert [call.kwargs['page'] for call in mock_instance.get_everything.call_args_list] == [1, 2]
+    assert [article['title'] for article in cryptopanic] == ['first', 'second']
+    assert mock_requests_get.call_args_list[1].args[0] == 'http://cp.com/page2'
@@ -0,0 +1,46 @@
+import pytest
+from src.nlp_cache import NLPCache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = NLPCache(str(tmp_path / "cache" / "nlp_cache.sqlite"))
+    yield cache
+    cache.close()
+
+def test_nlp_cache_roundtrip_and_stats(cache):
+    """Test that stored results are returned on lookup and hits/misses are counted."""
+    # Arrange
+    cache.put_many(['bitcoin rallies'], [0.5], [[('bitcoin', 'ORG')]], model_id='m1')
+
+    # Act
+    results = cache.get_many(['bitcoin rallies', 'ether dips', 'bitcoin rallies'], model_id='m1')
+    other_model = cache.get_many(['bitcoin rallies'], model_id='m2')
+
+    # Assert
+    assert results == [(0.5, [('bitcoin', 'ORG')]), None, (0.5, [('bitcoin', 'ORG')])]
+    assert other_model == [None]
+    stats = cache.stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 2
+    assert stats['entries'] == 1
+
+def test_nlp_cache_eviction(tmp_path, mocker):
+    """Test age-based and size-based eviction."""
+    # Arrange
+    mock_time = mocker.patch('src.nlp_cache.time.time')
+    cache = NLPCache(str(tmp_path / "nlp_cache.sqlite"), max_entries=2, max_age_days=1)
+    mock_time.return_value = 0.0
+    cache.put_many(['old'], [0.1], [[]], model_id='m')
+    mock_time.return_value = 2 * 86400.0
+    cache.put_many(['a', 'b', 'c'], [0.2, 0.3, 0.4], [[], [], []], model_id='m')
+    mock_time.return_value = 2 * 86400.0 + 10
+    cache.get_many(['a'], model_id='m')
+
+    # Act
+    removed = cache.evict()
+
+    # Assert
+    assert removed == 2
+    assert len(cache) == 2
+    assert cache.get_many(['old', 'a'], model_id='m') == [None, (0.2, [])]
+    cache.close()
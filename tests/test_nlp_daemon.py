@@ -0,0 +1,93 @@
+import threading
+import pandas as pd
+import pytest_mock # Added for mocker fixture
+from src.nlp_daemon import NLPDaemon, connect_daemon
+from src.nlp_processor import process_nlp_features
+from src.sentiment_backends import VaderBackend
+
+def _start_daemon(mocker, socket_path):
+    """Serves a daemon with a mocked spaCy pipeline and VADER analyzer in a thread."""
+    mock_sid = mocker.patch('nltk.sentiment.vader.SentimentIntensityAnalyzer').return_value
+    mock_sid.polarity_scores.return_value = {'compound': 0.5}
+    mock_nlp = mocker.MagicMock()
+    mock_nlp.meta = {'name': 'core_web_sm', 'version': '3.7.1'}
+    mock_ent = mocker.MagicMock()
+    mock_ent.text = 'bitcoin'
+    mock_ent.label_ = 'ORG'
+    mock_nlp.pipe.side_effect = lambda texts, **kwargs: [mocker.MagicMock(ents=[mock_ent]) for _ in texts]
+
+    daemon = NLPDaemon(socket_path, mock_nlp, VaderBackend(), idle_timeout=2)
+    thread = threading.Thread(target=daemon.serve, daemon=True)
+    thread.start()
+    for _ in range(100):
+        client = connect_daemon(socket_path)
+        if client is not None:
+            return client, thread
+        thread.join(0.05)
+    raise AssertionError("NLP daemon did not start")
+
+def test_process_nlp_features_uses_daemon_without_loading_models(mocker, tmp_path):
+    """Test that a running daemon scores the texts and no model is loaded in-process."""
+    # Arrange
+    client, thread = _start_daemon(mocker, str(tmp_path / 'nlp.sock'))
+    client.close()
+    mock_download = mocker.patch('src.nlp_processor.download_nlp_models')
+    mock_load = mocker.patch('src.nlp_processor.load_ner_model')
+    input_path = tmp_path / 'cleaned.parquet'
+    pd.DataFrame({
+        'publishedAt': pd.to_datetime(['2024-01-01T12:00:00Z'] * 2, utc=True),
+        'content_cleaned': ['bitcoin rallies', ''],
+    }).to_parquet(input_path)
+    output_path = tmp_path / 'features.parquet'
+    entities_path = tmp_path / 'entities.parquet'
+
+    # Act
+    process_nlp_features(
+        str(input_path), str(output_path), entities_path=str(entities_path), daemon_socket=str(tmp_path / 'nlp.sock'),
+    )
+
+    # Assert
+    mock_download.assert_not_called()
+    mock_load.assert_not_called()
+    assert pd.read_parquet(output_path)['sentiment_score'].tolist() == [0.5, 0.0]
+    entities = pd.read_parquet(entities_path)
+    assert entities['article_id'].tolist() == [0]
+    assert entities['entity'].astype(str).tolist() == ['bitcoin']
+    thread.join(5)
+    assert not (tmp_path / 'nlp.sock').exists()
+
+def test_connect_daemon_falls_back_when_absent_or_mismatched(mocker, tmp_path):
+    """Test that no client is returned without a daemon or when it serves another sentiment backend."""
+    # Arrange
+    socket_path = str(tmp_path / 'nlp.sock')
+    missing = connect_daemon(str(tmp_path / 'missing.sock'))
+    client, thread = _start_daemon(mocker, socket_path)
+    client.close()
+    other_backend = mocker.MagicMock(spec=['spec'])
+    other_backend.spec = ('finbert', {'model': 'ProsusAI/finbert'})
+
+    # Act
+    mismatched = connect_daemon(socket_path, other_backend)
+
+    # Assert
+    assert missing is None
+    assert mismatched is None
+    thread.join(5)
+
+def test_daemon_serves_concurrent_clients_and_exits_when_idle(mocker, tmp_path):
+    """Test that a second client connects while another stays connected and that idling clients do not keep the daemon up."""
+    # Arrange
+    socket_path = str(tmp_path / 'nlp.sock')
+    first, thread = _start_daemon(mocker, socket_path)
+
+    # Act
+    second = connect_daemon(socket_path)
+    scores, _ = second.score(['bitcoin rallies'])
+    thread.join(5)
+
+    # Assert
+    assert scores == [0.5]
+    assert not thread.is_alive()
+    assert not (tmp_path / 'nlp.sock').exists()
+    first.close()
+    second.close()
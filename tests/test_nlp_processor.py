@@ -1,7 +1,8 @@
 import pytest
 import pandas as pd
 import pytest_mock # Added for mocker fixture
-from src.nlp_processor import process_nlp_features, download_nlp_models
+from src.nlp_processor import process_nlp_features, download_nlp_models, extract_entities_batch
+from src.nlp_cache import NLPCache
 
 @pytest.fixture
 def cleaned_news_file(tmp_path):
@@ -39,7 +40,7 @@ def test_process_nlp_features(mocker, cleaned_news_file, tmp_path):
     mock_ent.text = 'crypto'
     mock_ent.label_ = 'MONEY'
     mock_doc.ents = [mock_ent]
-    mock_nlp.return_value = mock_doc
+    mock_nlp.pipe.side_effect = lambda texts, **kwargs: [mock_doc for _ in texts]
     mock_spacy_load.return_value = mock_nlp
 
     output_path = tmp_path / "features.csv"
@@ -55,3 +56,48 @@ def test_process_nlp_features(mocker, cleaned_news_file, tmp_path):
     assert 'entities' in df.columns
     assert df['sentiment_score'].iloc[0] == 0.85
     assert "('crypto', 'MONEY')" in df['entities'].iloc[0]
+
+def test_extract_entities_batch_preserves_order(mocker):
+    """Test that batched NER skips empty texts and keeps results in input order."""
+    # Arrange
+    def make_doc(text):
+        ent = mocker.MagicMock()
+        ent.text = text.split()[0]
+        ent.label_ = 'ORG'
+        doc = mocker.MagicMock()
+        doc.ents = [ent]
+        return doc
+
+    mock_nlp = mocker.MagicMock()
+    mock_nlp.pipe.side_effect = lambda texts, **kwargs: [make_doc(t) for t in texts]
+    texts = ['bitcoin rallies', None, '', 'ethereum dips']
+
+    # Act
+    result = extract_entities_batch(texts, mock_nlp, batch_size=2, n_process=1)
+
+    # Assert
+    assert result == [[('bitcoin', 'ORG')], [], [], [('ethereum', 'ORG')]]
+    mock_nlp.pipe.assert_called_once()
+    assert mock_nlp.pipe.call_args.kwargs == {'batch_size': 2, 'n_process': 1}
+
+def test_process_nlp_features_uses_cache(mocker, cleaned_news_file, tmp_path):
+    """Test that a second run with the same cache does not re-score any text."""
+    # Arrange
+    mock_sid = mocker.patch('nltk.sentiment.vader.SentimentIntensityAnalyzer').return_value
+    mock_sid.polarity_scores.return_value = {'compound': 0.85}
+    mock_nlp = mocker.patch('spacy.load').return_value
+    mock_nlp.meta = {'name': 'core_web_sm', 'version': '3.8.0'}
+    mock_nlp.pipe.side_effect = lambda texts, **kwargs: [mocker.MagicMock(ents=[]) for _ in texts]
+    output_path = tmp_path / "features.csv"
+
+    # Act
+    with NLPCache(str(tmp_path / "nlp_cache.sqlite")) as cache:
+        process_nlp_features(cleaned_news_file, str(output_path), cache=cache)
+        process_nlp_features(cleaned_news_file, str(output_path), cache=cache)
+        stats = cache.stats()
+
+    # Assert
+    assert mock_sid.polarity_scores.call_count == 1
+    assert mock_nlp.pipe.call_count == 1
+    assert stats['hits'] == 1
+    assert pd.read_csv(output_path)['sentiment_score'].iloc[0] == 0.85
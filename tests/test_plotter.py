@@ -0,0 +1,49 @@
+import base64
+import gzip
+import json
+import numpy as np
+import pandas as pd
+from src.plotter import plot_signals, lttb, minmax_downsample
+from src.storage import write_table
+
+def test_downsamplers_keep_endpoints_and_spikes():
+    """Test that LTTB returns the point budget with both endpoints and min/max keeps a one-candle spike."""
+    # Arrange
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=10_000))
+    y[4321] = 1e6
+
+    # Act
+    kept_lttb = lttb(np.arange(len(y)), y, 500)
+    kept_minmax = minmax_downsample(y, 500)
+
+    # Assert
+    assert len(kept_lttb) == 500 and kept_lttb[0] == 0 and kept_lttb[-1] == len(y) - 1
+    assert np.all(np.diff(kept_lttb) > 0)
+    assert 4321 in kept_lttb and 4321 in kept_minmax
+    assert len(kept_minmax) <= 500
+
+def test_fast_mode_writes_small_html_and_compressed_data(tmp_path):
+    """Test that the fast mode keeps the news total and moves WebGL traces to a compressed data file."""
+    # Arrange
+    rows = 20_000
+    dates = pd.date_range('2024-01-01', periods=rows, freq='1min', tz='UTC', name='Date')
+    close = 100 + np.cumsum(np.random.default_rng(1).normal(size=rows))
+    df = pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close,
+        'sentiment_mean': np.sin(np.arange(rows) / 50), 'news_count': np.ones(rows),
+    }, index=dates)
+    features_path = str(tmp_path / "final.parquet")
+    write_table(df, features_path)
+    html_path = tmp_path / "plot.html"
+
+    # Act
+    plot_signals(features_path, str(html_path), 'BTCUSDT', mode='fast', width_px=400)
+
+    # Assert
+    payload = (tmp_path / "plot.data.js").read_text().split('"')[1]
+    traces = json.loads(gzip.decompress(base64.b64decode(payload)))
+    assert [trace['type'] for trace in traces] == ['scattergl', 'scattergl', 'bar']
+    assert (tmp_path / "plotly.min.js").exists() and 'plot.data.js' in html_path.read_text()
+    volume = traces[2]['y']
+    assert np.frombuffer(base64.b64decode(volume['bdata']), dtype=volume['dtype']).sum() == rows
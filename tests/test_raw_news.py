@@ -0,0 +1,45 @@
+import json
+import pytest
+from src.raw_news import iter_article_chunks, read_raw_articles, write_raw_articles, RawArticleWriter
+
+@pytest.mark.parametrize("ext", [".jsonl", ".jsonl.gz"])
+def test_write_and_append_json_lines(tmp_path, ext):
+    """Test that JSON Lines raw news can be appended to and streamed back in chunks."""
+    # Arrange
+    path = str(tmp_path / f"raw{ext}")
+    articles = [{'title': f"Título {i}", 'url': f"u{i}"} for i in range(5)]
+
+    # Act
+    write_raw_articles(articles[:3], path)
+    write_raw_articles(articles[3:], path, append=True)
+    chunks = list(iter_article_chunks(path, chunk_size=2, skip=1))
+
+    # Assert
+    assert read_raw_articles(path) == articles
+    assert chunks == [articles[1:3], articles[3:5]]
+
+def test_legacy_json_document_is_readable(tmp_path):
+    """Test that the original {"articles": [...]} document is still read."""
+    path = tmp_path / "raw.json"
+    path.write_text(json.dumps({'articles': [{'url': 'u1'}, {'url': 'u2'}]}))
+
+    assert [chunk for chunk in iter_article_chunks(str(path), chunk_size=1)] == [[{'url': 'u1'}], [{'url': 'u2'}]]
+
+@pytest.mark.parametrize("ext", [".jsonl", ".jsonl.gz"])
+def test_raw_article_writer_appends_through_one_handle(tmp_path, ext):
+    """Test that the writer appends after existing articles through a single handle."""
+    # Arrange
+    path = str(tmp_path / f"raw{ext}")
+    write_raw_articles([{'url': 'u0'}], path)
+
+    # Act
+    writer = RawArticleWriter(path)
+    writer({'url': 'u1'})
+    writer({'url': 'u2'})
+    writer.close()
+
+    # Assert
+    assert read_raw_articles(path) == [{'url': 'u0'}, {'url': 'u1'}, {'url': 'u2'}]
+    with pytest.raises(ValueError):
+        RawArticleWriter(str(tmp_path / "raw.json"))
+
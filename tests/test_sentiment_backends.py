@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from types import SimpleNamespace
+from src.sentiment_backends import create_backend
+
+class FakeTokenizer:
+    """Whitespace tokenizer that pads each batch to its longest text, like padding='longest'."""
+    vocab = {'good': 1, 'bad': 2}
+
+    def __init__(self):
+        self.padded_lengths = []
+
+    def __call__(self, texts, padding, truncation, max_length, return_tensors):
+        ids = [[self.vocab.get(word, 3) for word in text.split()][:max_length] for text in texts]
+        width = max(len(row) for row in ids)
+        self.padded_lengths.append(width)
+        input_ids = np.array([row + [0] * (width - len(row)) for row in ids])
+        return {'input_ids': input_ids, 'attention_mask': (input_ids > 0).astype(np.int64), 'token_type_ids': input_ids * 0}
+
+class FakeSession:
+    """An onnxruntime session double whose logits count 'good' and 'bad' tokens."""
+
+    def get_inputs(self):
+        return [SimpleNamespace(name='input_ids'), SimpleNamespace(name='attention_mask')]
+
+    def run(self, output_names, feeds):
+        ids = feeds['input_ids']
+        return [np.stack([(ids == 1).sum(axis=1), (ids == 2).sum(axis=1), np.ones(len(ids))], axis=1).astype(float)]
+
+def test_onnx_backend_batches_by_length_with_dynamic_padding():
+    """Test that scores keep input order while batches are length-sorted and padded per batch."""
+    # Arrange
+    tokenizer = FakeTokenizer()
+    backend = create_backend('onnx', onnx_path='finbert.onnx', batch_size=2, tokenizer=tokenizer, session=FakeSession())
+    texts = ['good ' * 8, 'bad', '', 'good news', 'bad bad day', None]
+
+    # Act
+    scores = backend.score(texts)
+
+    # Assert
+    assert scores[2] == scores[5] == 0.0
+    assert scores[0] > scores[3] > 0 > scores[4] and scores[1] < 0
+    assert tokenizer.padded_lengths == [2, 8] # ['bad', 'good news'], then the two longest
+    metrics = backend.metrics.as_dict()
+    assert metrics['texts'] == 4 and metrics['batches'] == 2
+    assert metrics['texts_per_sec'] > 0 and 0 < metrics['padding_efficiency'] <= 1
+
+def test_create_backend_rejects_unknown_names():
+    """Test that an unknown backend name in config fails loudly."""
+    with pytest.raises(ValueError):
+        create_backend('bert-of-theseus')
@@ -0,0 +1,18 @@
+import subprocess
+import sys
+from benchmarks.bench_import_time import HEAVY_MODULES
+
+def test_entry_points_and_stage_modules_do_not_import_heavy_dependencies():
+    """Test that spaCy, NLTK, ccxt, NewsAPI and plotly are only imported by the stages using them."""
+    # Arrange
+    modules = ['scripts.run_pipeline', 'scripts.run_stream', 'src.incremental', 'src.plotter', 'src.streaming', 'src.nlp_daemon']
+    code = (
+        f"import sys, {', '.join(modules)}\n"
+        f"print(','.join(sorted(name for name in sys.modules if name.split('.')[0] in {HEAVY_MODULES!r})))"
+    )
+
+    # Act
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+
+    # Assert
+    assert result.stdout.strip() == ''
@@ -0,0 +1,46 @@
+import json
+import pandas as pd
+from unittest.mock import MagicMock
+from src.aligner import align_frames
+from src.raw_news import write_raw_articles
+from src.streaming import StreamProcessor, JsonlSink, replay_articles, run_stream
+
+class FakeAnalyzer:
+    """Scores a text by its length so results are deterministic without the VADER lexicon."""
+    def polarity_scores(self, text):
+        return {'compound': (len(text) % 7) / 7 - 0.5}
+
+def test_replay_matches_batch_alignment(tmp_path):
+    """Test that replaying a recorded file yields the per-candle aggregates of align_frames."""
+    # Arrange
+    published = pd.date_range('2024-01-01 00:03', periods=40, freq='11min', tz='UTC')
+    articles = [
+        {'publishedAt': ts.isoformat(), 'title': f'Title {i}', 'description': f'Bitcoin story number {i} ' * (i % 4 + 1),
+         'url': f'u{i}'}
+        for i, ts in enumerate(published)
+    ]
+    raw_path = str(tmp_path / "raw.jsonl")
+    write_raw_articles(articles[::-1], raw_path) # Providers return newest first
+    nlp_model = MagicMock()
+    nlp_model.return_value.ents = []
+    rows = []
+    sink = JsonlSink(str(tmp_path / "signals.jsonl"))
+    processor = StreamProcessor(
+        nlp_model, sid=FakeAnalyzer(), interval='15m', window='30m', publication_lag='2m', sinks=[rows.append, sink],
+    )
+
+    # Act
+    emitted = run_stream(replay_articles(raw_path), processor)
+    sink.close()
+
+    # Assert
+    assert emitted == 40
+    streamed = pd.DataFrame(rows).groupby('Date')[['sentiment_mean', 'news_count']].last()
+    news_df = pd.DataFrame({'publishedAt': [r['publishedAt'] for r in rows], 'sentiment_score': [r['sentiment_score'] for r in rows]})
+    market_df = pd.DataFrame({'Date': pd.date_range('2024-01-01', periods=40, freq='15min', tz='UTC')})
+    batch = align_frames(news_df, market_df, interval='15m', window='30m', publication_lag='2m')
+    pd.testing.assert_frame_equal(streamed, batch.loc[streamed.index, ['sentiment_mean', 'news_count']], check_freq=False)
+
+    lines = (tmp_path / "signals.jsonl").read_text().splitlines()
+    assert len(lines) == 40 and json.loads(lines[-1])['url'] == 'u39'
+    assert set(processor.tracker.summary()['stage']) == {'clean', 'sentiment', 'ner', 'aggregate', 'emit', 'total'}
@@ -1,7 +1,10 @@
+import re
+import json
 import pytest
 import pandas as pd
-import json
-from src.text_cleaner import clean_text, clean_news_data
+from src.text_cleaner import clean_text, clean_texts, clean_news_data
+from src.raw_news import write_raw_articles
+from src.storage import read_table
 
 @pytest.mark.parametrize("input_text, expected_output", [
     ("<p>Hello World!</p>", "hello world"),
@@ -38,7 +41,8 @@ def test_clean_news_data(raw_news_file, tmp_path):
 
     # Assert
     assert output_path.exists()
-    df = pd.read_csv(output_path)
+    # CSV cannot tell an empty string from a missing value; read empty cells back as "".
+    df = pd.read_csv(output_path, keep_default_na=False)
     
     assert 'title_cleaned' in df.columns
     assert 'content_cleaned' in df.columns
@@ -53,3 +57,59 @@ def test_clean_news_data(raw_news_file, tmp_path):
 
     # Check that None content results in an empty string
     assert df['content_cleaned'].iloc[2] == ""
+
+def _reference_clean_text(text):
+    """The original two-pass implementation that clean_text must match byte for byte."""
+    if not isinstance(text, str):
+        return ""
+    text = re.sub(r'<[^>]+>', '', text)
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    return " ".join(text.lower().split())
+
+def test_clean_texts_matches_reference():
+    """Test that the single-pass cleaner matches the two-pass original, in and out of process."""
+    # Arrange
+    texts = [
+        "1<b>x", "a < b > c", "<<b>>tag", "x<y", "<p>Café naïve</p>\n\tTabs",
+        "emoji \U0001F680 moon!!", "", None, 3.5, "<a href='x'>Link</a> 100% <unclosed",
+    ] * 50
+
+    # Act
+    in_process = clean_texts(texts)
+    sharded = clean_texts(texts, n_process=2, chunk_size=100)
+
+    # Assert
+    expected = [_reference_clean_text(text) for text in texts]
+    assert in_process == expected
+    assert sharded == expected
+
+def test_clean_news_data_streams_json_lines(tmp_path):
+    """Test that chunked cleaning of a gzipped JSON Lines file matches cleaning it in one go."""
+    # Arrange
+    articles = [
+        {'publishedAt': f'2024-01-01T{i % 24:02d}:00:00Z', 'title': f'<b>Title {i}</b>',
+         'description': None if i % 3 else f'Desc {i}!', 'content': f'Content {i}', 'url': f'u{i}'}
+        for i in range(25)
+    ]
+    raw_path = str(tmp_path / "raw.jsonl.gz")
+    write_raw_articles(articles, raw_path)
+
+    no_content_path = str(tmp_path / "no_content.jsonl")
+    write_raw_articles(articles[:7] + [{'title': 'bare', 'url': 'b'}] * 7, no_content_path)
+    corrupt_path = str(tmp_path / "corrupt.jsonl")
+    write_raw_articles(articles, corrupt_path)
+    with open(corrupt_path, 'a') as f:
+        f.write('{"title": "truncated\n')
+
+    # Act
+    clean_news_data(raw_path, str(tmp_path / "chunked.parquet"), chunk_size=7)
+    clean_news_data(raw_path, str(tmp_path / "whole.parquet"))
+    for path in (no_content_path, corrupt_path):
+        with pytest.raises(ValueError):
+            clean_news_data(path, str(tmp_path / "partial.parquet"), chunk_size=7)
+
+    # Assert
+    chunked = read_table(str(tmp_path / "chunked.parquet"))
+    pd.testing.assert_frame_equal(chunked, read_table(str(tmp_path / "whole.parquet")))
+    assert chunked['content_cleaned'].tolist()[:3] == ['desc', 'content', 'content']
+    assert not (tmp_path / "partial.parquet").exists()
@@ -0,0 +1,46 @@
+import pandas as pd
+from src.universe import Asset, AssetRouter, load_universe, split_by_asset
+from src.news_fetcher import fetch_articles
+
+def test_router_matches_aliases_and_entity_only_aliases():
+    """Test that articles are routed to every asset they mention, ambiguous names only as entities."""
+    # Arrange
+    router = AssetRouter([
+        Asset('BTC', 'BTCUSDT', queries=['Bitcoin'], aliases=['BTC']),
+        Asset('ETH', 'ETHUSDT', queries=['Ethereum'], aliases=['ether']),
+        Asset('SOL', 'SOLUSDT', queries=['Solana'], entity_aliases=['SOL']),
+    ])
+    features_df = pd.DataFrame({
+        'title_cleaned': ['bitcoin and ether rally', 'markets', 'sol jumps', 'a sol at the beach'],
+        'content_cleaned': ['', 'btc dips while the ethereal mood holds', 'sol jumps', 'sunny'],
+        'entities': [[], [], [('SOL', 'ORG')], []],
+    })
+
+    # Act
+    routes = router.route_frame(features_df)
+    tables = split_by_asset(features_df, router)
+
+    # Assert
+    assert routes.tolist() == [['BTC', 'ETH'], ['BTC'], ['SOL'], []]
+    assert {name: len(df) for name, df in tables.items()} == {'BTC': 2, 'ETH': 1, 'SOL': 1}
+
+def test_load_universe_defaults_to_single_asset_and_queries_fan_out(mocker):
+    """Test the single-asset fallback and that multi-term queries are fetched once each and merged."""
+    # Arrange
+    config = {'news': {'query': 'Bitcoin'}, 'market': {'symbol': 'BTCUSDT'}}
+    fetched = {
+        'Bitcoin': [{'url': 'a', 'title': 'btc'}, {'url': 'b', 'title': 'both'}],
+        'Ethereum': [{'url': 'b', 'title': 'both'}, {'url': 'c', 'title': 'eth'}],
+    }
+    mock_fetch = mocker.patch(
+        'src.news_fetcher._fetch_newsapi_news', side_effect=lambda key, query, *args: fetched[query],
+    )
+
+    # Act
+    assets = load_universe(config)
+    articles = fetch_articles('key', ['Bitcoin', 'Ethereum', 'Bitcoin'], '2024-01-01', '2024-01-02')
+
+    # Assert
+    assert [(asset.name, asset.symbol, asset.aliases) for asset in assets] == [('BTC', 'BTCUSDT', ['bitcoin'])]
+    assert mock_fetch.call_count == 2
+    assert [article['url'] for article in articles] == ['a', 'b', 'c']